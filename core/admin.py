@@ -3,12 +3,17 @@ from django.contrib.auth.admin import UserAdmin
 from django.contrib.auth.models import Group
 
 from core.models import User
+from todolist.paginator import EstimatedCountPaginator
 
 
 @admin.register(User)
 class CustomUserAdmin(UserAdmin):
     list_display = ('username', 'email', 'first_name', 'last_name')
-    search_fields = ('username', 'email', 'first_name', 'last_name')
+    # A prefix match on username uses its index; ILIKE on every column read the whole table.
+    search_fields = ('username__startswith',)
+    search_help_text = 'Начало имени пользователя (с учётом регистра)'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     readonly_fields = ('last_login', 'date_joined')
     fieldsets = (
         (None, {'fields': ('username', 'password')}),
@@ -5,3 +5,6 @@ class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
     verbose_name = 'Ядро'
+
+    def ready(self) -> None:
+        from core import signals  # noqa: F401
@@ -0,0 +1,9 @@
+from core import views
+from core.models import User
+from todolist import async_generics
+
+
+class ProfileView(views.ProfileView, async_generics.AsyncRetrieveUpdateDestroyAPIView):
+    async def aget_object(self) -> User:
+        # Already loaded by authentication, no query needed.
+        return self.request.user
@@ -0,0 +1,70 @@
+import copy
+from typing import Union
+
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
+from django.http import HttpRequest
+from django.utils.crypto import constant_time_compare
+
+from core.models import User
+
+USER_KEY = 'core:user:{user_id}'
+
+
+def get_cache():
+    return caches[settings.SESSION_CACHE_ALIAS]
+
+
+def cache_user(user: User) -> None:
+    key = USER_KEY.format(user_id=user.pk)
+    if user.get_deferred_fields():
+        get_cache().delete(key)
+        return
+    cached = copy.copy(user)
+    cached._password = None
+    get_cache().set(key, cached, timeout=settings.AUTH_USER_CACHE_TIMEOUT)
+
+
+def forget_user(user_id: int) -> None:
+    get_cache().delete(USER_KEY.format(user_id=user_id))
+
+
+def forget_users(user_ids: list[int]) -> None:
+    get_cache().delete_many([USER_KEY.format(user_id=user_id) for user_id in user_ids])
+
+
+def get_user(request: HttpRequest) -> Union[User, AnonymousUser]:
+    """
+    ``django.contrib.auth.get_user`` with the user read from the cache. The
+    session hash is still checked against the cached user, and the cached
+    user is replaced on every save and dropped on every QuerySet.update(),
+    so a password change ends the other sessions as before. Changes made
+    with raw SQL are not seen until AUTH_USER_CACHE_TIMEOUT runs out; call
+    ``forget_user`` after them.
+    """
+    if not settings.AUTH_CACHE_ENABLED:
+        return auth.get_user(request)
+
+    user_id = request.session.get(SESSION_KEY)
+    backend_path = request.session.get(BACKEND_SESSION_KEY)
+    if user_id is None or backend_path not in settings.AUTHENTICATION_BACKENDS:
+        return auth.get_user(request)
+
+    user = get_cache().get(USER_KEY.format(user_id=user_id))
+    if user is None:
+        user = auth.get_user(request)
+        if user.is_authenticated:
+            cache_user(user)
+        return user
+
+    if not user.is_active:
+        return AnonymousUser()
+    session_hash = request.session.get(HASH_SESSION_KEY)
+    if not (session_hash and constant_time_compare(session_hash, user.get_session_auth_hash())):
+        request.session.flush()
+        return AnonymousUser()
+    user.backend = backend_path
+    return user
@@ -0,0 +1,58 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.core.management.base import BaseCommand, CommandParser
+
+from core import passwords
+
+
+class Command(BaseCommand):
+    help = (
+        'Measures password checks (the cost of one login) per second, inline and through the '
+        'hashing process pool, and reports them per core'
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--duration', type=float, default=10, help='Seconds per measurement')
+        parser.add_argument(
+            '--callers', type=int, default=settings.PASSWORD_HASHING_MAX_PENDING, help='Concurrent callers of the pool'
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        encoded = hashers.make_password('benchmark password')
+        duration = options['duration']
+
+        def check_inline() -> None:
+            passwords._check_password('benchmark password', encoded)
+
+        def check_pooled() -> None:
+            passwords.check_password('benchmark password', encoded)
+
+        rate = self.measure(check_inline, 1, duration)
+        self.stdout.write(f'inline:  {rate:.1f} logins/s on 1 core')
+
+        workers = settings.PASSWORD_HASHING_WORKERS
+        if workers:
+            check_pooled()  # start the pool outside of the measurement
+            rate = self.measure(check_pooled, options['callers'], duration)
+            self.stdout.write(
+                f'pooled:  {rate:.1f} logins/s on {workers} worker processes ({rate / workers:.1f} per core)'
+            )
+
+    def measure(self, func, callers: int, duration: float) -> float:
+        deadline = time.perf_counter() + duration
+
+        def loop() -> int:
+            done = 0
+            while time.perf_counter() < deadline:
+                func()
+                done += 1
+            return done
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(callers) as executor:
+            done = sum(executor.map(lambda _: loop(), range(callers)))
+        return done / (time.perf_counter() - started)
@@ -0,0 +1,26 @@
+import time
+from typing import Any
+
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand, CommandParser
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = 'Delete expired sessions in chunks, so no single DELETE holds locks on the whole table'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Sessions per DELETE')
+        parser.add_argument('--sleep', type=float, default=0.1, help='Seconds to pause between chunks')
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        now = timezone.now()
+        deleted = 0
+        while True:
+            chunk = Session.objects.filter(expire_date__lt=now).values('pk')[:options['chunk_size']]
+            count, _ = Session.objects.filter(pk__in=chunk).delete()
+            deleted += count
+            if count < options['chunk_size']:
+                break
+            time.sleep(options['sleep'])
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} expired sessions'))
@@ -0,0 +1,63 @@
+import os
+import signal
+import statistics
+import subprocess
+import time
+import urllib.error
+import urllib.request
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+
+class Command(BaseCommand):
+    help = (
+        'Starts the server through the container entrypoint and measures the time from the start of the '
+        'command to the first request it serves, e.g. '
+        '"manage.py measure_cold_start -- gunicorn todolist.asgi -k uvicorn.workers.UvicornWorker -b 127.0.0.1:8000"'
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('command', nargs='+', help='Server command given to the entrypoint')
+        parser.add_argument('--entrypoint', default=str(settings.BASE_DIR / 'entrypoint.sh'))
+        parser.add_argument('--url', default='http://127.0.0.1:8000/ready', help='URL polled until it answers 200')
+        parser.add_argument('--runs', type=int, default=3)
+        parser.add_argument('--timeout', type=float, default=120)
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        times = []
+        for run in range(1, options['runs'] + 1):
+            command = ['bash', options['entrypoint'], *options['command']]
+            elapsed = self.measure(command, options['url'], options['timeout'])
+            times.append(elapsed)
+            self.stdout.write(f'run {run}: first request served after {elapsed:.2f}s')
+        self.stdout.write(self.style.SUCCESS(
+            f'cold start: min {min(times):.2f}s, median {statistics.median(times):.2f}s, max {max(times):.2f}s'
+        ))
+
+    def measure(self, command: list[str], url: str, timeout: float) -> float:
+        started = time.perf_counter()
+        process = subprocess.Popen(
+            command, cwd=settings.BASE_DIR, start_new_session=True,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            while time.perf_counter() - started < timeout:
+                if process.poll() is not None:
+                    raise CommandError(f'The server exited with code {process.returncode} before serving a request')
+                try:
+                    with urllib.request.urlopen(url, timeout=1) as response:
+                        if response.status == 200:
+                            return time.perf_counter() - started
+                except (urllib.error.URLError, ConnectionError, TimeoutError):
+                    pass
+                time.sleep(0.01)
+            raise CommandError(f'No response from {url} within {timeout:.0f}s')
+        finally:
+            os.killpg(process.pid, signal.SIGTERM)
+            try:
+                process.wait(10)
+            except subprocess.TimeoutExpired:
+                os.killpg(process.pid, signal.SIGKILL)
+                process.wait()
@@ -0,0 +1,112 @@
+import hashlib
+import os
+import time
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator
+
+from django.conf import settings
+from django.contrib.staticfiles.finders import get_finders
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.migrations.executor import MigrationExecutor
+
+MANIFEST_NAME = '.collectstatic.sha256'
+# collectstatic's default ignore patterns.
+IGNORE_PATTERNS = ['CVS', '.*', '*~']
+LOCK_ID = zlib.crc32(b'todolist.startup')
+
+
+def static_digest() -> str:
+    """Digest of the paths and contents of every file collectstatic would copy, and of the storage."""
+    files = {}
+    for finder in get_finders():
+        for path, storage in finder.list(IGNORE_PATTERNS):
+            prefixed = os.path.join(storage.prefix, path) if getattr(storage, 'prefix', None) else path
+            files.setdefault(prefixed, storage.path(path))  # the first finder wins, as in collectstatic
+
+    digest = hashlib.sha256(settings.STATICFILES_STORAGE.encode())
+    for prefixed in sorted(files):
+        digest.update(b'\0' + prefixed.encode() + b'\0')
+        with open(files[prefixed], 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 16), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+class Command(BaseCommand):
+    help = (
+        'Prepares the container before the server starts, in one Django process: collects static files '
+        'only when their contents changed and applies pending migrations. Both run under a Postgres '
+        'advisory lock, so when several instances start together one does the work and the others wait '
+        'for it and then find nothing to do.'
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+        parser.add_argument(
+            '--lock-timeout', type=float, default=600, help='Seconds to wait for another instance to finish'
+        )
+        parser.add_argument('--skip-static', action='store_true')
+        parser.add_argument('--skip-migrate', action='store_true')
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        started = time.perf_counter()
+        connection = connections[options['database']]
+        with self.lock(connection, options['lock_timeout']):
+            if not options['skip_static']:
+                with self.timed('static files'):
+                    self.collect_static()
+            if not options['skip_migrate']:
+                with self.timed('migrations'):
+                    self.migrate(connection)
+        self.stdout.write(f'startup: ready in {time.perf_counter() - started:.2f}s')
+
+    @contextmanager
+    def lock(self, connection: Any, timeout: float) -> Iterator[None]:
+        deadline = time.monotonic() + timeout
+        waiting = False
+        with connection.cursor() as cursor:
+            while True:
+                cursor.execute('SELECT pg_try_advisory_lock(%s)', [LOCK_ID])
+                if cursor.fetchone()[0]:
+                    break
+                if time.monotonic() > deadline:
+                    raise CommandError(f'Another instance held the startup lock for over {timeout:.0f}s')
+                if not waiting:
+                    self.stdout.write('startup: waiting for another instance to finish')
+                    waiting = True
+                time.sleep(0.5)
+        try:
+            yield
+        finally:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT pg_advisory_unlock(%s)', [LOCK_ID])
+
+    @contextmanager
+    def timed(self, step: str) -> Iterator[None]:
+        started = time.perf_counter()
+        yield
+        self.stdout.write(f'startup: {step} done in {time.perf_counter() - started:.2f}s')
+
+    def collect_static(self) -> None:
+        manifest = Path(settings.STATIC_ROOT) / MANIFEST_NAME
+        digest = static_digest()
+        if manifest.exists() and manifest.read_text() == digest:
+            self.stdout.write('startup: static files are up to date')
+            return
+        # Clearing keeps files removed from the sources from lingering, as collectstatic -c did.
+        call_command('collectstatic', clear=True, interactive=False, verbosity=0)
+        manifest.write_text(digest)
+        self.stdout.write('startup: collected static files')
+
+    def migrate(self, connection: Any) -> None:
+        executor = MigrationExecutor(connection)
+        plan = executor.migration_plan(executor.loader.graph.leaf_nodes())
+        if not plan:
+            self.stdout.write('startup: no migrations to apply')
+            return
+        self.stdout.write(f'startup: applying {len(plan)} migrations')
+        call_command('migrate', database=connection.alias, interactive=False)
@@ -1,10 +1,52 @@
-from django.contrib.auth.models import AbstractUser
-from django.db import models
+from typing import Any, Optional
+
+from django.contrib.auth.models import AbstractUser, UserManager as BaseUserManager
+from django.db import models, transaction
+
+from core import passwords
+
+
+class UserQuerySet(models.QuerySet):
+    def update(self, **kwargs: Any) -> int:
+        # update() and bulk_update() send no post_save, so the users cached by core.cache are dropped here.
+        from core.cache import forget_users  # core.cache imports this module
+
+        ids = list(self.values_list('pk', flat=True))
+        rows = super().update(**kwargs)
+        transaction.on_commit(lambda: forget_users(ids), using=self.db)
+        return rows
+
+
+class UserManager(BaseUserManager.from_queryset(UserQuerySet)):
+    def _create_user(self, username: str, email: Optional[str], password: Optional[str], **extra_fields) -> 'User':
+        # The base manager hashes with hashers.make_password, outside the hashing pool.
+        if not username:
+            raise ValueError('The given username must be set')
+        user = self.model(
+            username=self.model.normalize_username(username), email=self.normalize_email(email), **extra_fields
+        )
+        user.set_password(password)
+        user.save(using=self._db)
+        return user
 
 
 class User(AbstractUser):
     REQUIRED_FIELDS = []
 
+    objects = UserManager()
+
     class Meta:
         verbose_name = 'Пользователь'
         verbose_name_plural = 'Пользователи'
+
+    def set_password(self, raw_password: Optional[str]) -> None:
+        self.password = passwords.make_password(raw_password)
+        self._password = raw_password
+
+    def check_password(self, raw_password: Optional[str]) -> bool:
+        is_correct, must_update = passwords.check_password(raw_password, self.password)
+        if is_correct and must_update:
+            self.set_password(raw_password)
+            self._password = None
+            self.save(update_fields=['password'])
+        return is_correct
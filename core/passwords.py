@@ -0,0 +1,88 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional
+
+import django
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class PasswordHashingBusy(Exception):
+    """No hashing slot freed up within PASSWORD_HASHING_TIMEOUT seconds."""
+
+
+def _make_password(password: str) -> str:
+    return hashers.make_password(password)
+
+
+def _check_password(password: str, encoded: str) -> tuple[bool, bool]:
+    must_update = []
+    is_correct = hashers.check_password(password, encoded, setter=must_update.append)
+    return is_correct, bool(must_update)
+
+
+class HashingPool:
+    """
+    Runs password hashing in a process pool of PASSWORD_HASHING_WORKERS
+    processes per web worker, so login storms use a bounded share of the CPU.
+    At most PASSWORD_HASHING_MAX_PENDING hashes may be queued or running;
+    callers wait PASSWORD_HASHING_TIMEOUT seconds for a slot and get
+    PasswordHashingBusy after that, which the API views answer with a 503.
+    The calling thread still waits for its hash. A pool broken by a dead
+    worker is replaced. With PASSWORD_HASHING_WORKERS = 0 hashing runs
+    inline.
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.slots: Optional[threading.BoundedSemaphore] = None
+        self.pid: Optional[int] = None
+
+    def get_executor(self, broken: Optional[ProcessPoolExecutor] = None) -> ProcessPoolExecutor:
+        """The pool of this process; ``broken``, if it is still the current one, is replaced."""
+        with self.lock:
+            # A pool inherited through fork belongs to the parent process.
+            if self.executor is None or self.pid != os.getpid():
+                self.executor = ProcessPoolExecutor(settings.PASSWORD_HASHING_WORKERS, initializer=django.setup)
+                self.slots = threading.BoundedSemaphore(settings.PASSWORD_HASHING_MAX_PENDING)
+                self.pid = os.getpid()
+            elif self.executor is broken:
+                broken.shutdown(wait=False)
+                self.executor = ProcessPoolExecutor(settings.PASSWORD_HASHING_WORKERS, initializer=django.setup)
+            return self.executor
+
+    def run(self, func: Callable, *args: Any) -> Any:
+        if not settings.PASSWORD_HASHING_WORKERS:
+            return func(*args)
+        executor = self.get_executor()
+        slots = self.slots
+        if not slots.acquire(timeout=settings.PASSWORD_HASHING_TIMEOUT):
+            raise PasswordHashingBusy
+        try:
+            try:
+                return executor.submit(func, *args).result()
+            except BrokenProcessPool:
+                # A worker died (the OOM killer, a crash); the pool fails
+                # everything from then on, so start a new one and retry once.
+                return self.get_executor(broken=executor).submit(func, *args).result()
+        finally:
+            slots.release()
+
+
+pool = HashingPool()
+
+
+def make_password(password: Optional[str]) -> str:
+    if password is None:
+        return hashers.make_password(None)
+    return pool.run(_make_password, password)
+
+
+def check_password(password: Optional[str], encoded: str) -> tuple[bool, bool]:
+    """Whether ``password`` matches ``encoded`` and whether ``encoded`` should be rehashed."""
+    if password is None or not hashers.is_password_usable(encoded):
+        return False, False
+    return pool.run(_check_password, password, encoded)
@@ -13,7 +13,7 @@ class ProfileSerializer(serializers.ModelSerializer):
 
 class CreateUserSerializer(serializers.ModelSerializer):
     password = PasswordField(required=True, write_only=False)
-    password_repeat = PasswordField(required=True)
+    password_repeat = PasswordField(required=True, validate=False)
 
     class Meta:
         model = User
@@ -27,10 +27,10 @@ class CreateUserSerializer(serializers.ModelSerializer):
 
 class LoginSerializer(serializers.Serializer):
     username = serializers.CharField(required=True)
-    password = PasswordField(required=True)
+    password = PasswordField(required=True, validate=False)
 
 
 class UpdatePasswordSerializer(serializers.Serializer):
-    old_password = PasswordField(required=True)
+    old_password = PasswordField(required=True, validate=False)
     new_password = PasswordField(required=True)
 
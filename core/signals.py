@@ -0,0 +1,24 @@
+from typing import Any
+
+from django.contrib.auth.signals import user_logged_in
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.cache import cache_user, forget_user
+from core.models import User
+
+
+@receiver(user_logged_in)
+def cache_logged_in_user(sender: Any, request: Any, user: User, **kwargs: Any) -> None:
+    cache_user(user)
+
+
+@receiver(post_save, sender=User)
+def cache_saved_user(sender: Any, instance: User, **kwargs: Any) -> None:
+    transaction.on_commit(lambda: cache_user(instance))
+
+
+@receiver(post_delete, sender=User)
+def forget_deleted_user(sender: Any, instance: User, **kwargs: Any) -> None:
+    transaction.on_commit(lambda: forget_user(instance.pk))
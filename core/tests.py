@@ -1,3 +1,103 @@
-from django.test import TestCase
+import os
+import signal
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient, APITestCase
+
+from core import passwords
+from core.cache import USER_KEY, get_cache
+from core.models import User
+
+
+@override_settings(PASSWORD_HASHING_WORKERS=1)
+class PasswordHashingTests(APITestCase):
+    def setUp(self) -> None:
+        self.user = User.objects.create_user(username='owner', password='Str0ng-passw0rd')
+
+    def login(self, password: str) -> int:
+        return self.client.post(reverse('core:login'), {'username': 'owner', 'password': password}).status_code
+
+    def test_check_password(self) -> None:
+        self.assertTrue(hashers.identify_hasher(self.user.password))
+        self.assertEqual(passwords.check_password('Str0ng-passw0rd', self.user.password), (True, False))
+        self.assertEqual(passwords.check_password('wrong', self.user.password), (False, False))
+        self.assertEqual(passwords.check_password(None, self.user.password), (False, False))
+        self.assertEqual(self.login('wrong'), 403)
+        self.assertEqual(self.login('Str0ng-passw0rd'), 200)
+
+    def test_rehash(self) -> None:
+        encoded = hashers.make_password('Str0ng-passw0rd', hasher='pbkdf2_sha1')
+        User.objects.filter(id=self.user.id).update(password=encoded)
+        self.assertEqual(self.login('Str0ng-passw0rd'), 200)
+        self.user.refresh_from_db()
+        self.assertEqual(hashers.identify_hasher(self.user.password).algorithm, hashers.get_hasher().algorithm)
+
+    @override_settings(PASSWORD_HASHING_TIMEOUT=0.01)
+    def test_busy(self) -> None:
+        passwords.pool.get_executor()
+        slots = passwords.pool.slots
+        for _ in range(settings.PASSWORD_HASHING_MAX_PENDING):
+            slots.acquire()
+        try:
+            response = self.client.post(reverse('core:login'), {'username': 'owner', 'password': 'Str0ng-passw0rd'})
+        finally:
+            for _ in range(settings.PASSWORD_HASHING_MAX_PENDING):
+                slots.release()
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.data['detail'].code, 'password_hashing_busy')
+        self.assertEqual(self.login('Str0ng-passw0rd'), 200)
+
+    def test_broken_pool(self) -> None:
+        executor = passwords.pool.get_executor()
+        self.assertEqual(self.login('Str0ng-passw0rd'), 200)
+        for pid in list(executor._processes):
+            os.kill(pid, signal.SIGKILL)
+        self.assertEqual(self.login('Str0ng-passw0rd'), 200)
+        self.assertIsNot(passwords.pool.executor, executor)
+
+
+@override_settings(AUTH_CACHE_ENABLED=True)
+class UserCacheTests(APITestCase):
+    def setUp(self) -> None:
+        get_cache().clear()
+        self.user = User.objects.create_user(username='owner', password='Str0ng-passw0rd')
+        self.key = USER_KEY.format(user_id=self.user.id)
+        self.client.login(username='owner', password='Str0ng-passw0rd')
+        self.other = APIClient()
+        self.other.login(username='owner', password='Str0ng-passw0rd')
+
+    def get_profile(self, client: APIClient) -> int:
+        return client.get(reverse('core:profile')).status_code
+
+    def test_cached(self) -> None:
+        self.assertEqual(get_cache().get(self.key).pk, self.user.pk)
+        # The session only.
+        with self.assertNumQueries(1):
+            self.assertEqual(self.get_profile(self.other), 200)
+
+    def test_password_change(self) -> None:
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.put(reverse('core:update_password'), {
+                'old_password': 'Str0ng-passw0rd', 'new_password': 'N3w-Str0ng-passw0rd',
+            })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(get_cache().get(self.key).password, User.objects.get(pk=self.user.pk).password)
+        self.assertEqual(self.get_profile(self.other), 403)
+        self.assertTrue(self.other.login(username='owner', password='N3w-Str0ng-passw0rd'))
+        self.assertEqual(self.get_profile(self.other), 200)
+
+    def test_queryset_update(self) -> None:
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.filter(pk=self.user.pk).update(password=passwords.make_password('N3w-Str0ng-passw0rd'))
+        self.assertIsNone(get_cache().get(self.key))
+        self.assertEqual(self.get_profile(self.other), 403)
+        self.assertEqual(self.get_profile(self.client), 403)
+
+        self.other.login(username='owner', password='N3w-Str0ng-passw0rd')
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertIsNone(get_cache().get(self.key))
+        self.assertEqual(self.get_profile(self.other), 403)
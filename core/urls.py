@@ -1,10 +1,15 @@
+from django.conf import settings
 from django.urls import path
 
-from core.views import SignUpView, LoginView, ProfileView, UpdatePasswordView
+from core import async_views, views
+from core.views import SignUpView, LoginView, UpdatePasswordView
+
+# The profile view has an async variant for ASGI deployments.
+read_views = async_views if settings.ASYNC_VIEWS else views
 
 urlpatterns = [
     path('signup', SignUpView.as_view(), name='signup'),
     path('login', LoginView.as_view(), name='login'),
-    path('profile', ProfileView.as_view(), name='profile'),
+    path('profile', read_views.ProfileView.as_view(), name='profile'),
     path('update_password', UpdatePasswordView.as_view(), name='update_password'),
 ]
\ No newline at end of file
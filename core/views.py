@@ -2,17 +2,33 @@ from typing import Any
 
 from django.contrib.auth import authenticate, login, logout
 from rest_framework import status
-from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.exceptions import APIException, AuthenticationFailed
 from rest_framework.generics import GenericAPIView, RetrieveUpdateDestroyAPIView
 from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.serializers import Serializer
 from rest_framework.permissions import IsAuthenticated
 from core.models import User
+from core.passwords import PasswordHashingBusy
 from core.serializers import CreateUserSerializer, ProfileSerializer, LoginSerializer, UpdatePasswordSerializer
 
 
-class SignUpView(GenericAPIView):
+class PasswordHashingUnavailable(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Too many password checks in progress, try again later.'
+    default_code = 'password_hashing_busy'
+
+
+class HashingPasswordMixin:
+    """Answers PasswordHashingBusy from the password hashing pool with a 503."""
+
+    def handle_exception(self, exc: Exception) -> Response:
+        if isinstance(exc, PasswordHashingBusy):
+            exc = PasswordHashingUnavailable()
+        return super().handle_exception(exc)
+
+
+class SignUpView(HashingPasswordMixin, GenericAPIView):
     serializer_class = CreateUserSerializer
 
     def post(self, request: Request, *args: Any, **kwargs: Any) -> Response:
@@ -24,7 +40,7 @@ class SignUpView(GenericAPIView):
         return Response(ProfileSerializer(user).data, status=status.HTTP_201_CREATED)
 
 
-class LoginView(GenericAPIView):
+class LoginView(HashingPasswordMixin, GenericAPIView):
     serializer_class = LoginSerializer
 
     def post(self, request: Request, *args: Any, **kwargs: Any) -> Response:
@@ -55,7 +71,7 @@ class ProfileView(RetrieveUpdateDestroyAPIView):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class UpdatePasswordView(GenericAPIView):
+class UpdatePasswordView(HashingPasswordMixin, GenericAPIView):
     serializer_class = UpdatePasswordSerializer
     permission_classes = [IsAuthenticated]
 
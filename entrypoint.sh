@@ -1,8 +1,4 @@
 #!/bin/bash
-python manage.py migrate --check
-status=$?
-if [[ $status != 0 ]]; then
-  python manage.py migrate
-fi
-python manage.py collectstatic -c --no-input
+set -e
+python manage.py startup
 exec "$@"
@@ -7,10 +7,45 @@ For more information on this file, see
 https://docs.djangoproject.com/en/4.1/howto/deployment/asgi/
 """
 
+import asyncio
 import os
 
+from django.conf import settings
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'todolist.settings')
 
-application = get_asgi_application()
+
+class ConcurrencyLimitMiddleware:
+    """
+    Django runs the sync part of every ASGI request (including ORM calls from
+    async views) in a thread of its own, with its own database connection.
+    Requests above ``limit`` wait here, in the event loop, instead of opening
+    more connections than the database accepts.
+    """
+
+    def __init__(self, app, limit: int) -> None:
+        self.app = app
+        self.semaphore = asyncio.Semaphore(limit)
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+        async with self.semaphore:
+            await self.app(scope, receive, send)
+
+
+django_application = ConcurrencyLimitMiddleware(get_asgi_application(), settings.ASGI_MAX_CONCURRENCY)
+
+from todolist.goals.events import EventStream  # noqa: E402 (needs the apps loaded)
+
+# Event streams stay open for as long as the client is connected and hold no
+# database connection while they wait, so they are served outside of the
+# concurrency limit.
+events_application = EventStream()
+
+
+async def application(scope, receive, send) -> None:
+    if scope['type'] == 'http' and scope['path'] == '/goals/events':
+        return await events_application(scope, receive, send)
+    return await django_application(scope, receive, send)
@@ -0,0 +1,83 @@
+import asyncio
+from typing import Any
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.http import Http404
+from django.utils.functional import classproperty
+from rest_framework import generics
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+
+class AsyncAPIViewMixin:
+    """
+    Async dispatch for DRF views.
+
+    Authentication, permissions and throttling (which may hit the session and
+    user tables) run in a worker thread; ``async def`` handlers run on the
+    event loop, other handlers (writes) in a worker thread as before.
+    """
+
+    @classproperty
+    def view_is_async(cls) -> bool:
+        return True
+
+    async def dispatch(self, request: Any, *args: Any, **kwargs: Any) -> Response:
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            handler = self.http_method_not_allowed
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+
+            if asyncio.iscoroutinefunction(handler):
+                response = await handler(request, *args, **kwargs)
+            else:
+                response = await sync_to_async(handler)(request, *args, **kwargs)
+
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+
+class AsyncListAPIView(AsyncAPIViewMixin, generics.ListAPIView):
+    async def get(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        return await self.alist(request, *args, **kwargs)
+
+    async def alist(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        # Filter backends may validate lookups against the database.
+        queryset = await sync_to_async(self.filter_queryset)(self.get_queryset())
+
+        if self.paginator is not None:
+            page = await self.paginator.apaginate_queryset(queryset, request, view=self)
+            if page is not None:
+                return self.get_paginated_response(self.get_serializer(page, many=True).data)
+
+        return Response(self.get_serializer([obj async for obj in queryset], many=True).data)
+
+
+class AsyncRetrieveUpdateDestroyAPIView(AsyncAPIViewMixin, generics.RetrieveUpdateDestroyAPIView):
+    async def get(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        instance = await self.aget_object()
+        return Response(self.get_serializer(instance).data)
+
+    async def aget_object(self) -> Any:
+        queryset = await sync_to_async(self.filter_queryset)(self.get_queryset())
+
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            obj = await queryset.aget(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        except (queryset.model.DoesNotExist, TypeError, ValueError, ValidationError):
+            raise Http404
+
+        self.check_object_permissions(self.request, obj)
+        return obj
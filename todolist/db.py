@@ -0,0 +1,108 @@
+import asyncio
+import contextvars
+import random
+from typing import Any, Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.http import HttpRequest, HttpResponse
+from django.utils.deprecation import MiddlewareMixin
+from rest_framework.permissions import SAFE_METHODS
+
+PIN_KEY = 'db:primary:{user_id}'
+# Read right after they are written, by the next request of the same client.
+PRIMARY_ONLY_MODELS = {'sessions.Session'}
+
+
+class RequestRouting:
+    """Where the reads of the current request go; ``replica`` is None for the primary."""
+
+    def __init__(self) -> None:
+        self.replica: Optional[str] = None
+
+
+current: contextvars.ContextVar[Optional[RequestRouting]] = contextvars.ContextVar('db_routing', default=None)
+
+
+class ReplicaRouter:
+    """
+    Sends reads to the replica that ReplicaRoutingMiddleware picked for the
+    current request, and everything else to the primary: writes, reads in
+    transaction.atomic() blocks and every read of a request after its first
+    write.
+    """
+
+    def db_for_read(self, model: Any, **hints: Any) -> Optional[str]:
+        routing = current.get()
+        if routing is None or routing.replica is None or model._meta.label in PRIMARY_ONLY_MODELS:
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return routing.replica
+
+    def db_for_write(self, model: Any, **hints: Any) -> str:
+        routing = current.get()
+        if routing is not None:
+            routing.replica = None
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1: Any, obj2: Any, **hints: Any) -> bool:
+        # Replicas hold the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db: str, app_label: str, **hints: Any) -> bool:
+        return db == DEFAULT_DB_ALIAS
+
+
+def pin_to_primary(user_id: int) -> None:
+    cache.set(PIN_KEY.format(user_id=user_id), True, timeout=settings.DATABASE_REPLICA_PIN_SECONDS)
+
+
+class ReplicaRoutingMiddleware(MiddlewareMixin):
+    """
+    Lets the reads of GET, HEAD and OPTIONS requests go to one of the
+    DATABASE_REPLICAS, unless the view sets ``replica_reads = False`` or
+    the user wrote something in the last DATABASE_REPLICA_PIN_SECONDS, so
+    users always read their own writes despite replication lag.
+    """
+
+    def __call__(self, request: HttpRequest) -> Any:
+        if asyncio.iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = current.set(RequestRouting())
+        try:
+            response = self.get_response(request)
+        finally:
+            current.reset(token)
+        if request.method not in SAFE_METHODS:
+            self.pin_writer(request, response)
+        return response
+
+    async def __acall__(self, request: HttpRequest) -> Any:
+        token = current.set(RequestRouting())
+        try:
+            response = await self.get_response(request)
+        finally:
+            current.reset(token)
+        if request.method not in SAFE_METHODS:
+            await sync_to_async(self.pin_writer)(request, response)
+        return response
+
+    def process_view(self, request: HttpRequest, view_func: Any, view_args: Any, view_kwargs: Any) -> None:
+        routing = current.get()
+        if routing is None or not settings.DATABASE_REPLICAS or request.method not in SAFE_METHODS:
+            return
+        if not getattr(getattr(view_func, 'view_class', view_func), 'replica_reads', True):
+            return
+        user_id = request.user.id
+        if user_id is not None and cache.get(PIN_KEY.format(user_id=user_id)):
+            return
+        routing.replica = random.choice(settings.DATABASE_REPLICAS)
+
+    def pin_writer(self, request: HttpRequest, response: HttpResponse) -> None:
+        if settings.DATABASE_REPLICAS and response.status_code < 400:
+            user = getattr(request, 'user', None)
+            if user is not None and user.is_authenticated:
+                pin_to_primary(user.id)
@@ -0,0 +1,171 @@
+import datetime
+from functools import lru_cache
+from typing import Any, Callable, Optional
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import QuerySet
+from rest_framework import ISO_8601, serializers
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+# Fields whose to_representation() returns the database value unchanged.
+IDENTITY_FIELDS = (serializers.BooleanField, serializers.CharField, serializers.ChoiceField, serializers.IntegerField)
+
+
+def iso_datetime(timezone: Any) -> Callable[[datetime.datetime], str]:
+    """DateTimeField.to_representation() in ISO 8601, with the current timezone looked up once, not per value."""
+    def to_representation(value: datetime.datetime) -> str:
+        value = value.astimezone(timezone).isoformat()
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+    return to_representation
+
+
+class ValuesSerializer:
+    """
+    The read-only output of a ModelSerializer, built from ``.values()`` rows
+    instead of model instances. Every value still goes through the
+    serializer's own field, so the output is the same, minus the model
+    instances and the per-row serializer machinery. A nested serializer of
+    a foreign key renders each related object once per page, and the rows
+    pointing to it share the result.
+
+    The fields are built once per serializer class, without a request, so
+    only model fields, primary key relations and nested serializers of
+    foreign keys are supported.
+    """
+
+    def __init__(self, serializer_class: type[serializers.ModelSerializer]) -> None:
+        serializer = serializer_class(context={})
+        self.model = serializer.Meta.model
+        self.fields: list[tuple[str, str, Optional[Callable]]] = []
+        self.nested: dict[str, serializers.Serializer] = {}
+        self.datetimes: dict[str, serializers.DateTimeField] = {}
+        for field in serializer._readable_fields:
+            model_field = self.get_model_field(serializer_class, field)
+            if isinstance(field, serializers.BaseSerializer):
+                self.nested[model_field.attname] = field
+                self.fields.append((field.field_name, model_field.attname, None))
+            elif isinstance(field, serializers.PrimaryKeyRelatedField):
+                to_representation = field.pk_field.to_representation if field.pk_field is not None else None
+                self.fields.append((field.field_name, model_field.attname, to_representation))
+            else:
+                if self.is_iso_datetime(field):
+                    self.datetimes[model_field.attname] = field
+                to_representation = None if type(field) in IDENTITY_FIELDS else field.to_representation
+                self.fields.append((field.field_name, model_field.attname, to_representation))
+
+    def get_model_field(self, serializer_class: type, field: serializers.Field) -> Any:
+        model_field = None
+        if field.source != '*' and '.' not in field.source:
+            model_field = next((f for f in self.model._meta.concrete_fields if f.name == field.source), None)
+        relational = isinstance(field, (serializers.BaseSerializer, serializers.PrimaryKeyRelatedField))
+        if model_field is None or model_field.is_relation != relational or model_field.many_to_many:
+            raise ImproperlyConfigured(
+                f'{serializer_class.__name__}.{field.field_name} cannot be built from .values() rows'
+            )
+        return model_field
+
+    def is_iso_datetime(self, field: serializers.Field) -> bool:
+        output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+        return (
+            type(field) is serializers.DateTimeField and not hasattr(field, 'timezone')
+            and output_format is not None and output_format.lower() == ISO_8601
+        )
+
+    def values(self, queryset: QuerySet) -> QuerySet:
+        # Annotations stay available to the ordering and the keyset cursor.
+        return queryset.values(*(column for _, column, _ in self.fields), *queryset.query.annotations)
+
+    def get_related_ids(self, rows: list[dict]) -> dict[str, set]:
+        return {column: {row[column] for row in rows} - {None} for column in self.nested}
+
+    def get_related(self, rows: list[dict], request: Optional[Request] = None) -> dict[str, dict]:
+        related = {}
+        for column, ids in self.get_related_ids(rows).items():
+            objects, model = self.get_known(column, ids, request)
+            if ids - objects.keys():
+                objects.update(model._default_manager.in_bulk(ids - objects.keys()))
+            related[column] = objects
+        return self.render_related(related)
+
+    async def aget_related(self, rows: list[dict], request: Optional[Request] = None) -> dict[str, dict]:
+        related = {}
+        for column, ids in self.get_related_ids(rows).items():
+            objects, model = self.get_known(column, ids, request)
+            if ids - objects.keys():
+                objects.update(await model._default_manager.ain_bulk(ids - objects.keys()))
+            related[column] = objects
+        return self.render_related(related)
+
+    def get_known(self, column: str, ids: set, request: Optional[Request]) -> tuple[dict, type]:
+        # The rows of a list usually all belong to the request user, who is already loaded.
+        model = self.model._meta.get_field(self.nested[column].source).related_model
+        user = getattr(request, 'user', None)
+        if isinstance(user, model) and user.pk in ids:
+            return {user.pk: user}, model
+        return {}, model
+
+    def render_related(self, related: dict[str, dict]) -> dict[str, dict]:
+        return {
+            column: {pk: self.nested[column].to_representation(obj) for pk, obj in objects.items()}
+            for column, objects in related.items()
+        }
+
+    def to_representation(self, rows: list[dict], related: dict[str, dict]) -> list[dict]:
+        formatters = {column: objects.__getitem__ for column, objects in related.items()}
+        for column, field in self.datetimes.items():
+            timezone = field.default_timezone()
+            if timezone is not None:
+                formatters[column] = iso_datetime(timezone)
+        fields = [
+            (name, column, formatters.get(column, to_representation)) for name, column, to_representation in self.fields
+        ]
+        results = []
+        for row in rows:
+            item = {}
+            for name, column, to_representation in fields:
+                value = row[column]
+                item[name] = value if value is None or to_representation is None else to_representation(value)
+            results.append(item)
+        return results
+
+
+@lru_cache(maxsize=None)
+def get_values_serializer(serializer_class: type[serializers.ModelSerializer]) -> ValuesSerializer:
+    return ValuesSerializer(serializer_class)
+
+
+class ValuesListMixin:
+    """
+    Serves read-only lists through ValuesSerializer: the page is fetched
+    with ``.values()`` and serialized without model instances. Views whose
+    paginator needs the instances set ``values_list = False``.
+    """
+    values_list = True
+
+    def list(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        if not self.values_list:
+            return super().list(request, *args, **kwargs)
+        serializer = get_values_serializer(self.get_serializer_class())
+        queryset = serializer.values(self.filter_queryset(self.get_queryset()))
+
+        page = self.paginate_queryset(queryset)
+        rows = list(queryset) if page is None else page
+        data = serializer.to_representation(rows, serializer.get_related(rows, request))
+        return Response(data) if page is None else self.get_paginated_response(data)
+
+    async def alist(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        if not self.values_list:
+            return await super().alist(request, *args, **kwargs)
+        serializer = get_values_serializer(self.get_serializer_class())
+        # Filter backends may validate lookups against the database.
+        queryset = serializer.values(await sync_to_async(self.filter_queryset)(self.get_queryset()))
+
+        page = None
+        if self.paginator is not None:
+            page = await self.paginator.apaginate_queryset(queryset, request, view=self)
+        rows = [row async for row in queryset] if page is None else page
+        data = serializer.to_representation(rows, await serializer.aget_related(rows, request))
+        return Response(data) if page is None else self.get_paginated_response(data)
@@ -6,8 +6,10 @@ from rest_framework import serializers
 
 class PasswordField(serializers.CharField):
 
-    def __init__(self, **kwargs: Any) -> None:
+    def __init__(self, validate: bool = True, **kwargs: Any) -> None:
         kwargs['style'] = {'input_type': 'password'}
         kwargs.setdefault('write_only', True)
         super().__init__(**kwargs)
-        self.validators.append(validate_password)
\ No newline at end of file
+        # Existing passwords are only checked against the stored hash, not the current password policy.
+        if validate:
+            self.validators.append(validate_password)
\ No newline at end of file
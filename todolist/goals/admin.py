@@ -1,29 +1,80 @@
 from django.contrib import admin
+from django.db.models import Model, QuerySet
+from django.forms import ModelForm
+from django.http import HttpRequest
 
-from todolist.goals.models import GoalCategory
+from todolist.goals.cache import invalidate_on_commit
+from todolist.goals.filters import clean_search_terms, prefix_search_query
+from todolist.goals.models import Archive, GoalCategory
 from todolist.goals.models import GoalComment
+from todolist.paginator import EstimatedCountPaginator
 
 from todolist.goals.models import Goal
 
 
+class ScalableAdmin(admin.ModelAdmin):
+    """Changelists that page through large tables with planner estimates instead of COUNT(*)."""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+class InvalidateCacheAdmin(ScalableAdmin):
+    """Bumps the cache version of the owners of the objects changed or deleted in the admin."""
+
+    def save_model(self, request: HttpRequest, obj: Model, form: ModelForm, change: bool) -> None:
+        super().save_model(request, obj, form, change)
+        # An object moved to another user leaves the lists of both.
+        for user_id in {obj.user_id, form.initial.get('user', obj.user_id)}:
+            invalidate_on_commit(user_id)
+
+    def delete_model(self, request: HttpRequest, obj: Model) -> None:
+        super().delete_model(request, obj)
+        invalidate_on_commit(obj.user_id)
+
+    def delete_queryset(self, request: HttpRequest, queryset: QuerySet) -> None:
+        user_ids = set(queryset.values_list('user_id', flat=True))
+        super().delete_queryset(request, queryset)
+        for user_id in user_ids:
+            invalidate_on_commit(user_id)
+
+
+class FullTextSearchAdmin(InvalidateCacheAdmin):
+    """Searches the GIN-indexed search_vector, with the prefix matching of the API, instead of ILIKE."""
+    search_help_text = 'Поиск по словам и их началам'
+
+    def get_search_results(self, request: HttpRequest, queryset: QuerySet, search_term: str) -> tuple[QuerySet, bool]:
+        terms = clean_search_terms(search_term.split())
+        if not terms:
+            return queryset, False
+        return queryset.filter(search_vector=prefix_search_query(terms)), False
+
+
 @admin.register(GoalCategory)
-class GoalCategoryAdmin(admin.ModelAdmin):
+class GoalCategoryAdmin(FullTextSearchAdmin):
     list_display = ('title', 'user', 'created', 'updated')
+    list_select_related = ('user',)
+    raw_id_fields = ('user',)
     search_fields = ('title',)
     list_filter = ('is_deleted',)
 
 
 @admin.register(Goal)
-class GoalAdmin(admin.ModelAdmin):
+class GoalAdmin(FullTextSearchAdmin):
     list_display = ('title', 'user', 'created', 'updated')
+    list_select_related = ('user',)
+    raw_id_fields = ('user', 'category')
     search_fields = ('title', 'description')
     list_filter = ('status', 'priority')
 
 
 @admin.register(GoalComment)
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(InvalidateCacheAdmin):
     list_display = ('text', 'user', 'goal')
-    search_fields = ('text', 'user__username', 'goal__title')
+    list_select_related = ('user', 'goal')
+    raw_id_fields = ('user', 'goal')
+    # Comment texts are not indexed; usernames are, for prefix matches.
+    search_fields = ('user__username__startswith',)
+    search_help_text = 'Начало имени пользователя (с учётом регистра)'
     readonly_fields = ('created', 'updated')
 
     fieldsets = (
@@ -33,4 +84,13 @@ class CommentAdmin(admin.ModelAdmin):
         ('Dates', {
             'fields': ('created', 'updated')
         }),
-    )
\ No newline at end of file
+    )
+
+
+@admin.register(Archive)
+class ArchiveAdmin(ScalableAdmin):
+    list_display = ('kind', 'object_id', 'title', 'user', 'archived', 'purged')
+    list_select_related = ('user',)
+    list_filter = ('kind',)
+    raw_id_fields = ('user',)
+    exclude = ('data',)
@@ -0,0 +1,26 @@
+from todolist import async_generics
+from todolist.goals import views
+
+
+class GoalCategoryListView(views.GoalCategoryListView, async_generics.AsyncListAPIView):
+    pass
+
+
+class GoalCategoryView(views.GoalCategoryView, async_generics.AsyncRetrieveUpdateDestroyAPIView):
+    pass
+
+
+class GoalListView(views.GoalListView, async_generics.AsyncListAPIView):
+    pass
+
+
+class GoalView(views.GoalView, async_generics.AsyncRetrieveUpdateDestroyAPIView):
+    pass
+
+
+class GoalCommentListView(views.GoalCommentListView, async_generics.AsyncListAPIView):
+    pass
+
+
+class GoalCommentView(views.GoalCommentView, async_generics.AsyncRetrieveUpdateDestroyAPIView):
+    pass
@@ -0,0 +1,98 @@
+import hashlib
+import time
+from typing import Any, Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.cache import patch_cache_control
+from django.utils.http import http_date, parse_etags
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+VERSION_KEY = 'goals:version:{user_id}'
+RESPONSE_KEY = 'goals:response:{user_id}:{version}:{digest}'
+COUNT_KEY = 'goals:count:{user_id}:{version}:{digest}'
+
+
+def get_cache():
+    return caches[settings.GOALS_CACHE_ALIAS]
+
+
+def get_version(user_id: int) -> float:
+    """Timestamp of the last write to any of the user's categories, goals or comments."""
+    cache = get_cache()
+    key = VERSION_KEY.format(user_id=user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(user_id: int) -> None:
+    get_cache().set(VERSION_KEY.format(user_id=user_id), time.time(), timeout=None)
+
+
+def invalidate_on_commit(user_id: int) -> None:
+    transaction.on_commit(lambda: bump_version(user_id))
+
+
+class CachedListMixin:
+    """
+    Serves list responses from a per-user cache keyed by the full path and
+    query string. Any write through an InvalidateCacheMixin view or the
+    admin bumps the user's version, which changes every key and ETag of that
+    user at once, so a matching If-None-Match is answered with 304 without
+    running the list query.
+    """
+
+    def list(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        etag, version, key, response = self.get_cached_response(request)
+        if response is None:
+            response = super().list(request, *args, **kwargs)
+            get_cache().set(key, response.data, timeout=settings.GOALS_CACHE_TIMEOUT)
+        return self.finalize_cached_response(response, etag, version)
+
+    async def alist(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        etag, version, key, response = await sync_to_async(self.get_cached_response)(request)
+        if response is None:
+            response = await super().alist(request, *args, **kwargs)
+            await get_cache().aset(key, response.data, timeout=settings.GOALS_CACHE_TIMEOUT)
+        return self.finalize_cached_response(response, etag, version)
+
+    def get_cached_response(self, request: Request) -> tuple[str, float, str, Optional[Response]]:
+        user_id = request.user.id
+        version = get_version(user_id)
+        digest = hashlib.md5(request.get_full_path().encode()).hexdigest()
+        etag = f'"{user_id}-{version:.6f}-{digest}"'
+        key = RESPONSE_KEY.format(user_id=user_id, version=version, digest=digest)
+
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            return etag, version, key, Response(status=status.HTTP_304_NOT_MODIFIED)
+        data = get_cache().get(key)
+        return etag, version, key, None if data is None else Response(data)
+
+    def finalize_cached_response(self, response: Response, etag: str, version: float) -> Response:
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(version)
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+class InvalidateCacheMixin:
+    """Bumps the request user's cache version after every successful write."""
+
+    def perform_create(self, serializer: Any) -> None:
+        super().perform_create(serializer)
+        invalidate_on_commit(self.request.user.id)
+
+    def perform_update(self, serializer: Any) -> None:
+        super().perform_update(serializer)
+        invalidate_on_commit(self.request.user.id)
+
+    def perform_destroy(self, instance: Any) -> None:
+        super().perform_destroy(instance)
+        invalidate_on_commit(self.request.user.id)
@@ -0,0 +1,85 @@
+from collections import defaultdict
+from datetime import date
+from typing import Any
+
+from django.db import connections
+from django.db.models import Count, DateField, F, QuerySet, Value, Window
+from django.db.models.functions import Cast, RowNumber, TruncWeek
+
+from todolist.fastpath import get_values_serializer
+from todolist.goals.models import Goal
+from todolist.goals.serializers import GoalCreateSerializer
+
+OPEN_STATUSES = (Goal.Status.to_do, Goal.Status.in_progress)
+# Most urgent first: the goals a bucket shows when it holds more than ``limit``.
+RANKING = (F('priority').desc(), F('due_date').asc(), F('id').asc())
+
+
+def get_bucket(bucket: str) -> Any:
+    # DATE_TRUNC returns a timestamp; the raw query of get_top_rows needs dates like the ORM gives.
+    return F('due_date') if bucket == 'day' else Cast(TruncWeek('due_date'), DateField())
+
+
+def get_calendar(queryset: QuerySet[Goal], start: date, end: date, bucket: str, limit: int, today: date) -> dict:
+    """
+    Goals of ``queryset`` due between ``start`` and ``end``, grouped by day
+    or by week (starting on Monday): per bucket the count by priority and
+    the ``limit`` most urgent goals. ``overdue`` holds the goals due before
+    ``today`` that are not done yet, whatever the range. Both the counts
+    and the ranking run in the database, so the cost and the size of the
+    result depend on the number of buckets, not on the number of goals.
+    """
+    in_range = queryset.filter(due_date__range=(start, end)).annotate(calendar_bucket=get_bucket(bucket))
+    overdue = queryset.filter(due_date__lt=today, status__in=OPEN_STATUSES).annotate(
+        calendar_bucket=Cast(Value(None), DateField()),
+    )
+
+    counts = defaultdict(dict)
+    per_priority = [
+        qs.values('calendar_bucket', 'priority').annotate(count=Count('id')).order_by() for qs in (in_range, overdue)
+    ]
+    for row in per_priority[0].union(per_priority[1], all=True):
+        counts[row['calendar_bucket']][row['priority']] = row['count']
+
+    rows = get_top_rows(queryset.db, [in_range, overdue], limit) if counts and limit else []
+    serializer = get_values_serializer(GoalCreateSerializer)
+    results = defaultdict(list)
+    for row, goal in zip(rows, serializer.to_representation(rows, serializer.get_related(rows))):
+        results[row['calendar_bucket']].append(goal)
+
+    def get_column(bucket_date: date) -> dict:
+        by_priority = counts.get(bucket_date, {})
+        return {
+            'count': sum(by_priority.values()),
+            'by_priority': {priority.name: by_priority.get(priority.value, 0) for priority in Goal.Priority},
+            'results': results[bucket_date],
+        }
+
+    return {
+        'overdue': get_column(None),
+        'buckets': [
+            {'date': bucket_date.isoformat(), **get_column(bucket_date)}
+            for bucket_date in sorted(bucket_date for bucket_date in counts if bucket_date is not None)
+        ],
+    }
+
+
+def get_top_rows(using: str, querysets: list[QuerySet[Goal]], limit: int) -> list[dict]:
+    """The first ``limit`` goals of every ``calendar_bucket`` of every queryset, as ``.values()`` rows."""
+    serializer = get_values_serializer(GoalCreateSerializer)
+    parts, params = [], []
+    for n, queryset in enumerate(querysets):
+        queryset = queryset.order_by().annotate(
+            calendar_row=Window(RowNumber(), partition_by=[F('calendar_bucket')], order_by=list(RANKING)),
+        )
+        sql, part_params = serializer.values(queryset).query.sql_with_params()
+        # Window functions cannot be filtered on in the same SELECT.
+        parts.append(f'SELECT * FROM ({sql}) part_{n} WHERE calendar_row <= %s')
+        params += [*part_params, limit]
+
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f'{" UNION ALL ".join(parts)} ORDER BY calendar_bucket NULLS FIRST, calendar_row', params,
+        )
+        columns = [column.name for column in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
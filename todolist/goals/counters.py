@@ -0,0 +1,86 @@
+from collections import defaultdict
+from datetime import date
+from typing import Iterable, Optional
+
+from django.db import connection, transaction
+from django.db.models import Sum
+
+from core.models import User
+from todolist.goals.models import Goal, GoalCounter, GoalDueCounter
+
+REBUILD_SQL = """
+DELETE FROM goals_goalcounter WHERE user_id = ANY(%(user_ids)s);
+DELETE FROM goals_goalduecounter WHERE user_id = ANY(%(user_ids)s);
+
+INSERT INTO goals_goalcounter (user_id, category_id, status, priority, count)
+SELECT user_id, category_id, status, priority, count(*) FROM goals_goal
+WHERE user_id = ANY(%(user_ids)s)
+GROUP BY user_id, category_id, status, priority;
+
+INSERT INTO goals_goalduecounter (user_id, category_id, due_date, count)
+SELECT user_id, category_id, due_date, count(*) FROM goals_goal
+WHERE user_id = ANY(%(user_ids)s) AND due_date IS NOT NULL AND status IN (1, 2)
+GROUP BY user_id, category_id, due_date;
+"""
+
+
+def rebuild_counters(user_ids: Iterable[int]) -> None:
+    """
+    Recomputes the counter rows of ``user_ids`` from goals_goal. Goal writes
+    are blocked (reads are not) until the transaction commits, so keep the
+    batches small.
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute('LOCK TABLE goals_goal IN SHARE MODE')
+        cursor.execute(REBUILD_SQL, {'user_ids': list(user_ids)})
+
+
+def _by_choice(choices, counts: dict) -> dict:
+    return {choice.name: counts.get(choice.value, 0) for choice in choices}
+
+
+def get_stats(user: User, today: Optional[date] = None) -> dict:
+    """
+    Dashboard aggregates of ``user`` read from the counter tables, so the cost
+    depends on the number of distinct (category, status, priority) and
+    (category, due date) combinations rather than on the number of goals.
+    Totals and priority breakdowns leave archived goals out.
+    """
+    today = today or date.today()
+    categories = defaultdict(lambda: {'status': defaultdict(int), 'priority': defaultdict(int), 'overdue': 0})
+
+    counters = GoalCounter.objects.filter(user=user, category__is_deleted=False, count__gt=0)
+    for category_id, status, priority, count in counters.values_list('category', 'status', 'priority', 'count'):
+        category = categories[category_id]
+        category['status'][status] += count
+        if status != Goal.Status.archived:
+            category['priority'][priority] += count
+
+    overdue = GoalDueCounter.objects.filter(
+        user=user, category__is_deleted=False, due_date__lt=today, count__gt=0
+    ).values('category').annotate(total=Sum('count')).order_by()
+    for row in overdue:
+        categories[row['category']]['overdue'] = row['total']
+
+    totals = {'status': defaultdict(int), 'priority': defaultdict(int), 'overdue': 0}
+    result = []
+    for category_id, category in sorted(categories.items()):
+        for key in ('status', 'priority'):
+            for value, count in category[key].items():
+                totals[key][value] += count
+        totals['overdue'] += category['overdue']
+        result.append({
+            'category': category_id,
+            'total': sum(category['priority'].values()),
+            'by_status': _by_choice(Goal.Status, category['status']),
+            'by_priority': _by_choice(Goal.Priority, category['priority']),
+            'overdue': category['overdue'],
+        })
+
+    return {
+        'total': sum(totals['priority'].values()),
+        'by_status': _by_choice(Goal.Status, totals['status']),
+        'by_priority': _by_choice(Goal.Priority, totals['priority']),
+        'overdue': totals['overdue'],
+        'categories': result,
+    }
@@ -0,0 +1,282 @@
+import asyncio
+import json
+import logging
+import threading
+from collections import defaultdict
+from functools import lru_cache
+from http.cookies import SimpleCookie
+from importlib import import_module
+from types import SimpleNamespace
+from typing import Any, Iterable, Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, connections, transaction
+from django.utils.module_loading import import_string
+
+from core.cache import get_user
+from todolist.metrics import RequestMetrics, current, finish_request
+
+logger = logging.getLogger(__name__)
+
+RESYNC = {'kind': 'all', 'action': 'resync', 'ids': []}
+
+
+class Subscription:
+    """Events of one user for one open stream, delivered on the event loop that opened it."""
+
+    def __init__(self, user_id: int, maxsize: int) -> None:
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.overflowed = False
+
+    def push(self, event: dict) -> None:
+        try:
+            self.loop.call_soon_threadsafe(self.put, event)
+        except RuntimeError:  # the loop is closed
+            pass
+
+    def put(self, event: dict) -> None:
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    async def get(self) -> dict:
+        # A client that fell behind gets a single resync instead of the backlog.
+        if self.overflowed:
+            self.overflowed = False
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            return RESYNC
+        return await self.queue.get()
+
+
+class InMemoryBroker:
+    """Delivers events to the streams opened in this process only."""
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.subscriptions: dict[int, set[Subscription]] = defaultdict(set)
+
+    async def subscribe(self, user_id: int) -> Subscription:
+        subscription = Subscription(user_id, settings.GOALS_EVENTS_QUEUE_SIZE)
+        with self.lock:
+            self.subscriptions[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self.lock:
+            subscriptions = self.subscriptions.get(subscription.user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self.subscriptions[subscription.user_id]
+
+    def publish(self, user_id: int, event: dict) -> None:
+        self.deliver(user_id, event)
+
+    def deliver(self, user_id: int, event: dict) -> None:
+        with self.lock:
+            subscriptions = list(self.subscriptions.get(user_id, ()))
+        for subscription in subscriptions:
+            subscription.push(event)
+
+
+class PostgresBroker(InMemoryBroker):
+    """
+    Sends events through LISTEN/NOTIFY on GOALS_EVENTS_CHANNEL, so streams
+    opened in any worker or node that shares the database receive them. Each
+    process listens on one extra connection, opened with the first stream.
+    A lost connection is reopened with exponential backoff, up to
+    GOALS_EVENTS_RECONNECT_MAX_DELAY seconds apart, while streams are open.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.listener = None
+        self.listener_fd: Optional[int] = None  # fileno() fails once the connection is lost
+        self.listener_lock = asyncio.Lock()
+        self.lost = False
+        self.reconnecting: Optional[asyncio.Task] = None
+
+    def publish(self, user_id: int, event: dict) -> None:
+        with connections['default'].cursor() as cursor:
+            cursor.execute(
+                'SELECT pg_notify(%s, %s)', [settings.GOALS_EVENTS_CHANNEL, json.dumps({'user': user_id, **event})]
+            )
+
+    async def subscribe(self, user_id: int) -> Subscription:
+        subscription = await super().subscribe(user_id)
+        await self.listen(subscription.loop)
+        return subscription
+
+    async def listen(self, loop: asyncio.AbstractEventLoop) -> None:
+        async with self.listener_lock:
+            if self.listener is not None:
+                return
+            self.listener = await sync_to_async(self.connect, thread_sensitive=False)()
+            self.listener_fd = self.listener.fileno()
+            loop.add_reader(self.listener_fd, self.receive, loop)
+            if self.lost:
+                # Events sent while the listener was down were missed.
+                self.lost = False
+                self.resync()
+
+    def connect(self) -> Any:
+        wrapper = connections['default']
+        listener = wrapper.get_new_connection(wrapper.get_connection_params())
+        listener.autocommit = True
+        with listener.cursor() as cursor:
+            cursor.execute(f'LISTEN "{settings.GOALS_EVENTS_CHANNEL}"')
+        return listener
+
+    async def reconnect(self, loop: asyncio.AbstractEventLoop) -> None:
+        delay = 1.0
+        while self.listener is None and self.subscriptions:
+            try:
+                await self.listen(loop)
+            except Exception:
+                logger.warning('Could not reopen the goal events listener, retrying in %s s', delay, exc_info=True)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, settings.GOALS_EVENTS_RECONNECT_MAX_DELAY)
+
+    def receive(self, loop: asyncio.AbstractEventLoop) -> None:
+        try:
+            self.listener.poll()
+        except Exception:
+            logger.exception('Lost the goal events listener connection')
+            loop.remove_reader(self.listener_fd)
+            try:
+                self.listener.close()
+            except Exception:
+                pass
+            self.listener = None
+            self.lost = True
+            self.resync()
+            self.reconnecting = loop.create_task(self.reconnect(loop))
+            return
+        while self.listener.notifies:
+            payload = json.loads(self.listener.notifies.pop(0).payload)
+            self.deliver(payload.pop('user'), payload)
+
+    def resync(self) -> None:
+        """Tells every open stream that events may have been missed."""
+        with self.lock:
+            subscriptions = [s for user_subscriptions in self.subscriptions.values() for s in user_subscriptions]
+        for subscription in subscriptions:
+            subscription.push(RESYNC)
+
+
+@lru_cache(maxsize=None)
+def get_broker() -> InMemoryBroker:
+    return import_string(settings.GOALS_EVENTS_BROKER)()
+
+
+def publish_on_commit(user_id: int, kind: str, action: str, ids: Iterable[int] = ()) -> None:
+    event = {'kind': kind, 'action': action, 'ids': list(ids)}
+    transaction.on_commit(lambda: get_broker().publish(user_id, event))
+
+
+class PublishEventsMixin:
+    """Publishes an event of ``event_kind`` after every successful create, update and destroy."""
+
+    event_kind: str
+    destroy_action = 'delete'
+
+    def perform_create(self, serializer: Any) -> None:
+        super().perform_create(serializer)
+        publish_on_commit(self.request.user.id, self.event_kind, 'create', [serializer.instance.id])
+
+    def perform_update(self, serializer: Any) -> None:
+        super().perform_update(serializer)
+        publish_on_commit(self.request.user.id, self.event_kind, 'update', [serializer.instance.id])
+
+    def perform_destroy(self, instance: Any) -> None:
+        pk = instance.id  # reset to None by delete()
+        super().perform_destroy(instance)
+        publish_on_commit(self.request.user.id, self.event_kind, self.destroy_action, [pk])
+
+
+class EventStream:
+    """
+    ASGI application streaming the request user's change events as
+    Server-Sent Events. Each event is a JSON object such as
+    ``{"kind": "goal", "action": "archive", "ids": [1, 2]}``; a ``resync``
+    action means events were lost and the client should catch up through
+    the sync endpoint.
+    """
+
+    view_name = 'todolist.goals:events'
+
+    async def __call__(self, scope: dict, receive: Any, send: Any) -> None:
+        # Only the authentication queries count; the stream itself runs none.
+        metrics = RequestMetrics(scope['method'], scope['path'])
+        metrics.view = self.view_name
+        token = current.set(metrics)
+        try:
+            user = await self.authenticate(scope)
+        finally:
+            current.reset(token)
+        metrics.status = 200 if user is not None else 403
+        finish_request(metrics)
+        if user is None:
+            await send({'type': 'http.response.start', 'status': 403,
+                        'headers': [(b'content-type', b'application/json')]})
+            await send({'type': 'http.response.body', 'body': b'{"detail":"Authentication required"}'})
+            return
+
+        broker = get_broker()
+        subscription = await broker.subscribe(user.id)
+        disconnect = asyncio.ensure_future(self.wait_for_disconnect(receive))
+        try:
+            await send({'type': 'http.response.start', 'status': 200, 'headers': [
+                (b'content-type', b'text/event-stream'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+            ]})
+            await self.send_body(send, b'retry: 5000\n\n')
+            while not disconnect.done():
+                event = asyncio.ensure_future(subscription.get())
+                done, _ = await asyncio.wait(
+                    {event, disconnect}, timeout=settings.GOALS_EVENTS_KEEPALIVE, return_when=asyncio.FIRST_COMPLETED
+                )
+                if event in done:
+                    await self.send_body(send, f'data: {json.dumps(event.result())}\n\n'.encode())
+                else:
+                    event.cancel()
+                    if not disconnect.done():
+                        await self.send_body(send, b': keepalive\n\n')
+        finally:
+            disconnect.cancel()
+            broker.unsubscribe(subscription)
+
+    async def authenticate(self, scope: dict) -> Optional[Any]:
+        cookie = SimpleCookie()
+        for name, value in scope['headers']:
+            if name == b'cookie':
+                cookie.load(value.decode('latin-1'))
+        morsel = cookie.get(settings.SESSION_COOKIE_NAME)
+        if morsel is None:
+            return None
+        session = import_module(settings.SESSION_ENGINE).SessionStore(morsel.value)
+        user = await sync_to_async(self.get_user)(session)
+        return user if user.is_authenticated else None
+
+    def get_user(self, session: Any) -> Any:
+        # The stream is not a Django request, so nothing else closes stale or
+        # broken connections of this thread the way request_started and
+        # request_finished do.
+        close_old_connections()
+        try:
+            return get_user(SimpleNamespace(session=session))
+        finally:
+            close_old_connections()
+
+    async def send_body(self, send: Any, body: bytes) -> None:
+        await send({'type': 'http.response.body', 'body': body, 'more_body': True})
+
+    async def wait_for_disconnect(self, receive: Any) -> None:
+        while (await receive())['type'] != 'http.disconnect':
+            pass
@@ -0,0 +1,87 @@
+import csv
+import json
+import tempfile
+import zlib
+from datetime import date
+from typing import IO, Any, Iterable, Iterator
+
+from core.models import User
+from todolist.goals.models import Goal, GoalCategory, GoalComment
+
+EXPORTED_FIELDS = {
+    'category': (GoalCategory, ('id', 'created', 'updated', 'title', 'is_deleted')),
+    'goal': (Goal, ('id', 'created', 'updated', 'title', 'description', 'category', 'due_date', 'status', 'priority')),
+    'comment': (GoalComment, ('id', 'created', 'updated', 'goal', 'text')),
+}
+
+CSV_COLUMNS = ['type'] + list(dict.fromkeys(
+    field for _, fields in EXPORTED_FIELDS.values() for field in fields
+))
+
+FORMATS = ('ndjson', 'csv')
+
+
+def iter_records(user: User, chunk_size: int = 2000) -> Iterator[dict]:
+    """
+    Yields every category, goal and comment of ``user`` (deleted and archived
+    ones included) as flat dicts tagged with their ``type``. Rows are read
+    through server-side cursors, so memory does not grow with the account.
+    """
+    for record_type, (model, fields) in EXPORTED_FIELDS.items():
+        queryset = model.objects.filter(user=user).order_by('id').values_list(*fields)
+        for row in queryset.iterator(chunk_size=chunk_size):
+            record = {'type': record_type}
+            for field, value in zip(fields, row):
+                record[field] = value.isoformat() if isinstance(value, date) else value
+            yield record
+
+
+def iter_ndjson(records: Iterable[dict]) -> Iterator[str]:
+    for record in records:
+        yield json.dumps(record, ensure_ascii=False) + '\n'
+
+
+class _Echo:
+    def write(self, value: str) -> str:
+        return value
+
+
+def iter_csv(records: Iterable[dict]) -> Iterator[str]:
+    writer = csv.DictWriter(_Echo(), fieldnames=CSV_COLUMNS)
+    yield writer.writeheader()
+    for record in records:
+        yield writer.writerow(record)
+
+
+def iter_lines(records: Iterable[dict], output: str) -> Iterator[str]:
+    return iter_csv(records) if output == 'csv' else iter_ndjson(records)
+
+
+def iter_gzip(lines: Iterable[str], buffer_size: int = 64 * 1024) -> Iterator[bytes]:
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    buffer: list[bytes] = []
+    buffered = 0
+    for line in lines:
+        data = line.encode()
+        buffer.append(data)
+        buffered += len(data)
+        if buffered >= buffer_size:
+            chunk = compressor.compress(b''.join(buffer))
+            buffer, buffered = [], 0
+            if chunk:
+                yield chunk
+    yield compressor.compress(b''.join(buffer)) + compressor.flush()
+
+
+def export_stream(user: User, output: str, compress: bool = False, chunk_size: int = 2000) -> Iterator[Any]:
+    lines = iter_lines(iter_records(user, chunk_size=chunk_size), output)
+    return iter_gzip(lines) if compress else lines
+
+
+def spool(chunks: Iterable[Any], max_size: int = 8 * 1024 * 1024) -> IO[bytes]:
+    """Writes ``chunks`` to a temporary file, in memory up to ``max_size`` bytes, and rewinds it."""
+    file = tempfile.SpooledTemporaryFile(max_size=max_size)
+    for chunk in chunks:
+        file.write(chunk.encode() if isinstance(chunk, str) else chunk)
+    file.seek(0)
+    return file
@@ -1,16 +1,93 @@
+import re
+from typing import Any, Iterable
+
 import django_filters
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
 from django.db import models
+from django.db.models import F, FloatField, Q, QuerySet
+from django.db.models.functions import Cast
 from django_filters import rest_framework
+from rest_framework.filters import SearchFilter
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from todolist.goals.models import Goal, GoalComment
+
 
-from todolist.goals.models import Goal
+class NumberInFilter(django_filters.BaseInFilter, django_filters.NumberFilter):
+    pass
 
 
+# Foreign keys are filtered by plain ids: a ModelChoiceFilter would look up every given object first.
 class GoalDateFilter(rest_framework.FilterSet):
+    category = django_filters.NumberFilter()
+    category__in = NumberInFilter(field_name='category', lookup_expr='in')
+
     class Meta:
         model = Goal
         fields = {
             "due_date": ("lte", "gte"),
-            "category": ("exact", "in"),
             "status": ("exact", "in"),
             "priority": ("exact", "in"),
+            "comment_count": ("exact", "gte", "lte"),
+            "last_activity_at": ("gte", "lte"),
         }
+
+
+class GoalCommentFilter(rest_framework.FilterSet):
+    goal = django_filters.NumberFilter()
+
+    class Meta:
+        model = GoalComment
+        fields = ['goal']
+
+
+def clean_search_terms(terms: Iterable[str]) -> list[str]:
+    """Search terms with everything but word characters and dashes removed, so they are safe in a raw tsquery."""
+    terms = [re.sub(r'[^\w-]+', '', term) for term in terms]
+    return [term for term in terms if term]
+
+
+def prefix_search_query(terms: list[str], configs: Iterable[str] = ('russian', 'english')) -> SearchQuery:
+    # Every term is a prefix match, so the word being typed matches too.
+    raw_query = ' & '.join(f"'{term}':*" for term in terms)
+    query = None
+    for config in configs:
+        config_query = SearchQuery(raw_query, config=config, search_type='raw')
+        query = config_query if query is None else query | config_query
+    return query
+
+
+class FullTextSearchFilter(SearchFilter):
+    """
+    Drop-in replacement for SearchFilter that keeps the ``?search=`` parameter
+    but matches against the trigger-maintained ``search_vector`` column
+    (russian and english configurations) and falls back to trigram word
+    similarity on the view's ``search_trigram_fields`` (which should carry a
+    ``gin_trgm_ops`` index) for short or partially typed terms.
+    Results are ranked by relevance unless the client asked for an ordering.
+    """
+    search_vector_field = 'search_vector'
+    search_configs = ('russian', 'english')
+    rank_annotation = 'search_rank'
+
+    def filter_queryset(self, request: Request, queryset: QuerySet, view: Any) -> QuerySet:
+        terms = clean_search_terms(self.get_search_terms(request))
+        search_fields = self.get_search_fields(view, request)
+        if not terms or not search_fields:
+            return queryset
+
+        text = ' '.join(terms)
+        query = prefix_search_query(terms, self.search_configs)
+
+        condition = Q(**{self.search_vector_field: query})
+        rank = SearchRank(F(self.search_vector_field), query)
+        for field in getattr(view, 'search_trigram_fields', ()):
+            condition |= Q(**{f'{field}__trigram_word_similar': text})
+            rank += TrigramWordSimilarity(text, field)
+
+        # ts_rank() is a real; as a double the rank survives the JSON of a keyset cursor unchanged.
+        queryset = queryset.filter(condition).annotate(**{self.rank_annotation: Cast(rank, FloatField())})
+        if request.query_params.get(api_settings.ORDERING_PARAM):
+            return queryset
+        return queryset.order_by(f'-{self.rank_annotation}', *queryset.query.order_by)
@@ -0,0 +1,172 @@
+import csv
+import gzip
+import io
+import json
+import zlib
+from collections import Counter
+from types import SimpleNamespace
+from typing import IO, Iterable, Iterator, Optional
+
+from django.db import transaction
+
+from core.models import User
+from todolist.goals.models import Goal, GoalCategory, GoalComment
+from todolist.goals.serializers import GoalCategoryCreateSerializer, GoalCommentImportSerializer, GoalImportSerializer
+
+RECORD_TYPES = ('category', 'goal', 'comment')
+# Raised while reading a file that is not what it claims to be: bad UTF-8,
+# bad or truncated gzip (BadGzipFile is an OSError), broken CSV quoting.
+READ_ERRORS = (UnicodeDecodeError, OSError, EOFError, zlib.error, csv.Error)
+
+
+def parse_ndjson(lines: Iterable[str]) -> Iterator[tuple[int, Optional[dict]]]:
+    for line_no, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        yield line_no, record if isinstance(record, dict) else None
+
+
+def parse_csv(lines: Iterable[str]) -> Iterator[tuple[int, Optional[dict]]]:
+    reader = csv.DictReader(lines)
+    for row in reader:
+        yield reader.line_num, {key: value if value != '' else None for key, value in row.items() if key}
+
+
+def parse(stream: IO[str], input_format: str) -> Iterator[tuple[int, Optional[dict]]]:
+    return parse_csv(stream) if input_format == 'csv' else parse_ndjson(stream)
+
+
+class Importer:
+    """
+    Ingests the records produced by ``todolist.goals.export`` for ``user``.
+
+    Consecutive records of one type are validated in batches with the same
+    serializers as the API (categories and goals referenced by a batch are
+    loaded with one query) and inserted with ``bulk_create``, one transaction
+    per batch. Unlike the API, goals of deleted categories and comments of
+    archived goals are accepted, so an export imports whole. Ids in the file
+    are the ids of the source instance; they are remapped to the new rows,
+    so goals and comments may only reference categories and goals from the
+    same file. ``run`` yields a progress report after each batch. A file
+    that cannot be read to the end is imported up to the unreadable part,
+    which is reported as an error of the last report.
+    """
+
+    def __init__(self, user: User, batch_size: int = 1000) -> None:
+        self.user = user
+        self.batch_size = batch_size
+        self.context = {'request': SimpleNamespace(user=user)}
+        self.id_map: dict[str, dict[int, int]] = {'category': {}, 'goal': {}}
+        self.processed = 0
+        self.created: Counter = Counter()
+        self.errors: list[dict] = []
+
+    def run(self, records: Iterable[tuple[int, Optional[dict]]]) -> Iterator[dict]:
+        batch: list[tuple[int, dict]] = []
+        batch_type = None
+        line_no = 0
+        try:
+            for line_no, record in records:
+                self.processed += 1
+                if record is None:
+                    self.errors.append({'line': line_no, 'errors': {'non_field_errors': ['Malformed record']}})
+                    continue
+                record_type = record.get('type')
+                if record_type not in RECORD_TYPES:
+                    self.errors.append({
+                        'line': line_no, 'errors': {'type': [f'Expected one of: {", ".join(RECORD_TYPES)}']},
+                    })
+                    continue
+                if batch and (record_type != batch_type or len(batch) >= self.batch_size):
+                    self.flush(batch_type, batch)
+                    batch = []
+                    yield self.progress()
+                batch_type = record_type
+                batch.append((line_no, record))
+        except READ_ERRORS as e:
+            self.errors.append({'line': line_no + 1, 'errors': {'non_field_errors': [f'Unreadable file: {e}']}})
+
+        if batch:
+            self.flush(batch_type, batch)
+        yield self.progress(done=True)
+
+    def progress(self, done: bool = False) -> dict:
+        report = {'processed': self.processed, 'created': dict(self.created), 'errors': self.errors, 'done': done}
+        self.errors = []
+        return report
+
+    def flush(self, record_type: str, batch: list[tuple[int, dict]]) -> None:
+        getattr(self, f'flush_{record_type}')(batch)
+
+    def validate(self, serializer_class, batch: list[tuple[int, dict]], context: dict) -> list[tuple[dict, dict]]:
+        valid = []
+        for line_no, record in batch:
+            serializer = serializer_class(data=record, context=context)
+            if serializer.is_valid():
+                valid.append((record, serializer.validated_data))
+            else:
+                self.errors.append({'line': line_no, 'errors': serializer.errors})
+        return valid
+
+    def resolve(self, record_type: str, model, batch: list[tuple[int, dict]], field: str) -> dict:
+        """Maps the source ids referenced by ``field`` to the rows imported for them."""
+        source_ids = {}
+        for _, record in batch:
+            try:
+                source_id = int(record.get(field))
+            except (TypeError, ValueError):
+                continue
+            if source_id in self.id_map[record_type]:
+                source_ids[source_id] = self.id_map[record_type][source_id]
+        objects = model.objects.in_bulk(source_ids.values())
+        return {source_id: objects[pk] for source_id, pk in source_ids.items() if pk in objects}
+
+    def save(self, record_type: str, model, objects: list, sources: list[dict]) -> None:
+        with transaction.atomic():
+            model.objects.bulk_create(objects)
+        if record_type in self.id_map:
+            for obj, record in zip(objects, sources):
+                try:
+                    self.id_map[record_type][int(record['id'])] = obj.id
+                except (KeyError, TypeError, ValueError):
+                    pass
+        self.created[record_type] += len(objects)
+
+    def flush_category(self, batch: list[tuple[int, dict]]) -> None:
+        valid = self.validate(GoalCategoryCreateSerializer, batch, self.context)
+        objects = [
+            GoalCategory(**data, is_deleted=str(record.get('is_deleted')).lower() == 'true')
+            for record, data in valid
+        ]
+        self.save('category', GoalCategory, objects, [record for record, _ in valid])
+
+    def flush_goal(self, batch: list[tuple[int, dict]]) -> None:
+        context = {**self.context, 'categories': self.resolve('category', GoalCategory, batch, 'category')}
+        valid = self.validate(GoalImportSerializer, batch, context)
+        self.save('goal', Goal, [Goal(**data) for _, data in valid], [record for record, _ in valid])
+
+    def flush_comment(self, batch: list[tuple[int, dict]]) -> None:
+        context = {**self.context, 'goals': self.resolve('goal', Goal, batch, 'goal')}
+        valid = self.validate(GoalCommentImportSerializer, batch, context)
+        self.save('comment', GoalComment, [GoalComment(**data) for _, data in valid], [record for record, _ in valid])
+
+
+def open_upload(file: IO[bytes], filename: str, input_format: Optional[str] = None) -> tuple[IO[str], str]:
+    """
+    Text stream and format of an uploaded or local file; ``.gz`` files are
+    decompressed on the fly. Raises one of READ_ERRORS when a ``.gz`` file
+    is not gzip.
+    """
+    name = filename.lower()
+    if name.endswith('.gz'):
+        file = gzip.GzipFile(fileobj=file)
+        # Reads the header, so a file that is not gzip fails here rather than halfway through the import.
+        file.peek(1)
+        name = name[:-len('.gz')]
+    if input_format is None:
+        input_format = 'csv' if name.endswith('.csv') else 'ndjson'
+    return io.TextIOWrapper(file, encoding='utf-8', newline=''), input_format
@@ -0,0 +1,49 @@
+import time
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import connection, transaction
+from django.db.models import Max
+
+from todolist.goals.models import Goal
+
+LOCK_SQL = 'SELECT id FROM goals_goal WHERE id >= %(start)s AND id < %(stop)s FOR UPDATE'
+
+# Locking the goals first makes comment inserts of this range wait for the
+# backfill, so their trigger increments land on top of the recomputed count.
+BACKFILL_SQL = """
+UPDATE goals_goal g
+SET comment_count = coalesce(c.total, 0),
+    last_activity_at = greatest(g.created, c.last_activity_at)
+FROM goals_goal g2
+LEFT JOIN (
+    SELECT goal_id, count(*) AS total, max(updated) AS last_activity_at
+    FROM goals_goalcomment
+    WHERE goal_id >= %(start)s AND goal_id < %(stop)s
+    GROUP BY goal_id
+) c ON c.goal_id = g2.id
+WHERE g.id = g2.id AND g.id >= %(start)s AND g.id < %(stop)s
+"""
+
+
+class Command(BaseCommand):
+    help = 'Recompute Goal.comment_count and Goal.last_activity_at in id-range batches'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--sleep', type=float, default=0, help='Seconds to pause between batches')
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        max_id = Goal.objects.aggregate(max_id=Max('id'))['max_id'] or 0
+        batch_size = options['batch_size']
+        updated = 0
+        for start in range(1, max_id + 1, batch_size):
+            params = {'start': start, 'stop': start + batch_size}
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(LOCK_SQL, params)
+                cursor.execute(BACKFILL_SQL, params)
+                updated += cursor.rowcount
+            self.stdout.write(f'{min(start + batch_size - 1, max_id)}/{max_id}')
+            if options['sleep']:
+                time.sleep(options['sleep'])
+        self.stdout.write(self.style.SUCCESS(f'Backfilled {updated} goals'))
@@ -0,0 +1,292 @@
+import json
+import platform
+import subprocess
+import time
+from functools import lru_cache
+from typing import Any, Callable, Optional
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import connection
+from django.db.models import Count, Q
+from django.test import Client
+from django.utils import timezone
+
+from core.models import User
+from todolist.goals.cache import bump_version
+from todolist.goals.management.commands.seed_bench import bench_users
+from todolist.goals.models import Goal, GoalCategory, GoalComment, Tombstone
+
+# A request of a scenario: method, path and JSON body.
+Call = tuple[str, str, Optional[dict]]
+
+
+def percentile(values: list[float], quantile: float) -> float:
+    return values[min(len(values) - 1, int(len(values) * quantile))]
+
+
+class QueryCounter:
+    def __init__(self) -> None:
+        self.count = 0
+
+    def __call__(self, execute: Any, sql: str, params: Any, many: bool, context: dict) -> Any:
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = (
+        'Runs every API endpoint in-process against the data created by seed_bench, as its biggest (whale) '
+        'and median (typical) user, and reports throughput, latency percentiles and queries per request. '
+        'List scenarios miss the response cache unless --cached is given. '
+        '--output saves the results as JSON; --baseline compares them with a previous run.'
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--prefix', default='bench', help='Username prefix given to seed_bench')
+        parser.add_argument('--password', default='bench-password', help='Password given to seed_bench')
+        parser.add_argument('--requests', type=int, default=200, help='Measured requests per scenario')
+        parser.add_argument('--login-requests', type=int, default=20, help='Measured requests of the login scenario')
+        parser.add_argument('--warmup', type=int, default=10, help='Unmeasured requests before each scenario')
+        parser.add_argument('--only', nargs='+', metavar='SCENARIO', help='Run only these scenarios')
+        parser.add_argument(
+            '--cached', action='store_true',
+            help='Serve the list scenarios from the response cache instead of missing it on every request',
+        )
+        parser.add_argument('--output', help='Write the results to this JSON file')
+        parser.add_argument('--baseline', help='Compare with the results of an earlier --output')
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        users = list(
+            bench_users(options['prefix'])
+            .annotate(goal_count=Count('goals', filter=~Q(goals__status=Goal.Status.archived)))
+            .order_by('-goal_count', 'username')
+        )
+        if not users:
+            raise CommandError(f'No bench users "{options["prefix"]}_*", run seed_bench first')
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+
+        self.options = options
+        self.started = timezone.now()
+        profiles = {'whale': users[0], 'typical': users[len(users) // 2]}
+        results = {
+            'started': self.started.isoformat(),
+            'environment': self.environment(),
+            'dataset': self.dataset(users),
+            'users': {name: user.username for name, user in profiles.items()},
+            'scenarios': {},
+        }
+        try:
+            for name, (request, count) in self.scenarios(profiles).items():
+                if options['only'] and name not in options['only']:
+                    continue
+                results['scenarios'][name] = result = self.run(request, count)
+                self.stdout.write(self.format(name, result, baseline))
+        finally:
+            self.clean_up(users)
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2, ensure_ascii=False)
+            self.stdout.write(f'Results written to {options["output"]}')
+
+    def environment(self) -> dict:
+        try:
+            revision = subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, cwd=settings.BASE_DIR,
+            ).stdout.strip() or None
+        except OSError:
+            revision = None
+        return {
+            'revision': revision,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': f'{connection.vendor} {connection.Database.__name__}',
+            'cache': settings.CACHES['default']['BACKEND'],
+            'session_engine': settings.SESSION_ENGINE,
+            'async_views': settings.ASYNC_VIEWS,
+            'password_hashing_workers': settings.PASSWORD_HASHING_WORKERS,
+            'cached_lists': self.options['cached'],
+        }
+
+    def dataset(self, users: list[User]) -> dict:
+        return {
+            'users': len(users),
+            'categories': GoalCategory.objects.filter(user__in=users).count(),
+            'goals': Goal.objects.filter(user__in=users).count(),
+            'comments': GoalComment.objects.filter(user__in=users).count(),
+        }
+
+    def scenarios(self, profiles: dict[str, User]) -> dict[str, tuple[Callable[[int], Any], int]]:
+        """Scenario name -> (function sending the i-th request, number of measured requests)."""
+        count = self.options['requests']
+        scenarios = {}
+        for profile, user in profiles.items():
+            scenarios.update({
+                f'{profile}:{name}': (self.as_user(user, scenario), count)
+                for name, scenario in self.user_scenarios(user, count).items()
+            })
+
+        credentials = {'username': profiles['typical'].username, 'password': self.options['password']}
+        scenarios['login'] = (
+            self.as_user(None, lambda i: ('POST', '/core/login', credentials)), self.options['login_requests'],
+        )
+        return scenarios
+
+    def user_scenarios(self, user: User, count: int) -> dict[str, Callable[[int], Call]]:
+        goals = list(
+            Goal.objects.filter(user=user, category__is_deleted=False)
+            .exclude(status=Goal.Status.archived).order_by('id').values('id', 'title', 'category_id')[:count]
+        )
+        categories = list(GoalCategory.objects.filter(user=user, is_deleted=False).order_by('id').values_list(
+            'id', flat=True
+        )[:count])
+        busiest = Goal.objects.filter(user=user).exclude(status=Goal.Status.archived).order_by(
+            '-comment_count', 'id'
+        ).first()
+        comments = list(GoalComment.objects.filter(user=user).order_by('id').values_list('id', flat=True)[:count])
+        if not goals or not comments:
+            raise CommandError(f'{user.username} has no goals or comments, seed more data')
+
+        total = len(goals)
+        search = goals[0]['title'].split()[0]
+        deep_offset = max(Goal.objects.filter(user=user).exclude(status=Goal.Status.archived).count() - 20, 0)
+        category = categories[0]
+        now = int(time.time())
+
+        def cached_list(path: str) -> Callable[[int], Call]:
+            # Bumping the cache version misses the cached response and count, as the first read after a write would.
+            def scenario(i: int) -> Call:
+                if not self.options['cached']:
+                    bump_version(user.id)
+                return 'GET', path, None
+            return scenario
+
+        # Created on first use, so they do not show up in the read scenarios.
+        @lru_cache(maxsize=None)
+        def destroyed_goals() -> list[int]:
+            return self.create_goals(user, category, count)
+
+        @lru_cache(maxsize=None)
+        def destroyed_categories() -> list[int]:
+            return self.create_categories_with_goals(user, count, goals_per_category=20)
+
+        return {
+            'profile': lambda i: ('GET', '/core/profile', None),
+            'category-list': cached_list('/goals/goal_category/list?limit=20'),
+            'goal-list': cached_list('/goals/goal/list?limit=20'),
+            'goal-list-filter': cached_list(
+                f'/goals/goal/list?limit=20&category={category}&status__in=1,2&priority__in=3,4'
+            ),
+            'goal-list-search': cached_list(f'/goals/goal/list?limit=20&search={search}'),
+            'goal-list-ordering': cached_list('/goals/goal/list?limit=20&ordering=-last_activity_at'),
+            'goal-list-deep-offset': cached_list(f'/goals/goal/list?limit=20&offset={deep_offset}'),
+            'goal-list-cursor': cached_list('/goals/goal/list?limit=20&cursor='),
+            'goal-detail': lambda i: ('GET', f'/goals/goal/{goals[i % total]["id"]}', None),
+            'goal-stats': lambda i: ('GET', '/goals/goal/stats', None),
+            'comment-list': cached_list(f'/goals/goal_comment/list?limit=20&goal={busiest.id}'),
+            'comment-detail': lambda i: ('GET', f'/goals/goal_comment/{comments[i % len(comments)]}', None),
+            'sync': lambda i: ('GET', '/goals/sync', None),
+            'create-category': lambda i: ('POST', '/goals/goal_category/create', {'title': f'Bench {now}-{i}'}),
+            'create-goal': lambda i: (
+                'POST', '/goals/goal/create', {'title': f'Bench {now}-{i}', 'category': category},
+            ),
+            'create-comment': lambda i: (
+                'POST', '/goals/goal_comment/create', {'text': f'Bench {now}-{i}', 'goal': goals[i % total]['id']},
+            ),
+            # Writes the title a goal already has, so the data stays the same.
+            'update-goal': lambda i: (
+                'PATCH', f'/goals/goal/{goals[i % total]["id"]}', {'title': goals[i % total]['title']},
+            ),
+            'destroy-goal': lambda i: ('DELETE', f'/goals/goal/{destroyed_goals()[i]}', None),
+            'destroy-category': lambda i: ('DELETE', f'/goals/goal_category/{destroyed_categories()[i]}', None),
+        }
+
+    def create_goals(self, user: User, category: int, count: int) -> list[int]:
+        goals = Goal.objects.bulk_create(
+            Goal(user=user, category_id=category, title='Bench destroy')
+            for _ in range(count + self.options['warmup'])
+        )
+        return [goal.id for goal in goals]
+
+    def create_categories_with_goals(self, user: User, count: int, goals_per_category: int) -> list[int]:
+        categories = GoalCategory.objects.bulk_create(
+            GoalCategory(user=user, title='Bench destroy') for _ in range(count + self.options['warmup'])
+        )
+        Goal.objects.bulk_create(
+            Goal(user=user, category=category, title='Bench destroy')
+            for category in categories for _ in range(goals_per_category)
+        )
+        return [category.id for category in categories]
+
+    def as_user(self, user: Optional[User], scenario: Callable[[int], Call]) -> Callable[[int], Any]:
+        client = Client(raise_request_exception=False)
+        if user is not None:
+            client.force_login(user)
+
+        def request(i: int) -> Any:
+            method, path, data = scenario(i)
+            return client.generic(
+                method, path, json.dumps(data) if data is not None else '',
+                content_type='application/json', HTTP_ACCEPT='application/json',
+            )
+        return request
+
+    def run(self, request: Callable[[int], Any], count: int) -> dict:
+        warmup = self.options['warmup']
+        for i in range(warmup):
+            request(count + i)
+
+        latencies = []
+        errors = 0
+        counter = QueryCounter()
+        started = time.perf_counter()
+        with connection.execute_wrapper(counter):
+            for i in range(count):
+                request_started = time.perf_counter()
+                response = request(i)
+                latencies.append(time.perf_counter() - request_started)
+                if response.status_code >= 400:
+                    errors += 1
+        elapsed = time.perf_counter() - started
+
+        latencies.sort()
+        return {
+            'requests': count,
+            'errors': errors,
+            'throughput': round(count / elapsed, 2),
+            'queries': round(counter.count / count, 2),
+            **{key: round(percentile(latencies, q) * 1000, 2) for key, q in (
+                ('p50_ms', 0.5), ('p95_ms', 0.95), ('p99_ms', 0.99), ('max_ms', 1),
+            )},
+        }
+
+    def format(self, name: str, result: dict, baseline: Optional[dict]) -> str:
+        line = (
+            f'{name:<32} {result["throughput"]:>9.1f} req/s  p50 {result["p50_ms"]:>8.2f}ms  '
+            f'p95 {result["p95_ms"]:>8.2f}ms  p99 {result["p99_ms"]:>8.2f}ms  {result["queries"]:>5.1f} queries'
+        )
+        if result['errors']:
+            line += f'  {result["errors"]} errors'
+        before = (baseline or {}).get('scenarios', {}).get(name)
+        if before:
+            line += (
+                f'  (throughput {self.change(before["throughput"], result["throughput"])}, '
+                f'p50 {self.change(before["p50_ms"], result["p50_ms"])})'
+            )
+        return line
+
+    def change(self, before: float, after: float) -> str:
+        return f'{(after - before) / before * 100:+.0f}%' if before else 'n/a'
+
+    def clean_up(self, users: list[User]) -> None:
+        """Deletes what the run created, so that every run starts from the seeded data."""
+        created = {'user__in': users, 'created__gte': self.started}
+        GoalComment.objects.filter(**created).delete()
+        Goal.objects.filter(**created).delete()
+        GoalCategory.objects.filter(**created).delete()
+        Tombstone.objects.filter(user__in=users, deleted__gte=self.started).delete()
@@ -0,0 +1,86 @@
+import time
+from types import SimpleNamespace
+from typing import Any, Callable
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db.models import Count, Q
+from rest_framework.renderers import JSONRenderer
+
+from todolist.fastpath import get_values_serializer
+from todolist.goals.management.commands.seed_bench import bench_users
+from todolist.goals.models import Goal, GoalCategory, GoalComment
+from todolist.goals.serializers import GoalCategorySerializer, GoalCommentSerializer, GoalCreateSerializer
+from todolist.renderers import FastJSONRenderer
+
+
+def best_time(function: Callable[[], Any], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+class Command(BaseCommand):
+    help = (
+        'Measures how many rows per second the list views serialize and render, without HTTP and the '
+        'database: ModelSerializer with JSONRenderer against ValuesSerializer with FastJSONRenderer, on '
+        'the categories, goals and comments of the biggest seed_bench user. Both must produce the same bytes.'
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--prefix', default='bench', help='Username prefix given to seed_bench')
+        parser.add_argument('--rows', type=int, default=1000, help='Rows per list')
+        parser.add_argument('--repeat', type=int, default=20, help='Runs per measurement, the fastest counts')
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        user = (
+            bench_users(options['prefix'])
+            .annotate(goal_count=Count('goals', filter=~Q(goals__status=Goal.Status.archived)))
+            .order_by('-goal_count', 'username').first()
+        )
+        if user is None:
+            raise CommandError(f'No bench users "{options["prefix"]}_*", run seed_bench first')
+
+        lists = {
+            'category-list': (GoalCategorySerializer, GoalCategory.objects.filter(user=user, is_deleted=False)),
+            'goal-list': (GoalCreateSerializer, Goal.objects.filter(user=user).exclude(status=Goal.Status.archived)),
+            'comment-list': (GoalCommentSerializer, GoalComment.objects.filter(user=user)),
+        }
+        self.stdout.write(f'{user.username}, up to {options["rows"]} rows per list, best of {options["repeat"]}')
+        for name, (serializer_class, queryset) in lists.items():
+            self.run(name, serializer_class, queryset.order_by('id'), user, options['rows'], options['repeat'])
+
+    def run(self, name: str, serializer_class: type, queryset: Any, user: Any, rows: int, repeat: int) -> None:
+        instances = list(queryset.select_related('user')[:rows])
+        serializer = get_values_serializer(serializer_class)
+        values = list(serializer.values(queryset)[:rows])
+        request = SimpleNamespace(user=user)
+        if not instances:
+            self.stdout.write(f'{name:<14} no rows')
+            return
+
+        def drf_serialize() -> Any:
+            return serializer_class(instances, many=True, context={}).data
+
+        def fast_serialize() -> Any:
+            return serializer.to_representation(values, serializer.get_related(values, request))
+
+        drf_data, fast_data = drf_serialize(), fast_serialize()
+        if JSONRenderer().render(drf_data) != FastJSONRenderer().render(fast_data):
+            raise CommandError(f'{name}: the fast path renders different bytes')
+
+        stages = {
+            'serialize': (drf_serialize, fast_serialize),
+            'render': (lambda: JSONRenderer().render(drf_data), lambda: FastJSONRenderer().render(fast_data)),
+            'total': (
+                lambda: JSONRenderer().render(drf_serialize()), lambda: FastJSONRenderer().render(fast_serialize()),
+            ),
+        }
+        for stage, (drf, fast) in stages.items():
+            before = len(instances) / best_time(drf, repeat)
+            after = len(instances) / best_time(fast, repeat)
+            self.stdout.write(
+                f'{name:<14} {stage:<10} {before:>12,.0f} rows/s  ->  {after:>12,.0f} rows/s  ({after / before:.1f}x)'
+            )
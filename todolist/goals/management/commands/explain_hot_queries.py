@@ -0,0 +1,112 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import connection, transaction
+from django.db.models import Count, QuerySet
+
+from core.models import User
+from todolist.goals.models import Goal, GoalCategory, GoalComment
+
+SEED_USERS_SQL = """
+    INSERT INTO core_user (password, is_superuser, username, first_name, last_name, email,
+                           is_staff, is_active, date_joined)
+    SELECT '!', false, 'bench_' || i, '', '', '', false, true, now()
+    FROM generate_series(1, %(users)s) AS i
+    ON CONFLICT (username) DO NOTHING
+"""
+
+SEED_CATEGORIES_SQL = """
+    INSERT INTO goals_goalcategory (created, updated, title, user_id, is_deleted)
+    SELECT now(), now(), 'bench category ' || i, u.id, random() < 0.1
+    FROM core_user u CROSS JOIN generate_series(1, %(categories)s) AS i
+    WHERE u.username LIKE 'bench\\_%%'
+"""
+
+# power(random(), 3) skews the per-category goal count so a few categories
+# (and therefore users) end up much larger than the rest.
+SEED_GOALS_SQL = """
+    INSERT INTO goals_goal (
+        created, updated, title, description, category_id, due_date, user_id, status, priority,
+        comment_count, last_activity_at
+    )
+    SELECT ts, ts, title, NULL, category_id, NULL, user_id, status, priority, 0, ts
+    FROM (
+        SELECT now() - random() * interval '720 days' AS ts, 'goal ' || md5(random()::text) AS title,
+               c.id AS category_id, c.user_id, 1 + floor(random() * 4) AS status, 1 + floor(random() * 4) AS priority
+        FROM (
+            SELECT id, user_id, 1 + (power(random(), 3) * %(per_category)s * 4)::int AS n
+            FROM goals_goalcategory
+            WHERE title LIKE 'bench category %%'
+        ) AS c
+        CROSS JOIN LATERAL generate_series(1, c.n) AS g
+    ) AS seeded
+"""
+
+SEED_COMMENTS_SQL = """
+    INSERT INTO goals_goalcomment (created, updated, text, goal_id, user_id)
+    SELECT g.created, g.created, 'comment', g.id, g.user_id
+    FROM goals_goal g
+    WHERE g.title LIKE 'goal %%' AND random() < 0.2
+"""
+
+
+class Command(BaseCommand):
+    help = 'Print query plans of the goal list hot queries with and without the Meta.indexes'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--seed-goals', type=int, default=0,
+                            help='Seed roughly this many goals before explaining (PostgreSQL only)')
+        parser.add_argument('--seed-users', type=int, default=1000)
+        parser.add_argument('--username', help='Explain the queries of this user (default: the biggest one)')
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if options['seed_goals']:
+            self.seed(options['seed_users'], options['seed_goals'])
+
+        if options['username']:
+            user = User.objects.get(username=options['username'])
+        else:
+            biggest = Goal.objects.values('user').annotate(n=Count('id')).order_by('-n').values('user')[:1]
+            user = User.objects.get(pk=biggest)
+        self.stdout.write(f'Explaining queries of {user.username} ({user.goals.count()} goals)')
+
+        self.stdout.write(self.style.MIGRATE_HEADING('\n=== With indexes ==='))
+        self.explain_all(user)
+
+        with transaction.atomic():
+            with connection.schema_editor(atomic=False) as schema_editor:
+                for model in (GoalCategory, Goal, GoalComment):
+                    for index in model._meta.indexes:
+                        schema_editor.remove_index(model, index)
+            self.stdout.write(self.style.MIGRATE_HEADING('\n=== Without indexes ==='))
+            self.explain_all(user)
+            transaction.set_rollback(True)
+
+    def explain_all(self, user: User) -> None:
+        for name, queryset in self.get_queries(user).items():
+            self.stdout.write(self.style.SUCCESS(f'\n--- {name}'))
+            self.stdout.write(queryset.explain(analyze=True, buffers=True))
+
+    def get_queries(self, user: User) -> dict[str, QuerySet]:
+        goals = Goal.objects.select_related('user').filter(
+            user=user, category__is_deleted=False
+        ).exclude(status=Goal.Status.archived)
+        return {
+            'goal list ordered by title': goals.order_by('title', 'id')[:50],
+            'goal list ordered by -created': goals.order_by('-created', '-id')[:50],
+            'category list': GoalCategory.objects.select_related('user').filter(
+                user=user, is_deleted=False
+            ).order_by('title', 'id')[:50],
+            'comment list': GoalComment.objects.filter(user=user).exclude(
+                goal__status=Goal.Status.archived
+            ).order_by('-created', '-id')[:50],
+        }
+
+    def seed(self, users: int, goals: int) -> None:
+        categories = 10
+        per_category = max(1, goals // (users * categories))
+        with connection.cursor() as cursor:
+            for sql in (SEED_USERS_SQL, SEED_CATEGORIES_SQL, SEED_GOALS_SQL, SEED_COMMENTS_SQL):
+                cursor.execute(sql, {'users': users, 'categories': categories, 'per_category': per_category})
+            cursor.execute('ANALYZE')
+        self.stdout.write(f'Seeded {Goal.objects.count()} goals')
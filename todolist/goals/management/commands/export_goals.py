@@ -0,0 +1,36 @@
+import sys
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from core.models import User
+from todolist.goals.export import FORMATS, export_stream
+
+
+class Command(BaseCommand):
+    help = "Stream a user's categories, goals and comments as NDJSON or CSV"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('username')
+        parser.add_argument('--output', choices=FORMATS, default='ndjson')
+        parser.add_argument('--gzip', action='store_true')
+        parser.add_argument('--file', help='Write to this path instead of stdout')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f'User "{options["username"]}" does not exist')
+
+        stream = export_stream(user, options['output'], options['gzip'], options['chunk_size'])
+        if options['file']:
+            with open(options['file'], 'wb' if options['gzip'] else 'w', encoding=None if options['gzip'] else 'utf-8') as f:
+                for chunk in stream:
+                    f.write(chunk)
+        elif options['gzip']:
+            for chunk in stream:
+                sys.stdout.buffer.write(chunk)
+        else:
+            for chunk in stream:
+                self.stdout.write(chunk, ending='')
@@ -0,0 +1,38 @@
+import json
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from core.models import User
+from todolist.goals.cache import bump_version
+from todolist.goals.export import FORMATS
+from todolist.goals.importer import READ_ERRORS, Importer, open_upload, parse
+
+
+class Command(BaseCommand):
+    help = 'Import categories, goals and comments exported by export_goals into an account'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('username')
+        parser.add_argument('path', help='NDJSON or CSV file, optionally gzip-compressed (.gz)')
+        parser.add_argument('--input', choices=FORMATS, help='Input format (default: guessed from the file name)')
+        parser.add_argument('--batch-size', type=int, default=settings.GOALS_IMPORT_BATCH_SIZE)
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f'User "{options["username"]}" does not exist')
+
+        importer = Importer(user, batch_size=options['batch_size'])
+        with open(options['path'], 'rb') as f:
+            try:
+                stream, input_format = open_upload(f, options['path'], options['input'])
+            except READ_ERRORS as e:
+                raise CommandError(f'Unreadable file: {e}')
+            for report in importer.run(parse(stream, input_format)):
+                for error in report['errors']:
+                    self.stderr.write(f'line {error["line"]}: {json.dumps(error["errors"], ensure_ascii=False)}')
+                self.stdout.write(f'processed {report["processed"]}, created {report["created"]}')
+        bump_version(user.id)
@@ -0,0 +1,135 @@
+import asyncio
+import time
+from collections import Counter
+from importlib import import_module
+from typing import Any, Optional
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from core.models import User
+
+
+def create_session(username: str) -> str:
+    """Session cookie of ``username``, created directly so the run does not depend on the login endpoint."""
+    try:
+        user = User.objects.get(username=username)
+    except User.DoesNotExist:
+        raise CommandError(f'User "{username}" does not exist')
+    session = import_module(settings.SESSION_ENGINE).SessionStore()
+    session[SESSION_KEY] = str(user.pk)
+    session[BACKEND_SESSION_KEY] = 'django.contrib.auth.backends.ModelBackend'
+    session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    session.create()
+    return session.session_key
+
+
+async def read_response(reader: asyncio.StreamReader) -> tuple[int, bool]:
+    """Status of the next response on the connection and whether the server keeps the connection open."""
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    status = int(lines[0].split()[1])
+    headers = {}
+    for line in lines[1:]:
+        if ':' in line:
+            name, value = line.split(':', 1)
+            headers[name.strip().lower()] = value.strip()
+
+    if 'content-length' in headers:
+        await reader.readexactly(int(headers['content-length']))
+    elif headers.get('transfer-encoding') == 'chunked':
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    return status, headers.get('connection', '').lower() != 'close'
+
+
+class Command(BaseCommand):
+    help = (
+        'Opens --concurrency keep-alive connections to a running server and requests the given paths '
+        'round-robin for --duration seconds, then prints throughput and latency percentiles.'
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('paths', nargs='+', help='Paths to request, e.g. /goals/goal/list?limit=20')
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+        parser.add_argument('--username', help='Authenticate the requests as this user')
+        parser.add_argument('--concurrency', type=int, default=500)
+        parser.add_argument('--duration', type=float, default=30)
+        parser.add_argument('--timeout', type=float, default=30)
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        url = urlsplit(options['base_url'])
+        if url.scheme != 'http' or not url.hostname:
+            raise CommandError('--base-url must be an http:// URL')
+        cookie = None
+        if options['username']:
+            cookie = f'{settings.SESSION_COOKIE_NAME}={create_session(options["username"])}'
+
+        latencies, statuses, elapsed = asyncio.run(self.run(
+            url.hostname, url.port or 80, options['paths'], cookie,
+            options['concurrency'], options['duration'], options['timeout'],
+        ))
+        self.report(latencies, statuses, elapsed, options['concurrency'])
+
+    async def run(
+        self, host: str, port: int, paths: list[str], cookie: Optional[str],
+        concurrency: int, duration: float, timeout: float,
+    ) -> tuple[list[float], Counter, float]:
+        requests = []
+        for path in paths:
+            request = f'GET {path} HTTP/1.1\r\nHost: {host}\r\nAccept: application/json\r\n'
+            if cookie:
+                request += f'Cookie: {cookie}\r\n'
+            requests.append((request + '\r\n').encode())
+
+        latencies: list[float] = []
+        statuses: Counter = Counter()
+        started = time.perf_counter()
+        deadline = started + duration
+
+        async def worker(offset: int) -> None:
+            writer = None
+            sent = offset
+            while time.perf_counter() < deadline:
+                try:
+                    if writer is None:
+                        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+                    request_started = time.perf_counter()
+                    writer.write(requests[sent % len(requests)])
+                    sent += 1
+                    status, keep_alive = await asyncio.wait_for(read_response(reader), timeout)
+                except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError) as exc:
+                    statuses[type(exc).__name__] += 1
+                    if writer is not None:
+                        writer.close()
+                    writer = None
+                    continue
+                latencies.append(time.perf_counter() - request_started)
+                statuses[status] += 1
+                if not keep_alive:
+                    writer.close()
+                    writer = None
+            if writer is not None:
+                writer.close()
+
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+        return latencies, statuses, time.perf_counter() - started
+
+    def report(self, latencies: list[float], statuses: Counter, elapsed: float, concurrency: int) -> None:
+        self.stdout.write(f'connections:  {concurrency}')
+        self.stdout.write(f'duration:     {elapsed:.1f}s')
+        self.stdout.write(f'responses:    {len(latencies)} ({len(latencies) / elapsed:.1f} req/s)')
+        self.stdout.write('statuses:     ' + ', '.join(f'{key}: {count}' for key, count in sorted(
+            statuses.items(), key=lambda item: str(item[0])
+        )))
+        if not latencies:
+            return
+        latencies.sort()
+        for label, quantile in (('p50', 0.5), ('p95', 0.95), ('p99', 0.99), ('max', 1)):
+            value = latencies[min(len(latencies) - 1, int(len(latencies) * quantile))]
+            self.stdout.write(f'{label}:          {value * 1000:.1f}ms')
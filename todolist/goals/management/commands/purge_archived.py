@@ -0,0 +1,59 @@
+import time
+from datetime import timedelta
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import close_old_connections
+from django.utils import timezone
+
+from todolist.goals.retention import purge_categories, purge_goals, purge_tombstones
+
+
+class Command(BaseCommand):
+    help = (
+        'Moves goals archived and categories deleted more than --days ago, with their goals and comments, to '
+        'compressed Archive rows, in small batches so locks stay short and vacuum keeps up, and deletes sync '
+        'tombstones older than --tombstone-days. With --every it keeps running as a scheduled job.'
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            '--days', type=int, default=settings.GOALS_RETENTION_DAYS,
+            help='Days archived data stays in the live tables',
+        )
+        parser.add_argument(
+            '--tombstone-days', type=int, default=settings.GOALS_TOMBSTONE_DAYS,
+            help='Days tombstones of deleted objects are kept for syncing clients',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.GOALS_RETENTION_BATCH_SIZE,
+            help='Goals or categories per transaction',
+        )
+        parser.add_argument('--sleep', type=float, default=0.1, help='Seconds to pause between batches')
+        parser.add_argument('--every', type=int, default=0, help='Purge again every so many seconds, until stopped')
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        while True:
+            self.purge(options)
+            if not options['every']:
+                break
+            close_old_connections()
+            time.sleep(options['every'])
+
+    def purge(self, options: dict) -> None:
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        # Categories first: their archived goals go with them, not one by one.
+        for name, batches in (('categories', purge_categories), ('goals', purge_goals)):
+            purged = 0
+            for count in batches(cutoff, options['batch_size']):
+                purged += count
+                time.sleep(options['sleep'])
+            self.stdout.write(self.style.SUCCESS(f'Archived {purged} {name} removed before {cutoff:%Y-%m-%d %H:%M}'))
+
+        cutoff = timezone.now() - timedelta(days=options['tombstone_days'])
+        deleted = 0
+        for count in purge_tombstones(cutoff, options['batch_size']):
+            deleted += count
+            time.sleep(options['sleep'])
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} tombstones from before {cutoff:%Y-%m-%d %H:%M}'))
@@ -0,0 +1,31 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from core.models import User
+from todolist.goals.counters import rebuild_counters
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the goal statistics counters from the goals table'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('usernames', nargs='*', help='Only rebuild these users (default: everyone)')
+        parser.add_argument('--batch-size', type=int, default=500, help='Users per transaction')
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        users = User.objects.order_by('id')
+        if options['usernames']:
+            users = users.filter(username__in=options['usernames'])
+
+        batch, rebuilt = [], 0
+        for user_id in users.values_list('id', flat=True).iterator():
+            batch.append(user_id)
+            if len(batch) >= options['batch_size']:
+                rebuild_counters(batch)
+                rebuilt += len(batch)
+                batch = []
+        if batch:
+            rebuild_counters(batch)
+            rebuilt += len(batch)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt counters of {rebuilt} users'))
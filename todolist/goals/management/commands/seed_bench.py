@@ -0,0 +1,167 @@
+import datetime
+import random
+from collections import Counter
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import transaction
+from django.utils import timezone
+
+from core import passwords
+from core.models import User
+from todolist.goals.models import Goal, GoalCategory, GoalComment
+
+WORDS = (
+    'отчёт', 'проект', 'спорт', 'бег', 'книга', 'ремонт', 'отпуск', 'английский', 'бюджет', 'встреча',
+    'врач', 'подарок', 'курс', 'дача', 'машина', 'налоги', 'переезд', 'презентация', 'код', 'релиз',
+    'report', 'release', 'budget', 'meeting', 'workout', 'reading', 'travel', 'garden', 'invoice', 'review',
+)
+STATUS_WEIGHTS = {
+    Goal.Status.to_do: 40, Goal.Status.in_progress: 25, Goal.Status.done: 25, Goal.Status.archived: 10,
+}
+PRIORITY_WEIGHTS = {
+    Goal.Priority.low: 20, Goal.Priority.medium: 50, Goal.Priority.high: 20, Goal.Priority.critical: 10,
+}
+
+
+def bench_users(prefix: str):
+    return User.objects.filter(username__startswith=f'{prefix}_')
+
+
+def spread(rng: random.Random, total: int, weights: list[float]) -> list[int]:
+    """``total`` items dealt to ``len(weights)`` owners with the given relative weights."""
+    counts = Counter(rng.choices(range(len(weights)), weights, k=total))
+    return [counts[i] for i in range(len(weights))]
+
+
+class Command(BaseCommand):
+    help = (
+        'Creates bench users (<prefix>_00000, ...) with categories, goals and comments for the bench command. '
+        'Goals follow a long-tailed distribution on top of --whales users that own --whale-share of all goals, '
+        'and most comments land on a few goals. The same --seed always produces the same data.'
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--whales', type=int, default=2, help='Users that own --whale-share of the goals')
+        parser.add_argument('--whale-share', type=float, default=0.5)
+        parser.add_argument('--categories', type=int, default=1000)
+        parser.add_argument('--goals', type=int, default=50000)
+        parser.add_argument('--comments', type=int, default=100000)
+        parser.add_argument('--prefix', default='bench')
+        parser.add_argument('--password', default='bench-password')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--clear', action='store_true', help='Delete the existing bench users and their data first')
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        prefix = options['prefix']
+        if options['users'] < 1:
+            raise CommandError('--users must be at least 1')
+        if not 0 <= options['whales'] <= options['users']:
+            raise CommandError('--whales must be between 0 and --users')
+        if not 0 <= options['whale_share'] <= 1:
+            raise CommandError('--whale-share must be between 0 and 1')
+        if options['clear']:
+            self.clear(prefix)
+        elif bench_users(prefix).exists():
+            raise CommandError(f'Bench users "{prefix}_*" already exist, pass --clear to recreate them')
+
+        rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        with transaction.atomic():
+            users = self.create_users(prefix, options['users'], options['password'])
+            weights = self.user_weights(rng, options['users'], options['whales'], options['whale_share'])
+            categories = self.create_categories(rng, users, weights, options['categories'])
+            goals = self.create_goals(rng, users, categories, weights, options['goals'])
+            comments = self.create_comments(rng, goals, options['comments'])
+
+        whales = ', '.join(user.username for user in users[:options['whales']])
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {len(users)} users, {sum(map(len, categories))} categories, {len(goals)} goals '
+            f'and {comments} comments (whales: {whales or "none"})'
+        ))
+
+    def clear(self, prefix: str) -> None:
+        users = bench_users(prefix)
+        with transaction.atomic():
+            GoalComment.objects.filter(goal__user__in=users).delete()
+            Goal.objects.filter(user__in=users).delete()
+            GoalCategory.objects.filter(user__in=users).delete()
+            deleted = users.count()
+            users.delete()
+        self.stdout.write(f'Deleted {deleted} existing bench users and their data')
+
+    def user_weights(self, rng: random.Random, users: int, whales: int, whale_share: float) -> list[float]:
+        # Whales split whale_share evenly, everybody else gets a Pareto-distributed share of the rest.
+        rest = [rng.paretovariate(1.2) for _ in range(users - whales)]
+        if not whales or not rest:
+            return [1.0] * whales + rest
+        if whale_share == 1:
+            return [1.0] * whales + [0.0] * len(rest)
+        return [sum(rest) * whale_share / (1 - whale_share) / whales] * whales + rest
+
+    def create_users(self, prefix: str, count: int, password: str) -> list[User]:
+        encoded = passwords.make_password(password)  # hashing once keeps seeding fast
+        users = [User(username=f'{prefix}_{i:05d}', password=encoded) for i in range(count)]
+        User.objects.bulk_create(users, batch_size=self.batch_size)
+        return list(bench_users(prefix).order_by('username'))
+
+    def create_categories(
+        self, rng: random.Random, users: list[User], weights: list[float], count: int,
+    ) -> list[list[GoalCategory]]:
+        # Every user gets at least one category to put goals into.
+        per_user = [1 + extra for extra in spread(rng, max(count - len(users), 0), weights)]
+        objs = [
+            GoalCategory(user=user, title=f'{rng.choice(WORDS).capitalize()} {n + 1}')
+            for user, total in zip(users, per_user) for n in range(total)
+        ]
+        GoalCategory.objects.bulk_create(objs, batch_size=self.batch_size)
+        categories = [[] for _ in users]
+        index = {user.id: i for i, user in enumerate(users)}
+        for category in objs:
+            categories[index[category.user_id]].append(category)
+        return categories
+
+    def create_goals(
+        self, rng: random.Random, users: list[User], categories: list[list[GoalCategory]],
+        weights: list[float], count: int,
+    ) -> list[Goal]:
+        today = timezone.localdate()
+        statuses, status_weights = zip(*STATUS_WEIGHTS.items())
+        priorities, priority_weights = zip(*PRIORITY_WEIGHTS.items())
+        goals = []
+        for user, user_categories, total in zip(users, categories, spread(rng, count, weights)):
+            for _ in range(total):
+                words = rng.sample(WORDS, 3)
+                goals.append(Goal(
+                    user=user,
+                    category=rng.choice(user_categories),
+                    title=' '.join(words[:2]).capitalize(),
+                    description=' '.join(words) if rng.random() < 0.5 else None,
+                    due_date=today + datetime.timedelta(days=rng.randint(-60, 120)) if rng.random() < 0.6 else None,
+                    status=rng.choices(statuses, status_weights)[0],
+                    priority=rng.choices(priorities, priority_weights)[0],
+                ))
+        for start in range(0, len(goals), self.batch_size):
+            Goal.objects.bulk_create(goals[start:start + self.batch_size])
+            self.stdout.write(f'goals: {min(start + self.batch_size, len(goals))}/{len(goals)}')
+        return goals
+
+    def create_comments(self, rng: random.Random, goals: list[Goal], count: int) -> int:
+        if not goals:
+            return 0
+        # Most goals have no comments, a few have long threads.
+        weights = [rng.paretovariate(1.1) for _ in goals]
+        batch = []
+        created = 0
+        for goal, total in zip(goals, spread(rng, count, weights)):
+            for n in range(total):
+                batch.append(GoalComment(user_id=goal.user_id, goal=goal, text=f'{rng.choice(WORDS)} #{n + 1}'))
+            if len(batch) >= self.batch_size:
+                GoalComment.objects.bulk_create(batch)
+                created += len(batch)
+                batch = []
+                self.stdout.write(f'comments: {created}/{count}')
+        GoalComment.objects.bulk_create(batch)
+        return created + len(batch)
@@ -0,0 +1,108 @@
+# Generated by Django 4.1.7 on 2026-10-18 10:56
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import AddIndexConcurrently, TrigramExtension
+from django.db import migrations, transaction
+
+GOAL_TRIGGER_SQL = """
+CREATE FUNCTION goals_goal_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('russian', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('russian', coalesce(NEW.description, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(NEW.description, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER goals_goal_search_vector
+    BEFORE INSERT OR UPDATE OF title, description ON goals_goal
+    FOR EACH ROW EXECUTE FUNCTION goals_goal_search_vector_update();
+"""
+
+GOAL_TRIGGER_REVERSE_SQL = """
+DROP TRIGGER goals_goal_search_vector ON goals_goal;
+DROP FUNCTION goals_goal_search_vector_update();
+"""
+
+CATEGORY_TRIGGER_SQL = """
+CREATE FUNCTION goals_goalcategory_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('russian', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER goals_goalcategory_search_vector
+    BEFORE INSERT OR UPDATE OF title ON goals_goalcategory
+    FOR EACH ROW EXECUTE FUNCTION goals_goalcategory_search_vector_update();
+"""
+
+CATEGORY_TRIGGER_REVERSE_SQL = """
+DROP TRIGGER goals_goalcategory_search_vector ON goals_goalcategory;
+DROP FUNCTION goals_goalcategory_search_vector_update();
+"""
+
+BACKFILL_BATCH_SIZE = 5000
+
+
+def backfill_search_vectors(apps, schema_editor):
+    # Touching the title fires the triggers above. Id ranges, each in its own
+    # transaction, keep the locks and the trigger work per statement small.
+    connection = schema_editor.connection
+    for table in ('goals_goal', 'goals_goalcategory'):
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT coalesce(max(id), 0) FROM {table}')
+            max_id = cursor.fetchone()[0]
+        for start in range(1, max_id + 1, BACKFILL_BATCH_SIZE):
+            with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+                cursor.execute(
+                    f'UPDATE {table} SET title = title WHERE id >= %s AND id < %s',
+                    [start, start + BACKFILL_BATCH_SIZE],
+                )
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block.
+    atomic = False
+
+    dependencies = [
+        ('goals', '0002_hot_query_indexes'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='goal',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='goalcategory',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunSQL(GOAL_TRIGGER_SQL, GOAL_TRIGGER_REVERSE_SQL),
+        migrations.RunSQL(CATEGORY_TRIGGER_SQL, CATEGORY_TRIGGER_REVERSE_SQL),
+        migrations.RunPython(backfill_search_vectors, migrations.RunPython.noop),
+        AddIndexConcurrently(
+            model_name='goal',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='goal_search_vector_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='goal',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['title'], name='goal_title_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+        AddIndexConcurrently(
+            model_name='goalcategory',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='category_search_vector_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='goalcategory',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['title'], name='category_title_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+    ]
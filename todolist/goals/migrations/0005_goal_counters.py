@@ -0,0 +1,107 @@
+# Generated by Django 4.1.7 on 2026-10-18 11:03
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+COUNTERS_TRIGGER_SQL = """
+CREATE FUNCTION goals_goal_counters_update() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE goals_goalcounter SET count = count - 1
+        WHERE user_id = OLD.user_id AND category_id = OLD.category_id
+          AND status = OLD.status AND priority = OLD.priority;
+        IF OLD.due_date IS NOT NULL AND OLD.status IN (1, 2) THEN
+            UPDATE goals_goalduecounter SET count = count - 1
+            WHERE user_id = OLD.user_id AND category_id = OLD.category_id AND due_date = OLD.due_date;
+        END IF;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'INSERT') THEN
+        INSERT INTO goals_goalcounter (user_id, category_id, status, priority, count)
+        VALUES (NEW.user_id, NEW.category_id, NEW.status, NEW.priority, 1)
+        ON CONFLICT (user_id, category_id, status, priority) DO UPDATE SET count = goals_goalcounter.count + 1;
+        IF NEW.due_date IS NOT NULL AND NEW.status IN (1, 2) THEN
+            INSERT INTO goals_goalduecounter (user_id, category_id, due_date, count)
+            VALUES (NEW.user_id, NEW.category_id, NEW.due_date, 1)
+            ON CONFLICT (user_id, category_id, due_date) DO UPDATE SET count = goals_goalduecounter.count + 1;
+        END IF;
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER goals_goal_counters_insert_delete
+    AFTER INSERT OR DELETE ON goals_goal
+    FOR EACH ROW EXECUTE FUNCTION goals_goal_counters_update();
+
+CREATE TRIGGER goals_goal_counters_update
+    AFTER UPDATE ON goals_goal
+    FOR EACH ROW
+    WHEN ((OLD.user_id, OLD.category_id, OLD.status, OLD.priority, OLD.due_date)
+          IS DISTINCT FROM (NEW.user_id, NEW.category_id, NEW.status, NEW.priority, NEW.due_date))
+    EXECUTE FUNCTION goals_goal_counters_update();
+
+INSERT INTO goals_goalcounter (user_id, category_id, status, priority, count)
+SELECT user_id, category_id, status, priority, count(*) FROM goals_goal
+GROUP BY user_id, category_id, status, priority;
+
+INSERT INTO goals_goalduecounter (user_id, category_id, due_date, count)
+SELECT user_id, category_id, due_date, count(*) FROM goals_goal
+WHERE due_date IS NOT NULL AND status IN (1, 2)
+GROUP BY user_id, category_id, due_date;
+"""
+
+COUNTERS_TRIGGER_REVERSE_SQL = """
+DROP TRIGGER goals_goal_counters_update ON goals_goal;
+DROP TRIGGER goals_goal_counters_insert_delete ON goals_goal;
+DROP FUNCTION goals_goal_counters_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('goals', '0004_tombstone'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GoalDueCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('due_date', models.DateField()),
+                ('count', models.IntegerField(default=0)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='goals.goalcategory')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Счётчик сроков целей',
+                'verbose_name_plural': 'Счётчики сроков целей',
+            },
+        ),
+        migrations.CreateModel(
+            name='GoalCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.PositiveSmallIntegerField(choices=[(1, 'К выполнению'), (2, 'В процессе'), (3, 'Выполнено'), (4, 'Архив')])),
+                ('priority', models.PositiveSmallIntegerField(choices=[(1, 'Низкий'), (2, 'Средний'), (3, 'Высокий'), (4, 'Критичный')])),
+                ('count', models.IntegerField(default=0)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='goals.goalcategory')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Счётчик целей',
+                'verbose_name_plural': 'Счётчики целей',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='goalduecounter',
+            constraint=models.UniqueConstraint(fields=('user', 'category', 'due_date'), name='goal_due_counter_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='goalcounter',
+            constraint=models.UniqueConstraint(fields=('user', 'category', 'status', 'priority'), name='goal_counter_unique'),
+        ),
+        migrations.RunSQL(COUNTERS_TRIGGER_SQL, COUNTERS_TRIGGER_REVERSE_SQL),
+    ]
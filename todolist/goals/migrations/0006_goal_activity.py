@@ -0,0 +1,63 @@
+# Generated by Django 4.1.7 on 2026-10-18 11:04
+
+from django.db import migrations, models
+import django.utils.timezone
+
+ACTIVITY_TRIGGER_SQL = """
+-- updated moves too, so /goals/sync (which filters on it) sends the goal with its new counters.
+CREATE FUNCTION goals_goalcomment_activity_update() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE goals_goal
+        SET comment_count = comment_count + 1, last_activity_at = greatest(last_activity_at, NEW.updated),
+            updated = now()
+        WHERE id = NEW.goal_id;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE goals_goal
+        SET comment_count = greatest(comment_count - 1, 0), updated = now()
+        WHERE id = OLD.goal_id;
+    ELSE
+        UPDATE goals_goal
+        SET last_activity_at = greatest(last_activity_at, NEW.updated), updated = now()
+        WHERE id = NEW.goal_id;
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER goals_goalcomment_activity
+    AFTER INSERT OR DELETE OR UPDATE OF text ON goals_goalcomment
+    FOR EACH ROW EXECUTE FUNCTION goals_goalcomment_activity_update();
+"""
+
+ACTIVITY_TRIGGER_REVERSE_SQL = """
+DROP TRIGGER goals_goalcomment_activity ON goals_goalcomment;
+DROP FUNCTION goals_goalcomment_activity_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('goals', '0005_goal_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='goal',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Комментарии'),
+        ),
+        # Existing goals stay NULL until backfill_goal_activity fills them in.
+        migrations.AddField(
+            model_name='goal',
+            name='last_activity_at',
+            field=models.DateTimeField(editable=False, null=True, verbose_name='Последняя активность'),
+        ),
+        migrations.AlterField(
+            model_name='goal',
+            name='last_activity_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, null=True, verbose_name='Последняя активность'),
+        ),
+        migrations.RunSQL(ACTIVITY_TRIGGER_SQL, ACTIVITY_TRIGGER_REVERSE_SQL),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.1.7 on 2026-10-18 12:10
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block.
+    atomic = False
+
+    dependencies = [
+        ('goals', '0006_goal_activity'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='goal',
+            index=models.Index(condition=models.Q(('status', 4), _negated=True), fields=['user', 'due_date'], include=('category',), name='goal_user_due_active_idx'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 4.1.7 on 2026-10-18 12:40
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block.
+    atomic = False
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('goals', '0007_goal_user_due_active_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Archive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('category', 'Категория'), ('goal', 'Цель')], max_length=16)),
+                ('object_id', models.BigIntegerField()),
+                ('title', models.CharField(max_length=255, verbose_name='Название')),
+                ('archived', models.DateTimeField(verbose_name='Дата архивации')),
+                ('purged', models.DateTimeField(auto_now_add=True, verbose_name='Дата переноса в архив')),
+                ('data', models.BinaryField()),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Архивная запись',
+                'verbose_name_plural': 'Архивные записи',
+                'indexes': [models.Index(fields=['user', '-purged', '-id'], name='archive_user_purged_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='archive',
+            constraint=models.UniqueConstraint(fields=('kind', 'object_id'), name='archive_kind_object_unique'),
+        ),
+        AddIndexConcurrently(
+            model_name='goal',
+            index=models.Index(condition=models.Q(('status', 4)), fields=['updated', 'id'], name='goal_archived_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='goalcategory',
+            index=models.Index(condition=models.Q(('is_deleted', True)), fields=['updated', 'id'], name='category_deleted_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.1.7 on 2026-10-18 12:56
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block.
+    atomic = False
+
+    dependencies = [
+        ('goals', '0008_archive'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='goal',
+            index=models.Index(fields=['user', 'updated', 'id'], name='goal_user_updated_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='goalcategory',
+            index=models.Index(fields=['user', 'updated', 'id'], name='category_user_updated_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='goalcomment',
+            index=models.Index(fields=['user', 'updated', 'id'], name='comment_user_updated_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='tombstone',
+            index=models.Index(fields=['deleted', 'id'], name='tombstone_deleted_idx'),
+        ),
+    ]
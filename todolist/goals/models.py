@@ -1,6 +1,9 @@
 
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.db.models import CASCADE
+from django.utils import timezone
 
 from core.models import User
 
@@ -17,10 +20,25 @@ class GoalCategory(BaseModel):
     class Meta:
         verbose_name = "Категория"
         verbose_name_plural = "Категории"
+        indexes = [
+            models.Index(
+                fields=['user', 'title', 'id'],
+                condition=models.Q(is_deleted=False),
+                name='category_user_title_live_idx',
+            ),
+            # Deleted categories in the order todolist.goals.retention purges them.
+            models.Index(fields=['updated', 'id'], condition=models.Q(is_deleted=True), name='category_deleted_idx'),
+            # The pages of todolist.goals.sync.
+            models.Index(fields=['user', 'updated', 'id'], name='category_user_updated_idx'),
+            GinIndex(fields=['search_vector'], name='category_search_vector_idx'),
+            GinIndex(fields=['title'], opclasses=['gin_trgm_ops'], name='category_title_trgm_idx'),
+        ]
 
     title = models.CharField(verbose_name="Название", max_length=255)
     user = models.ForeignKey(User, verbose_name="Автор", on_delete=models.PROTECT)
     is_deleted = models.BooleanField(verbose_name="Удалена", default=False)
+    # Maintained by the goals_goalcategory_search_vector trigger (migration 0003).
+    search_vector = SearchVectorField(null=True, editable=False)
 
     def __str__(self) -> str:
         return self.title
@@ -46,23 +64,162 @@ class Goal(BaseModel):
     user = models.ForeignKey(User, on_delete=models.PROTECT, related_name='goals')
     status = models.PositiveSmallIntegerField(choices=Status.choices, default=Status.to_do)
     priority = models.PositiveSmallIntegerField(choices=Priority.choices, default=Priority.medium)
+    # Maintained by the goals_goal_search_vector trigger (migration 0003).
+    search_vector = SearchVectorField(null=True, editable=False)
+    # Maintained by the goals_goalcomment_activity trigger (migration 0006).
+    comment_count = models.PositiveIntegerField(verbose_name="Комментарии", default=0, editable=False)
+    last_activity_at = models.DateTimeField(
+        verbose_name="Последняя активность", default=timezone.now, null=True, editable=False
+    )
+
+    # Never written back by save(): a full save would overwrite them with
+    # whatever was loaded and lose concurrent trigger updates.
+    trigger_fields = ('search_vector', 'comment_count', 'last_activity_at')
 
     class Meta:
         verbose_name = "Цель"
         verbose_name_plural = "Цели"
+        # Partial indexes skip archived goals (status=4, Goal.Status.archived),
+        # which every list and detail view excludes anyway.
+        indexes = [
+            models.Index(
+                fields=['user', 'title', 'id'],
+                include=['category'],
+                condition=~models.Q(status=4),
+                name='goal_user_title_active_idx',
+            ),
+            models.Index(
+                fields=['user', '-created', '-id'],
+                include=['category'],
+                condition=~models.Q(status=4),
+                name='goal_user_created_active_idx',
+            ),
+            models.Index(
+                fields=['user', 'due_date'],
+                include=['category'],
+                condition=~models.Q(status=4),
+                name='goal_user_due_active_idx',
+            ),
+            # Archived goals in the order todolist.goals.retention purges them.
+            models.Index(fields=['updated', 'id'], condition=models.Q(status=4), name='goal_archived_idx'),
+            # The pages of todolist.goals.sync.
+            models.Index(fields=['user', 'updated', 'id'], name='goal_user_updated_idx'),
+            GinIndex(fields=['search_vector'], name='goal_search_vector_idx'),
+            GinIndex(fields=['title'], opclasses=['gin_trgm_ops'], name='goal_title_trgm_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs) -> None:
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.trigger_fields
+            ]
+        super().save(*args, **kwargs)
+
 
 class GoalComment(BaseModel):
     class Meta:
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = [
+            models.Index(fields=['user', '-created', '-id'], name='comment_user_created_idx'),
+            models.Index(fields=['goal', '-created', '-id'], name='comment_goal_created_idx'),
+            models.Index(fields=['user', 'updated', 'id'], name='comment_user_updated_idx'),
+        ]
 
     user = models.ForeignKey(User, on_delete=CASCADE, related_name='comments')
     goal = models.ForeignKey(Goal, on_delete=CASCADE, related_name='comments')
     text = models.TextField(verbose_name='Текст', max_length=1000)
 
     def __str__(self) -> str:
-        return self.text
\ No newline at end of file
+        return self.text
+
+
+class Tombstone(models.Model):
+    class Kind(models.TextChoices):
+        category = 'category', 'Категория'
+        goal = 'goal', 'Цель'
+        comment = 'comment', 'Комментарий'
+
+    user = models.ForeignKey(User, on_delete=CASCADE, related_name='+')
+    kind = models.CharField(max_length=16, choices=Kind.choices)
+    object_id = models.BigIntegerField()
+    deleted = models.DateTimeField(verbose_name="Дата удаления", auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Удалённый объект'
+        verbose_name_plural = 'Удалённые объекты'
+        indexes = [
+            models.Index(fields=['user', 'deleted'], name='tombstone_user_deleted_idx'),
+            # Expired tombstones in the order todolist.goals.retention deletes them.
+            models.Index(fields=['deleted', 'id'], name='tombstone_deleted_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.kind} {self.object_id}'
+
+
+class Archive(models.Model):
+    """
+    A purged archived goal with its comments, or a purged deleted category
+    with its goals and their comments, as zlib-compressed JSON; see
+    todolist.goals.retention.
+    """
+    class Kind(models.TextChoices):
+        category = 'category', 'Категория'
+        goal = 'goal', 'Цель'
+
+    user = models.ForeignKey(User, on_delete=CASCADE, related_name='+')
+    kind = models.CharField(max_length=16, choices=Kind.choices)
+    object_id = models.BigIntegerField()
+    title = models.CharField(verbose_name="Название", max_length=255)
+    archived = models.DateTimeField(verbose_name="Дата архивации")
+    purged = models.DateTimeField(verbose_name="Дата переноса в архив", auto_now_add=True)
+    data = models.BinaryField()
+
+    class Meta:
+        verbose_name = 'Архивная запись'
+        verbose_name_plural = 'Архивные записи'
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='archive_kind_object_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-purged', '-id'], name='archive_user_purged_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.kind} {self.object_id}'
+
+
+class GoalCounter(models.Model):
+    """Number of a user's goals per category, status and priority, kept by the goals_goal_counters trigger."""
+    user = models.ForeignKey(User, on_delete=CASCADE, related_name='+')
+    category = models.ForeignKey(GoalCategory, on_delete=CASCADE, related_name='+')
+    status = models.PositiveSmallIntegerField(choices=Goal.Status.choices)
+    priority = models.PositiveSmallIntegerField(choices=Goal.Priority.choices)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Счётчик целей'
+        verbose_name_plural = 'Счётчики целей'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'category', 'status', 'priority'], name='goal_counter_unique'),
+        ]
+
+
+class GoalDueCounter(models.Model):
+    """Number of a user's open (to do / in progress) goals per category and due date, kept by the same trigger."""
+    user = models.ForeignKey(User, on_delete=CASCADE, related_name='+')
+    category = models.ForeignKey(GoalCategory, on_delete=CASCADE, related_name='+')
+    due_date = models.DateField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Счётчик сроков целей'
+        verbose_name_plural = 'Счётчики сроков целей'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'category', 'due_date'], name='goal_due_counter_unique'),
+        ]
@@ -0,0 +1,316 @@
+import hashlib
+import json
+from base64 import b64decode, b64encode
+from collections import OrderedDict
+from typing import Any, Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Count, F, Field, Q, QuerySet, Window
+from django.db.models.functions import RowNumber
+from django.urls import reverse
+from rest_framework.exceptions import NotFound
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from todolist.goals.cache import COUNT_KEY, get_cache, get_version
+from todolist.goals.filters import FullTextSearchFilter
+from todolist.goals.models import Goal
+from todolist.paginator import count_or_estimate
+
+
+class KeysetPagination(LimitOffsetPagination):
+    """
+    LimitOffsetPagination with an opt-in keyset mode.
+
+    The ``count`` of large lists is the planner estimate, flagged by
+    ``count_is_estimate``; see ``get_count``.
+
+    Passing ``?cursor=`` switches the view to keyset pagination: the page is
+    fetched with ``WHERE (ordering, id) > (last row)`` instead of OFFSET and no
+    COUNT(*) is issued, so every page costs the same regardless of depth.
+    """
+    cursor_query_param = 'cursor'
+    cursor_default_limit = 50
+    cursor_max_limit = 1000
+    invalid_cursor_message = 'Invalid cursor'
+    count_is_estimate = False
+
+    def paginate_queryset(self, queryset: QuerySet, request: Request, view: Any = None) -> Optional[list]:
+        self.use_cursor = self.cursor_query_param in request.query_params
+        if self.use_cursor:
+            return self.get_keyset_page(list(self.get_keyset_queryset(queryset, request, view)))
+
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+        self.request = request
+        self.offset = self.get_offset(request)
+        self.count = self.get_count(queryset)
+        page = self.get_offset_queryset(queryset)
+        return self.get_offset_page([] if page is None else list(page))
+
+    async def apaginate_queryset(self, queryset: QuerySet, request: Request, view: Any = None) -> Optional[list]:
+        """Same as paginate_queryset, but evaluates the queryset with the async ORM."""
+        self.use_cursor = self.cursor_query_param in request.query_params
+        if self.use_cursor:
+            queryset = self.get_keyset_queryset(queryset, request, view)
+            return self.get_keyset_page([obj async for obj in queryset])
+
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+        self.request = request
+        self.offset = self.get_offset(request)
+        self.count = await sync_to_async(self.get_count)(queryset)
+        page = self.get_offset_queryset(queryset)
+        return self.get_offset_page([] if page is None else [obj async for obj in page])
+
+    def get_count(self, queryset: QuerySet) -> int:
+        """
+        Exact count up to EXACT_COUNT_THRESHOLD rows, the planner estimate
+        above it. Either is cached until the user's next write, so the pages
+        of one list share a single count whatever their offset and ordering.
+        """
+        key = None
+        user_id = self.request.user.id
+        if user_id is not None:
+            digest = hashlib.md5(repr(queryset.order_by().query.sql_with_params()).encode()).hexdigest()
+            key = COUNT_KEY.format(user_id=user_id, version=get_version(user_id), digest=digest)
+            cached = get_cache().get(key)
+            if cached is not None:
+                count, self.count_is_estimate = cached
+                return count
+
+        count, self.count_is_estimate = count_or_estimate(queryset)
+        if key is not None:
+            get_cache().set(key, (count, self.count_is_estimate), timeout=settings.GOALS_CACHE_TIMEOUT)
+        return count
+
+    def get_offset_queryset(self, queryset: QuerySet) -> Optional[QuerySet]:
+        if self.count > self.limit and self.template is not None:
+            self.display_page_controls = True
+        if self.count_is_estimate:
+            # An estimate cannot tell whether there is a next page; one extra row can.
+            return queryset[self.offset:self.offset + self.limit + 1]
+        if self.count == 0 or self.offset > self.count:
+            return None
+        return queryset[self.offset:self.offset + self.limit]
+
+    def get_offset_page(self, results: list) -> list:
+        if self.count_is_estimate:
+            if len(results) > self.limit:
+                # The next link is shown while offset + limit < count.
+                self.count = max(self.count, self.offset + self.limit + 1)
+            elif results or not self.offset:
+                # This is the last page, so the exact count is known.
+                self.count, self.count_is_estimate = self.offset + len(results), False
+        return results[:self.limit]
+
+    def get_keyset_queryset(self, queryset: QuerySet, request: Request, view: Any) -> QuerySet:
+        self.request = request
+        self.limit = min(self.get_limit(request) or self.cursor_default_limit, self.cursor_max_limit)
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        queryset = queryset.order_by(*self.get_order_by())
+        position = self.decode_cursor(request, queryset)
+        if position is not None:
+            queryset = queryset.filter(self.get_position_filter(queryset, position))
+        # One extra row tells whether there is a next page.
+        return queryset[:self.limit + 1]
+
+    def get_keyset_page(self, results: list) -> list:
+        self.has_next = len(results) > self.limit
+        results = results[:self.limit]
+        self.next_position = self.get_position(results[-1]) if self.has_next else None
+        return results
+
+    def get_paginated_response(self, data: list) -> Response:
+        if not self.use_cursor:
+            return Response(OrderedDict([
+                ('count', self.count),
+                ('count_is_estimate', self.count_is_estimate),
+                ('next', self.get_next_link()),
+                ('previous', self.get_previous_link()),
+                ('results', data),
+            ]))
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data),
+        ]))
+
+    def get_next_link(self) -> Optional[str]:
+        if not self.use_cursor:
+            return super().get_next_link()
+        if self.next_position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.limit_query_param, self.limit)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def get_ordering(self, request: Request, queryset: QuerySet, view: Any) -> list[str]:
+        ordering = []
+        for backend in getattr(view, 'filter_backends', []):
+            if issubclass(backend, OrderingFilter):
+                ordering = list(backend().get_ordering(request, queryset, view) or [])
+                break
+
+        # Search results are ranked ahead of the default ordering, so the rank is part of the position too.
+        rank = f'-{FullTextSearchFilter.rank_annotation}'
+        if queryset.query.order_by[:1] == (rank,):
+            ordering.insert(0, rank)
+
+        # The primary key breaks ties so the position of every row is unique.
+        if not any(field.lstrip('-') in ('id', 'pk') for field in ordering):
+            descending = bool(ordering) and ordering[-1].startswith('-')
+            ordering.append('-id' if descending else 'id')
+        return ordering
+
+    def get_position(self, instance: Any) -> list:
+        position = []
+        for field in self.ordering:
+            name = field.lstrip('-')
+            value = instance[name] if isinstance(instance, dict) else getattr(instance, name)
+            position.append(value if value is None or isinstance(value, (int, float, str)) else str(value))
+        return position
+
+    def get_position_filter(self, queryset: QuerySet, position: list) -> Q:
+        # Lexicographic "row comes after position" expressed as
+        # (a > x) OR (a = x AND b > y) OR (a = x AND b = y AND id > z),
+        # with NULLs after every value as Postgres sorts them: last going up,
+        # first going down (see get_order_by).
+        condition = Q()
+        equal = Q()
+        for field, value in zip(self.ordering, position):
+            name = field.lstrip('-')
+            descending = field.startswith('-')
+            if value is None:
+                after = Q(**{f'{name}__isnull': False}) if descending else None
+                same = Q(**{f'{name}__isnull': True})
+            else:
+                after = Q(**{f'{name}__{"lt" if descending else "gt"}': value})
+                if not descending and self.is_nullable(queryset, name):
+                    after |= Q(**{f'{name}__isnull': True})
+                same = Q(**{name: value})
+            if after is not None:
+                condition |= equal & after
+            equal &= same
+        return condition
+
+    def get_field(self, queryset: QuerySet, name: str) -> Field:
+        if name == 'pk':
+            return queryset.model._meta.pk
+        try:
+            return queryset.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return queryset.query.annotations[name].output_field
+
+    def is_nullable(self, queryset: QuerySet, name: str) -> bool:
+        try:
+            return queryset.model._meta.get_field(name).null
+        except FieldDoesNotExist:
+            return name in queryset.query.annotations
+
+    def get_order_by(self) -> list:
+        return [
+            F(field[1:]).desc(nulls_first=True) if field.startswith('-') else F(field).asc(nulls_last=True)
+            for field in self.ordering
+        ]
+
+    def encode_cursor(self, position: list) -> str:
+        return b64encode(json.dumps(position).encode()).decode()
+
+    def decode_cursor(self, request: Request, queryset: QuerySet) -> Optional[list]:
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            position = json.loads(b64decode(encoded.encode(), validate=True).decode())
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        # Every value is checked against its field, so a tampered cursor is a 404, not an ORM error.
+        try:
+            return [
+                None if value is None else self.get_field(queryset, field.lstrip('-')).to_python(value)
+                for field, value in zip(self.ordering, position)
+            ]
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+
+class BoardPagination(KeysetPagination):
+    """
+    Groups the goals into one column per open status, or per category and
+    status with ``?group_by=category``, each holding its first ``limit``
+    goals and the total ``count``. All columns come from a single
+    ``ROW_NUMBER() OVER (PARTITION BY status ...)`` query. The ``next`` link
+    of a column continues it through the goal list's cursor mode.
+    """
+    default_limit = 20
+    max_limit = 100
+    group_by_query_param = 'group_by'
+    statuses = (Goal.Status.to_do, Goal.Status.in_progress, Goal.Status.done)
+
+    def paginate_queryset(self, queryset: QuerySet, request: Request, view: Any = None) -> Optional[list]:
+        self.request = request
+        self.limit = self.get_limit(request)
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.by_category = request.query_params.get(self.group_by_query_param) == 'category'
+        partition = [F('status'), F('category')] if self.by_category else [F('status')]
+
+        queryset = queryset.order_by().select_related(None).defer('search_vector').annotate(
+            board_row=Window(RowNumber(), partition_by=partition, order_by=self.get_order_by()),
+            board_count=Window(Count('id'), partition_by=partition),
+        )
+        sql, params = queryset.query.sql_with_params()
+        columns = 'category_id, status' if self.by_category else 'status'
+        # Window functions cannot be filtered on in the same SELECT; one extra row per column tells if it goes on.
+        self.rows = list(queryset.model.objects.raw(
+            f'SELECT * FROM ({sql}) board WHERE board_row <= %s ORDER BY {columns}, board_row',
+            [*params, self.limit + 1],
+        ))
+        return [row for row in self.rows if row.board_row <= self.limit]
+
+    def get_paginated_response(self, data: list) -> Response:
+        columns = OrderedDict()
+        if not self.by_category:
+            for status in self.statuses:
+                columns[status, None] = self.get_column(status, None)
+        for row in self.rows:
+            if (row.status, self.get_category(row)) not in columns:
+                for status in self.statuses:
+                    columns[status, row.category_id] = self.get_column(status, row.category_id)
+
+        page = iter(data)
+        for row in self.rows:
+            column = columns[row.status, self.get_category(row)]
+            column['count'] = row.board_count
+            if row.board_row <= self.limit:
+                column['results'].append(next(page))
+                last = row
+            else:
+                column['next'] = self.get_column_link(column, self.get_position(last))
+        return Response(OrderedDict([('columns', list(columns.values()))]))
+
+    def get_category(self, row: Goal) -> Optional[int]:
+        return row.category_id if self.by_category else None
+
+    def get_column(self, status: int, category: Optional[int]) -> dict:
+        return OrderedDict([('status', status), ('category', category), ('count', 0), ('next', None), ('results', [])])
+
+    def get_column_link(self, column: dict, position: list) -> str:
+        url = self.request.build_absolute_uri(reverse('todolist.goals:goal-list'))
+        for key, values in self.request.query_params.lists():
+            if key != self.group_by_query_param:
+                url = replace_query_param(url, key, values[-1])
+        url = replace_query_param(url, 'status', column['status'])
+        if column['category'] is not None:
+            url = replace_query_param(url, 'category', column['category'])
+        url = replace_query_param(url, self.limit_query_param, self.limit)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(position))
@@ -0,0 +1,206 @@
+import json
+import zlib
+from collections import defaultdict
+from datetime import datetime
+from typing import Iterator, Optional
+
+from django.db import transaction
+from django.db.models import Model, Q, QuerySet
+from django.utils import timezone
+
+from todolist.goals.cache import invalidate_on_commit
+from todolist.goals.models import Archive, Goal, GoalCategory, GoalComment, Tombstone
+
+# Rebuilt by the search_vector triggers when the rows are restored.
+SKIPPED_FIELDS = ('search_vector',)
+
+
+class RestoreError(Exception):
+    pass
+
+
+def get_fields(model: type[Model]) -> list:
+    return [field for field in model._meta.concrete_fields if field.name not in SKIPPED_FIELDS]
+
+
+def get_rows(queryset: QuerySet) -> list[dict]:
+    return list(queryset.values(*(field.attname for field in get_fields(queryset.model))))
+
+
+def encode(data: dict) -> bytes:
+    # isoformat() keeps the microseconds and the offset, so restored rows are the rows that were purged.
+    return zlib.compress(json.dumps(data, default=lambda value: value.isoformat(), ensure_ascii=False).encode())
+
+
+def decode(data: bytes) -> dict:
+    return json.loads(zlib.decompress(data))
+
+
+def get_batch(queryset: QuerySet, position: Optional[tuple], batch_size: int) -> list[dict]:
+    """
+    The next ``batch_size`` rows of ``queryset`` after ``position`` in
+    (updated, id) order, locked. Rows locked by a running request are
+    skipped and left for the next run.
+    """
+    if position is not None:
+        updated, pk = position
+        queryset = queryset.filter(Q(updated__gt=updated) | Q(updated=updated, id__gt=pk))
+    queryset = queryset.select_for_update(skip_locked=True, of=('self',)).order_by('updated', 'id')
+    return get_rows(queryset[:batch_size])
+
+
+def bundle_goals(goals: list[dict]) -> list[dict]:
+    comments = defaultdict(list)
+    for comment in get_rows(GoalComment.objects.filter(goal_id__in=[goal['id'] for goal in goals]).order_by('id')):
+        comments[comment['goal_id']].append(comment)
+    return [{'goal': goal, 'comments': comments[goal['id']]} for goal in goals]
+
+
+def save_archives(kind: str, bundles: list[tuple[dict, dict]], removed: dict[str, list[dict]]) -> None:
+    """
+    Archives every (row, data) of ``bundles``; the tombstones of ``removed``
+    tell syncing clients, and the cached lists of their users are dropped.
+    """
+    Archive.objects.bulk_create(
+        Archive(
+            user_id=row['user_id'], kind=kind, object_id=row['id'], title=row['title'], archived=row['updated'],
+            data=encode(data),
+        )
+        for row, data in bundles
+    )
+    Tombstone.objects.bulk_create(
+        Tombstone(user_id=row['user_id'], kind=tombstone_kind, object_id=row['id'])
+        for tombstone_kind, rows in removed.items() for row in rows
+    )
+    for user_id in {row['user_id'] for row, data in bundles}:
+        invalidate_on_commit(user_id)
+
+
+def delete_goals(ids: list[int]) -> None:
+    # The comments go first, so the comment trigger updates each goal once
+    # per comment just before the goal is deleted too; a batch can afford it.
+    Goal.objects.filter(id__in=ids).delete()
+
+
+def purge_goals(cutoff: datetime, batch_size: int) -> Iterator[int]:
+    """
+    Moves the goals archived before ``cutoff``, with their comments, to
+    Archive, ``batch_size`` goals per transaction, and yields the size of
+    every batch. Goals of deleted categories go with their category.
+    """
+    queryset = Goal.objects.filter(status=Goal.Status.archived, updated__lt=cutoff, category__is_deleted=False)
+    position = None
+    while True:
+        with transaction.atomic():
+            goals = get_batch(queryset, position, batch_size)
+            if not goals:
+                return
+            save_archives(
+                Archive.Kind.goal, [(bundle['goal'], bundle) for bundle in bundle_goals(goals)],
+                {Tombstone.Kind.goal: goals},
+            )
+            delete_goals([goal['id'] for goal in goals])
+        yield len(goals)
+        if len(goals) < batch_size:
+            return
+        position = goals[-1]['updated'], goals[-1]['id']
+
+
+def purge_categories(cutoff: datetime, batch_size: int) -> Iterator[int]:
+    """
+    Moves the categories deleted before ``cutoff``, with all their goals and
+    comments, to Archive, ``batch_size`` categories per transaction, and
+    yields the size of every batch.
+    """
+    queryset = GoalCategory.objects.filter(is_deleted=True, updated__lt=cutoff)
+    position = None
+    while True:
+        with transaction.atomic():
+            categories = get_batch(queryset, position, batch_size)
+            if not categories:
+                return
+            ids = [category['id'] for category in categories]
+            goals = get_rows(Goal.objects.select_for_update().filter(category_id__in=ids).order_by('id'))
+            goals_by_category = defaultdict(list)
+            for bundle in bundle_goals(goals):
+                goals_by_category[bundle['goal']['category_id']].append(bundle)
+            bundles = [
+                (category, {'category': category, 'goals': goals_by_category[category['id']]})
+                for category in categories
+            ]
+            save_archives(
+                Archive.Kind.category, bundles,
+                {Tombstone.Kind.category: categories, Tombstone.Kind.goal: goals},
+            )
+            delete_goals([goal['id'] for goal in goals])
+            GoalCategory.objects.filter(id__in=ids).delete()
+        yield len(categories)
+        if len(categories) < batch_size:
+            return
+        position = categories[-1]['updated'], categories[-1]['id']
+
+
+def purge_tombstones(cutoff: datetime, batch_size: int) -> Iterator[int]:
+    """
+    Deletes the tombstones older than ``cutoff``, ``batch_size`` per
+    statement, and yields the size of every batch. Clients that last synced
+    before ``cutoff`` get a full snapshot instead; see todolist.goals.sync.
+    """
+    while True:
+        tombstones = Tombstone.objects.filter(deleted__lt=cutoff).order_by('deleted', 'id')
+        ids = list(tombstones.values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return
+        Tombstone.objects.filter(id__in=ids).delete()
+        yield len(ids)
+        if len(ids) < batch_size:
+            return
+
+
+def insert(model: type[Model], rows: list[dict], batch_size: int = 1000) -> list[Model]:
+    fields = get_fields(model)
+    objs = [
+        model(**{field.attname: field.to_python(row[field.attname]) for field in fields if field.attname in row})
+        for row in rows
+    ]
+    dates = [(obj.created, obj.updated) for obj in objs]
+    model.objects.bulk_create(objs, batch_size=batch_size)
+    # bulk_create() stamps created and updated with now (auto_now(_add)); bulk_update() puts the saved ones back.
+    for obj, (created, updated) in zip(objs, dates):
+        obj.created, obj.updated = created, updated
+    model.objects.bulk_update(objs, ['created', 'updated'], batch_size=batch_size)
+    return objs
+
+
+def restore(archive: Archive, status: int = Goal.Status.to_do) -> dict[str, int]:
+    """
+    Puts the rows of ``archive`` back as they were purged, but no longer
+    archived: a goal, or a category with its goals, and their comments.
+    Archiving overwrote the goals' status, so they come back with ``status``
+    and the category undeleted. ``updated`` is set to now, as by any edit,
+    so syncing clients get them again. A goal needs its category, which must
+    not have been purged too.
+    """
+    data = decode(archive.data)
+    now = timezone.now()
+    if archive.kind == Archive.Kind.category:
+        categories, goals = [{**data['category'], 'updated': now, 'is_deleted': False}], data['goals']
+    else:
+        categories, goals = [], [data]
+        category_id = data['goal']['category_id']
+        if not GoalCategory.objects.filter(id=category_id).exists():
+            raise RestoreError(f'Category {category_id} of the goal is archived too, restore it first')
+    comments = [comment for goal in goals for comment in goal['comments']]
+
+    with transaction.atomic():
+        insert(GoalCategory, categories)
+        # The comment trigger counts the comments again as they are inserted.
+        restored = insert(
+            Goal, [{**goal['goal'], 'updated': now, 'status': status, 'comment_count': 0} for goal in goals],
+        )
+        insert(GoalComment, comments)
+        # The trigger took last_activity_at to the comments' insert time, not their saved one.
+        Goal.objects.bulk_update(restored, ['last_activity_at'])
+        archive.delete()
+        invalidate_on_commit(archive.user_id)
+    return {'categories': len(categories), 'goals': len(goals), 'comments': len(comments)}
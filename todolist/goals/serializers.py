@@ -1,8 +1,11 @@
+from datetime import timedelta
+
+from django.conf import settings
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError, PermissionDenied
 
 from core.serializers import ProfileSerializer
-from todolist.goals.models import GoalCategory
+from todolist.goals.models import Archive, GoalCategory
 from todolist.goals.models import GoalComment
 
 from todolist.goals.models import Goal
@@ -14,7 +17,7 @@ class GoalCategoryCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = GoalCategory
         read_only_fields = ('id', 'created', 'updated', 'user', 'is_deleted')
-        fields = '__all__'
+        exclude = ('search_vector',)
 
 
 class GoalCategorySerializer(serializers.ModelSerializer):
@@ -23,7 +26,7 @@ class GoalCategorySerializer(serializers.ModelSerializer):
     class Meta:
         model = GoalCategory
         read_only_fields = ('id', 'created', 'updated', 'user', 'is_deleted')
-        fields = '__all__'
+        exclude = ('search_vector',)
 
 
 class GoalCreateSerializer(serializers.ModelSerializer):
@@ -32,7 +35,7 @@ class GoalCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Goal
         read_only_fields = ('id', 'created', 'updated', 'user')
-        fields = '__all__'
+        exclude = ('search_vector',)
 
     def validate_category(self, value: GoalCategory):
         if value.is_deleted:
@@ -48,7 +51,7 @@ class GoalSerializer(serializers.ModelSerializer):
     class Meta:
         model = Goal
         read_only_fields = ('id', 'created', 'updated', 'user')
-        fields = '__all__'
+        exclude = ('search_vector',)
 
     def validate_category(self, value: GoalCategory):
         if value.is_deleted:
@@ -88,3 +91,92 @@ class GoalCommentSerializer(serializers.ModelSerializer):
         if self.context['request'].user.id != value.user_id:
             raise PermissionDenied
         return value
+
+
+class PrefetchedRelatedField(serializers.PrimaryKeyRelatedField):
+    """Resolves objects from ``context[context_key]`` so a whole batch costs one query."""
+
+    def __init__(self, context_key: str, **kwargs):
+        self.context_key = context_key
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        try:
+            pk = int(data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        obj = self.context[self.context_key].get(pk)
+        if obj is None:
+            self.fail('does_not_exist', pk_value=data)
+        return obj
+
+
+class GoalBulkSerializer(GoalCreateSerializer):
+    category = PrefetchedRelatedField('categories', queryset=GoalCategory.objects.all())
+
+    def validate_category(self, value: GoalCategory):
+        # A foreign category fails only its own item, not the whole batch.
+        try:
+            return super().validate_category(value)
+        except PermissionDenied as e:
+            raise ValidationError(e.detail)
+
+
+class GoalCommentBulkSerializer(GoalCommentCreateSerializer):
+    goal = PrefetchedRelatedField('goals', queryset=Goal.objects.all())
+
+    def validate_goal(self, value: Goal):
+        try:
+            return super().validate_goal(value)
+        except PermissionDenied as e:
+            raise ValidationError(e.detail)
+
+
+class GoalImportSerializer(GoalBulkSerializer):
+    """Goals of an export, where deleted categories come with their goals."""
+
+    def validate_category(self, value: GoalCategory):
+        if self.context['request'].user.id != value.user_id:
+            raise ValidationError('Category not found')
+        return value
+
+
+class GoalCommentImportSerializer(GoalCommentBulkSerializer):
+    """Comments of an export, where archived goals come with their comments."""
+
+    def validate_goal(self, value: Goal):
+        if self.context['request'].user.id != value.user_id:
+            raise ValidationError('Goal not found')
+        return value
+
+
+class GoalCalendarQuerySerializer(serializers.Serializer):
+    start = serializers.DateField()
+    end = serializers.DateField()
+    bucket = serializers.ChoiceField(choices=('day', 'week'), default='day')
+    limit = serializers.IntegerField(min_value=0, max_value=20, default=3)
+
+    def validate(self, attrs: dict) -> dict:
+        start, end = attrs['start'], attrs['end']
+        if end < start:
+            raise ValidationError({'end': 'Must not be before start'})
+        if attrs['bucket'] == 'week':
+            buckets = ((end - timedelta(days=end.weekday())) - (start - timedelta(days=start.weekday()))).days // 7 + 1
+        else:
+            buckets = (end - start).days + 1
+        if buckets > settings.GOALS_CALENDAR_MAX_BUCKETS:
+            raise ValidationError(f'No more than {settings.GOALS_CALENDAR_MAX_BUCKETS} {attrs["bucket"]}s per request')
+        return attrs
+
+
+class ArchiveRestoreSerializer(serializers.Serializer):
+    status = serializers.ChoiceField(
+        choices=[choice for choice in Goal.Status.choices if choice[0] != Goal.Status.archived],
+        default=Goal.Status.to_do,
+    )
+
+
+class ArchiveSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Archive
+        fields = ('id', 'kind', 'object_id', 'title', 'archived', 'purged')
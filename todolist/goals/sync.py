@@ -0,0 +1,138 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime, timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.db.models import BooleanField, ExpressionWrapper, F, Q, QuerySet
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+
+from core.models import User
+from todolist.goals.models import Goal, GoalCategory, GoalComment, Tombstone
+from todolist.goals.serializers import GoalCategoryCreateSerializer, GoalCommentCreateSerializer, GoalCreateSerializer
+
+TOMBSTONE_KEYS = {
+    Tombstone.Kind.category: 'categories',
+    Tombstone.Kind.goal: 'goals',
+    Tombstone.Kind.comment: 'comments',
+}
+PAGED_KEYS = ('categories', 'goals', 'comments', 'tombstones')
+REMOVED_GOALS = Q(status=Goal.Status.archived) | Q(category__is_deleted=True)
+
+
+def encode_cursor(position: dict) -> str:
+    return urlsafe_b64encode(json.dumps(position, default=lambda value: value.isoformat()).encode()).decode()
+
+
+def parse_timestamp(value: str) -> datetime:
+    timestamp = parse_datetime(value)
+    if timestamp is None or timezone.is_naive(timestamp):
+        raise ValueError(value)
+    return timestamp
+
+
+def decode_cursor(cursor: str) -> dict:
+    """The since, until and after keyword arguments of collect_changes stored in ``cursor``."""
+    try:
+        position = json.loads(urlsafe_b64decode(cursor.encode()))
+        since, until = (None if value is None else parse_timestamp(value) for value in (
+            position['since'], position.get('until')
+        ))
+        after = {
+            key: None if keyset is None else (parse_timestamp(keyset[0]), int(keyset[1]))
+            for key, keyset in position.get('after', {}).items() if key in PAGED_KEYS
+        }
+    except (TypeError, ValueError, KeyError, IndexError, AttributeError):
+        raise ValidationError({'cursor': 'Invalid cursor'})
+    if since is None and until is None:
+        raise ValidationError({'cursor': 'Invalid cursor'})
+    return {'since': since, 'until': until, 'after': after}
+
+
+def get_page(queryset: QuerySet, field: str, since: Optional[datetime], after: dict, key: str,
+             limit: int) -> tuple[list, Optional[tuple]]:
+    """
+    Up to ``limit`` rows of ``queryset`` changed after ``since`` past the
+    ``key`` keyset of ``after``, in (field, id) order, and the keyset to go
+    on from, or None once every row is read. A row changed while a client
+    pages moves past the keyset, so it still comes in a later page.
+    """
+    if key in after and after[key] is None:
+        return [], None
+    if since is not None:
+        queryset = queryset.filter(**{f'{field}__gt': since})
+    if after.get(key) is not None:
+        value, pk = after[key]
+        queryset = queryset.filter(Q(**{f'{field}__gt': value}) | Q(**{field: value, 'id__gt': pk}))
+    rows = list(queryset.order_by(field, 'id')[:limit + 1])
+    if len(rows) <= limit:
+        return rows, None
+    last = rows[limit - 1]
+    return rows[:limit], (getattr(last, field), last.id)
+
+
+def collect_changes(user: User, since: Optional[datetime] = None, until: Optional[datetime] = None,
+                    after: Optional[dict] = None) -> dict:
+    """
+    Everything of ``user`` that changed after ``since`` (everything live when
+    ``since`` is None), split into upserts and tombstones. Tombstones cover
+    deleted categories, archived goals (including goals of deleted
+    categories) and hard-deleted comments; clients drop the comments of a
+    removed goal themselves.
+
+    Every kind is read in (updated, id) pages of GOALS_SYNC_PAGE_SIZE rows.
+    While ``has_more`` is set, the cursor continues the same sync from
+    ``after``, the last row of every kind sent so far, and keeps the
+    ``until`` of its first page as the ``since`` of the next sync. A
+    ``since`` older than the tombstones kept (GOALS_TOMBSTONE_DAYS) starts
+    over with a full snapshot and sets ``reset``, so clients drop what they
+    have first.
+    """
+    now = timezone.now()
+    reset = since is not None and since < now - timedelta(days=settings.GOALS_TOMBSTONE_DAYS)
+    if reset:
+        since, until, after = None, None, None
+    if until is None:
+        # The next cursor lags behind "now" so rows of transactions that were
+        # still in flight while we read are picked up by the next sync; clients
+        # upsert by id, so seeing a row twice is harmless.
+        until = now - timedelta(seconds=settings.GOALS_SYNC_OVERLAP)
+    after = after or {}
+    limit = settings.GOALS_SYNC_PAGE_SIZE
+
+    querysets = {
+        'categories': GoalCategory.objects.filter(user=user).annotate(removed=F('is_deleted')),
+        'goals': Goal.objects.filter(user=user).annotate(
+            removed=ExpressionWrapper(REMOVED_GOALS, output_field=BooleanField())
+        ),
+        'comments': GoalComment.objects.filter(user=user).exclude(goal__status=Goal.Status.archived),
+    }
+    serializers = {
+        'categories': GoalCategoryCreateSerializer,
+        'goals': GoalCreateSerializer,
+        'comments': GoalCommentCreateSerializer,
+    }
+    changes = {'cursor': None, 'has_more': False, 'reset': reset, 'deleted': {key: [] for key in querysets}}
+    next_after = {'tombstones': None}
+    for key, queryset in querysets.items():
+        if since is None and key != 'comments':
+            queryset = queryset.filter(removed=False)
+        rows, next_after[key] = get_page(queryset, 'updated', since, after, key, limit)
+        changes[key] = serializers[key]([row for row in rows if not getattr(row, 'removed', False)], many=True).data
+        changes['deleted'][key] = [row.id for row in rows if getattr(row, 'removed', False)]
+
+    if since is not None:
+        tombstones, next_after['tombstones'] = get_page(
+            Tombstone.objects.filter(user=user), 'deleted', since, after, 'tombstones', limit
+        )
+        for tombstone in tombstones:
+            changes['deleted'][TOMBSTONE_KEYS[tombstone.kind]].append(tombstone.object_id)
+
+    changes['has_more'] = any(keyset is not None for keyset in next_after.values())
+    if changes['has_more']:
+        changes['cursor'] = encode_cursor({'since': since, 'until': until, 'after': next_after})
+    else:
+        changes['cursor'] = encode_cursor({'since': until})
+    return changes
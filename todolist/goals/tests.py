@@ -0,0 +1,888 @@
+import json
+from base64 import b64encode
+from datetime import timedelta
+from typing import Any
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db.models import Count, F
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.test import APITestCase, APITransactionTestCase
+
+from core.models import User
+from todolist.goals.counters import get_stats, rebuild_counters
+from todolist.goals.events import EventStream
+from todolist.goals.export import iter_records
+from todolist.goals.models import Archive, Goal, GoalCategory, GoalComment, GoalCounter, GoalDueCounter, Tombstone
+from todolist.goals.retention import purge_categories, purge_goals, purge_tombstones
+from todolist.goals.sync import decode_cursor, encode_cursor
+from todolist.metrics import QueryBudgetExceeded
+
+
+class GoalsAPITestMixin:
+    def setUp(self) -> None:
+        caches[settings.GOALS_CACHE_ALIAS].clear()
+        self.user = User.objects.create_user(username='owner', password='Str0ng-passw0rd')
+        self.client.force_login(self.user)
+        self.category = GoalCategory.objects.create(user=self.user, title='Работа')
+
+    def create_goals(self, count: int) -> list[Goal]:
+        return [Goal.objects.create(user=self.user, category=self.category, title=f'Цель {n}') for n in range(count)]
+
+    def create_comments(self, goal: Goal, count: int) -> list[GoalComment]:
+        return [GoalComment.objects.create(user=self.user, goal=goal, text=f'Комментарий {n}') for n in range(count)]
+
+
+class GoalsAPITestCase(GoalsAPITestMixin, APITestCase):
+    pass
+
+
+class QueryCountTests(GoalsAPITestCase):
+    """Every request runs the same few queries whatever the page size; the session and the user are two of them."""
+
+    def assert_page_queries(self, url: str, num: int, **params: str) -> None:
+        for limit in (2, 20):
+            caches[settings.GOALS_CACHE_ALIAS].clear()
+            with self.assertNumQueries(num):
+                response = self.client.get(url, {**params, 'limit': limit})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data['results']), limit)
+
+    def test_category_list(self) -> None:
+        for n in range(25):
+            GoalCategory.objects.create(user=self.user, title=f'Категория {n}')
+        # Session, user, count and page.
+        self.assert_page_queries(reverse('todolist.goals:category-list'), 4)
+
+    def test_goal_list(self) -> None:
+        self.create_goals(25)
+        self.assert_page_queries(reverse('todolist.goals:goal-list'), 4)
+
+    def test_goal_list_cursor(self) -> None:
+        self.create_goals(25)
+        self.assert_page_queries(reverse('todolist.goals:goal-list'), 3, cursor='')
+
+    def test_comment_list(self) -> None:
+        goals = self.create_goals(5)
+        for goal in goals:
+            self.create_comments(goal, 5)
+        self.assert_page_queries(reverse('todolist.goals:comment-list'), 4)
+
+    def test_category_detail(self) -> None:
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('todolist.goals:goal-category', args=[self.category.id]))
+        self.assertEqual(response.data['user']['username'], 'owner')
+
+    def test_goal_detail(self) -> None:
+        goal = self.create_goals(1)[0]
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('todolist.goals:goal', args=[goal.id]))
+        self.assertEqual(response.data['user']['username'], 'owner')
+
+    def test_comment_detail(self) -> None:
+        comment = self.create_comments(self.create_goals(1)[0], 1)[0]
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('todolist.goals:comment', args=[comment.id]))
+        self.assertEqual(response.data['user']['username'], 'owner')
+
+    def test_comment_detail_of_another_user(self) -> None:
+        comment = self.create_comments(self.create_goals(1)[0], 1)[0]
+        other = User.objects.create_user(username='other', password='Str0ng-passw0rd')
+        self.client.force_login(other)
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('todolist.goals:comment', args=[comment.id]))
+        self.assertEqual(response.status_code, 404)
+
+
+
+class ResponseCacheTests(GoalsAPITestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.goals = self.create_goals(3)
+        self.url = reverse('todolist.goals:goal-list')
+
+    def titles(self) -> list[str]:
+        return [goal['title'] for goal in self.client.get(self.url, {'limit': 10}).data['results']]
+
+    def test_hit(self) -> None:
+        first = self.client.get(self.url, {'limit': 2})
+        # Session and user only.
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, {'limit': 2})
+        self.assertEqual(response.data, first.data)
+        self.assertEqual(response['ETag'], first['ETag'])
+
+    def test_not_modified(self) -> None:
+        etag = self.client.get(self.url)['ETag']
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH='"other"').status_code, 200)
+
+    def test_invalidated_by_write(self) -> None:
+        etag = self.client.get(self.url, {'limit': 10})['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(reverse('todolist.goals:goal', args=[self.goals[0].id]), {'title': 'Новая'})
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(self.url, {'limit': 10}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Новая', [goal['title'] for goal in response.data['results']])
+
+    def test_invalidated_by_admin(self) -> None:
+        self.assertEqual(len(self.titles()), 3)
+        admin = User.objects.create_superuser(username='admin', password='Str0ng-passw0rd')
+        self.client.force_login(admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('admin:goals_goal_changelist'), {
+                'action': 'delete_selected', 'post': 'yes', '_selected_action': [self.goals[0].id],
+            })
+        self.assertEqual(response.status_code, 302)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('admin:goals_goal_change', args=[self.goals[1].id]), {
+                'title': 'Изменена в админке', 'category': self.category.id, 'user': self.user.id,
+                'status': Goal.Status.to_do, 'priority': Goal.Priority.medium,
+            })
+        self.assertEqual(response.status_code, 302)
+        self.client.force_login(self.user)
+        self.assertEqual(sorted(self.titles()), ['Изменена в админке', 'Цель 2'])
+
+
+class CursorPaginationTests(GoalsAPITestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        # Ties on every ordering field and NULL last activities, so the id tiebreak and the NULL handling are used.
+        self.goals = [
+            Goal.objects.create(user=self.user, category=self.category, title=f'Цель {n % 4}') for n in range(13)
+        ]
+        for n, goal in enumerate(self.goals):
+            Goal.objects.filter(id=goal.id).update(
+                created=self.goals[0].created + timedelta(hours=n % 3), comment_count=n % 2,
+                last_activity_at=None if n % 3 == 0 else self.goals[0].created + timedelta(minutes=n % 5),
+            )
+        self.url = reverse('todolist.goals:goal-list')
+
+    def page_through(self, **params: str) -> list[int]:
+        ids = []
+        response = self.client.get(self.url, {**params, 'cursor': '', 'limit': 3})
+        while True:
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.data['results']), 3)
+            ids += [row['id'] for row in response.data['results']]
+            if response.data['next'] is None:
+                return ids
+            response = self.client.get(response.data['next'])
+
+    def expected(self, field: str) -> list[int]:
+        # NULLs sort after every value: last going up, first going down.
+        if field.startswith('-'):
+            order_by = [F(field[1:]).desc(nulls_first=True), '-id']
+        else:
+            order_by = [F(field).asc(nulls_last=True), 'id']
+        return list(Goal.objects.filter(user=self.user).order_by(*order_by).values_list('id', flat=True))
+
+    def cursor(self, *position: object) -> str:
+        return b64encode(json.dumps(position).encode()).decode()
+
+    def test_default_ordering(self) -> None:
+        self.assertEqual(self.page_through(), self.expected('title'))
+
+    def test_orderings(self) -> None:
+        for field in ('title', 'created', 'comment_count', 'last_activity_at'):
+            for ordering in (field, f'-{field}'):
+                with self.subTest(ordering=ordering):
+                    self.assertEqual(self.page_through(ordering=ordering), self.expected(ordering))
+
+    def test_search_rank(self) -> None:
+        for n in range(7):
+            Goal.objects.create(
+                user=self.user, category=self.category, title=f'Отчёт {n}', description=' '.join(['отчёт'] * (n % 3)),
+            )
+        ranked = self.client.get(self.url, {'search': 'отчёт', 'limit': 100}).data['results']
+        self.assertEqual(len(ranked), 7)
+        self.assertEqual(self.page_through(search='отчёт'), [row['id'] for row in ranked])
+
+    def test_tampered_cursor(self) -> None:
+        cursors = [
+            ('title', 'not base64!'),
+            ('title', b64encode(b'not json').decode()),
+            ('title', self.cursor('Цель 1')),
+            ('title', self.cursor('Цель 1', {'a': 1})),
+            ('title', self.cursor('Цель 1', 'abc')),
+            ('created', self.cursor('garbage', 1)),
+            ('-comment_count', self.cursor([1], 1)),
+            ('last_activity_at', self.cursor({'a': 1}, 1)),
+        ]
+        for ordering, cursor in cursors:
+            with self.subTest(ordering=ordering, cursor=cursor):
+                response = self.client.get(self.url, {'ordering': ordering, 'cursor': cursor})
+                self.assertEqual(response.status_code, 404)
+        response = self.client.get(self.url, {'search': 'цель', 'cursor': self.cursor('high', 'Цель 1', 1)})
+        self.assertEqual(response.status_code, 404)
+
+class BoardTests(GoalsAPITestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.url = reverse('todolist.goals:goal-board')
+        self.other = GoalCategory.objects.create(user=self.user, title='Дом')
+        self.goals = {
+            Goal.Status.to_do: self.create_goals(5),
+            Goal.Status.in_progress: [
+                Goal.objects.create(
+                    user=self.user, category=category, title=f'В процессе {n}', status=Goal.Status.in_progress,
+                )
+                for n, category in enumerate((self.category, self.other, self.other))
+            ],
+        }
+        Goal.objects.create(user=self.user, category=self.category, title='В архиве', status=Goal.Status.archived)
+
+    def follow(self, url: str) -> list[int]:
+        ids = []
+        while url:
+            data = self.client.get(url).data
+            ids += [goal['id'] for goal in data['results']]
+            url = data['next']
+        return ids
+
+    def test_columns(self) -> None:
+        columns = self.client.get(self.url, {'limit': 2}).data['columns']
+        self.assertEqual([column['status'] for column in columns], [1, 2, 3])
+        self.assertEqual({column['category'] for column in columns}, {None})
+        self.assertEqual([column['count'] for column in columns], [5, 3, 0])
+        self.assertEqual(
+            [[goal['title'] for goal in column['results']] for column in columns],
+            [['Цель 0', 'Цель 1'], ['В процессе 0', 'В процессе 1'], []],
+        )
+        self.assertIsNone(columns[2]['next'])
+
+        for column in columns[:2]:
+            ids = [goal['id'] for goal in column['results']] + self.follow(column['next'])
+            self.assertEqual(ids, [goal.id for goal in self.goals[column['status']]])
+
+    def test_ordering(self) -> None:
+        column = self.client.get(self.url, {'limit': 2, 'ordering': '-created'}).data['columns'][0]
+        ids = [goal['id'] for goal in column['results']] + self.follow(column['next'])
+        self.assertEqual(ids, [goal.id for goal in reversed(self.goals[Goal.Status.to_do])])
+
+    def test_group_by_category(self) -> None:
+        columns = self.client.get(self.url, {'limit': 1, 'group_by': 'category'}).data['columns']
+        self.assertEqual(
+            [(column['category'], column['status'], column['count']) for column in columns],
+            [(self.category.id, 1, 5), (self.category.id, 2, 1), (self.category.id, 3, 0),
+             (self.other.id, 1, 0), (self.other.id, 2, 2), (self.other.id, 3, 0)],
+        )
+        self.assertEqual([len(column['results']) for column in columns], [1, 1, 0, 0, 1, 0])
+        self.assertEqual([column['next'] is not None for column in columns], [True, False, False, False, True, False])
+
+        column = columns[4]
+        ids = [goal['id'] for goal in column['results']] + self.follow(column['next'])
+        self.assertEqual(ids, [goal.id for goal in self.goals[Goal.Status.in_progress][1:]])
+
+
+class SyncTests(GoalsAPITestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.goals = self.create_goals(3)
+        self.comments = self.create_comments(self.goals[0], 2)
+        self.age(GoalCategory, Goal, GoalComment)
+
+    def age(self, *models: type, **delta: int) -> None:
+        """Moves the rows of ``models`` out of the sync overlap, an hour back unless ``delta`` says otherwise."""
+        for model in models:
+            model.objects.update(updated=timezone.now() - timedelta(**(delta or {'hours': 1})))
+
+    def sync(self, cursor: str = None, status: int = 200) -> dict:
+        response = self.client.get(reverse('todolist.goals:sync'), {'cursor': cursor} if cursor else {})
+        self.assertEqual(response.status_code, status, response.data)
+        return response.data
+
+    def ids(self, data: dict) -> dict:
+        return {key: sorted(row['id'] for row in data[key]) for key in ('categories', 'goals', 'comments')}
+
+    def test_snapshot(self) -> None:
+        deleted = GoalCategory.objects.create(user=self.user, title='Удалённая', is_deleted=True)
+        Goal.objects.create(user=self.user, category=deleted, title='Цель удалённой категории')
+        Goal.objects.filter(id=self.goals[2].id).update(status=Goal.Status.archived)
+        data = self.sync()
+        self.assertEqual(self.ids(data), {
+            'categories': [self.category.id],
+            'goals': [self.goals[0].id, self.goals[1].id],
+            'comments': [comment.id for comment in self.comments],
+        })
+        self.assertEqual(data['deleted'], {'categories': [], 'goals': [], 'comments': []})
+        self.assertFalse(data['has_more'])
+        self.assertFalse(data['reset'])
+
+    def test_upserts(self) -> None:
+        cursor = self.sync()['cursor']
+        self.assertEqual(self.ids(self.sync(cursor)), {'categories': [], 'goals': [], 'comments': []})
+
+        self.client.patch(reverse('todolist.goals:goal', args=[self.goals[1].id]), {'title': 'Новое название'})
+        url = reverse('todolist.goals:create-comment')
+        comment = self.client.post(url, {'text': 'Новый', 'goal': self.goals[1].id})
+        data = self.sync(cursor)
+        self.assertEqual(self.ids(data), {
+            'categories': [], 'goals': [self.goals[1].id], 'comments': [comment.data['id']],
+        })
+        self.assertEqual(data['goals'][0]['title'], 'Новое название')
+
+    def test_tombstones(self) -> None:
+        other = GoalCategory.objects.create(user=self.user, title='Дом')
+        goal = Goal.objects.create(user=self.user, category=other, title='Цель дома')
+        self.age(GoalCategory, Goal)
+        cursor = self.sync()['cursor']
+
+        self.client.delete(reverse('todolist.goals:comment', args=[self.comments[0].id]))
+        self.client.delete(reverse('todolist.goals:goal', args=[self.goals[1].id]))
+        self.client.delete(reverse('todolist.goals:goal-category', args=[other.id]))
+        data = self.sync(cursor)
+        # The comment trigger updated the count of the first goal.
+        self.assertEqual(self.ids(data), {'categories': [], 'goals': [self.goals[0].id], 'comments': []})
+        self.assertEqual({key: sorted(ids) for key, ids in data['deleted'].items()}, {
+            'categories': [other.id],
+            'goals': sorted([self.goals[1].id, goal.id]),
+            'comments': [self.comments[0].id],
+        })
+
+    def test_overlap(self) -> None:
+        before = timezone.now()
+        data = self.sync()
+        since = decode_cursor(data['cursor'])['since']
+        self.assertAlmostEqual(
+            since, before - timedelta(seconds=settings.GOALS_SYNC_OVERLAP), delta=timedelta(seconds=1)
+        )
+        # A row committed late, with an updated inside the overlap, comes with the next sync.
+        Goal.objects.filter(id=self.goals[1].id).update(updated=since + timedelta(microseconds=1))
+        self.assertEqual(self.ids(self.sync(data['cursor']))['goals'], [self.goals[1].id])
+
+    @override_settings(GOALS_SYNC_PAGE_SIZE=2)
+    def test_pages(self) -> None:
+        goals = self.create_goals(3)
+        self.age(Goal, minutes=30)
+        pages = []
+        cursor = None
+        while not pages or pages[-1]['has_more']:
+            pages.append(self.sync(cursor))
+            cursor = pages[-1]['cursor']
+        self.assertEqual(len(pages), 3)
+        self.assertEqual([len(page['goals']) for page in pages], [2, 2, 2])
+        self.assertEqual(
+            sorted(goal['id'] for page in pages for goal in page['goals']),
+            sorted(goal.id for goal in self.goals + goals),
+        )
+        self.assertEqual(sum(len(page['comments']) for page in pages), 2)
+        self.assertEqual(self.ids(self.sync(cursor)), {'categories': [], 'goals': [], 'comments': []})
+
+        for comment in self.comments:
+            self.client.delete(reverse('todolist.goals:comment', args=[comment.id]))
+        for goal in goals[:2]:
+            self.client.delete(reverse('todolist.goals:goal', args=[goal.id]))
+        first = self.sync(cursor)
+        self.assertTrue(first['has_more'])
+        second = self.sync(first['cursor'])
+        self.assertFalse(second['has_more'])
+        self.assertEqual([goal['id'] for goal in first['goals'] + second['goals']], [self.goals[0].id])
+        deleted = {key: first['deleted'][key] + second['deleted'][key] for key in first['deleted']}
+        self.assertEqual(sorted(deleted['comments']), [comment.id for comment in self.comments])
+        self.assertEqual(sorted(deleted['goals']), [goal.id for goal in goals[:2]])
+
+    def test_reset(self) -> None:
+        Tombstone.objects.create(user=self.user, kind=Tombstone.Kind.goal, object_id=0)
+        since = timezone.now() - timedelta(days=settings.GOALS_TOMBSTONE_DAYS, hours=1)
+        data = self.sync(encode_cursor({'since': since}))
+        self.assertTrue(data['reset'])
+        self.assertEqual(len(data['goals']), 3)
+        self.assertEqual(data['deleted']['goals'], [])
+
+    def test_invalid_cursor(self) -> None:
+        since = timezone.now().isoformat()
+        positions = [
+            {'since': 'yesterday'},
+            {'since': None},
+            {'since': timezone.now().replace(tzinfo=None).isoformat()},
+            {'since': since, 'until': since, 'after': {'goals': [None, 1]}},
+        ]
+        for position in positions:
+            self.assertIn('cursor', self.sync(encode_cursor(position), status=400))
+        self.assertIn('cursor', self.sync('garbage', status=400))
+
+    def test_expired_tombstones(self) -> None:
+        for object_id in range(5):
+            Tombstone.objects.create(user=self.user, kind=Tombstone.Kind.goal, object_id=object_id)
+        Tombstone.objects.filter(object_id__lt=3).update(deleted=timezone.now() - timedelta(days=31))
+        self.assertEqual(list(purge_tombstones(timezone.now() - timedelta(days=30), batch_size=2)), [2, 1])
+        self.assertEqual(sorted(Tombstone.objects.values_list('object_id', flat=True)), [3, 4])
+
+
+class GoalActivityTests(GoalsAPITestCase):
+    """comment_count and last_activity_at, kept by the goals_goalcomment_activity trigger."""
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.goal = self.create_goals(1)[0]
+
+    def test_trigger(self) -> None:
+        comments = self.create_comments(self.goal, 3)
+        self.goal.refresh_from_db()
+        self.assertEqual(self.goal.comment_count, 3)
+        self.assertEqual(self.goal.last_activity_at, comments[-1].updated)
+
+        response = self.client.patch(reverse('todolist.goals:comment', args=[comments[0].id]), {'text': 'Правка'})
+        self.goal.refresh_from_db()
+        self.assertEqual(self.goal.last_activity_at, GoalComment.objects.get(id=comments[0].id).updated)
+        self.assertEqual(self.goal.last_activity_at, parse_datetime(response.data['updated']))
+
+        activity = self.goal.last_activity_at
+        self.client.delete(reverse('todolist.goals:comment', args=[comments[1].id]))
+        self.goal.refresh_from_db()
+        self.assertEqual((self.goal.comment_count, self.goal.last_activity_at), (2, activity))
+
+        # A full save of a goal loaded before a comment was added does not write the old count back.
+        goal = Goal.objects.get(id=self.goal.id)
+        self.create_comments(self.goal, 1)
+        goal.title = 'Новое название'
+        goal.save()
+        goal.refresh_from_db()
+        self.assertEqual(goal.comment_count, 3)
+
+    def test_archived_goal(self) -> None:
+        comment = self.create_comments(self.goal, 1)[0]
+        self.client.delete(reverse('todolist.goals:goal', args=[self.goal.id]))
+        self.goal.refresh_from_db()
+        url = reverse('todolist.goals:comment', args=[comment.id])
+        self.assertEqual(self.client.patch(url, {'text': 'Правка'}).status_code, 404)
+        self.assertEqual(self.client.delete(url).status_code, 404)
+        response = self.client.post(reverse('todolist.goals:create-comment'), {'text': 'Новый', 'goal': self.goal.id})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Goal.objects.get(id=self.goal.id).updated, self.goal.updated)
+        self.assertEqual(GoalComment.objects.get(id=comment.id).text, 'Комментарий 0')
+
+
+class GoalCounterTests(GoalsAPITestCase):
+    """The trigger-kept counters always hold what a recount of goals_goal gives."""
+
+    def assert_counters(self) -> None:
+        counters = GoalCounter.objects.filter(user=self.user, count__gt=0)
+        expected = Goal.objects.filter(user=self.user).values('category', 'status', 'priority').annotate(
+            count=Count('id')
+        )
+        self.assertCountEqual(counters.values('category', 'status', 'priority', 'count'), expected)
+
+        due_counters = GoalDueCounter.objects.filter(user=self.user, count__gt=0)
+        expected = Goal.objects.filter(
+            user=self.user, due_date__isnull=False, status__in=(Goal.Status.to_do, Goal.Status.in_progress)
+        ).values('category', 'due_date').annotate(count=Count('id'))
+        self.assertCountEqual(due_counters.values('category', 'due_date', 'count'), expected)
+
+        stats = get_stats(self.user, self.today)
+        rebuild_counters([self.user.id])
+        self.assertEqual(stats, get_stats(self.user, self.today))
+
+    def test_counters(self) -> None:
+        self.today = timezone.localdate()
+        other = GoalCategory.objects.create(user=self.user, title='Дом')
+        goals = []
+        for n, category in enumerate((self.category, self.category, other)):
+            response = self.client.post(reverse('todolist.goals:create-goal'), {
+                'title': f'Цель {n}', 'category': category.id, 'due_date': self.today - timedelta(days=n),
+            })
+            goals.append(response.data['id'])
+        self.assert_counters()
+
+        url = reverse('todolist.goals:goal', args=[goals[0]])
+        self.client.patch(url, {'status': Goal.Status.in_progress, 'priority': Goal.Priority.high})
+        self.assert_counters()
+        self.client.patch(url, {'due_date': self.today - timedelta(days=10)})
+        self.client.patch(reverse('todolist.goals:goal', args=[goals[1]]), {'status': Goal.Status.done})
+        self.assert_counters()
+        response = self.client.patch(reverse('todolist.goals:bulk-update-goal'), [
+            {'id': goals[1], 'status': Goal.Status.to_do, 'due_date': None},
+            {'id': goals[2], 'category': self.category.id},
+        ], format='json')
+        self.assertNotIn('errors', response.data[0])
+        self.assert_counters()
+
+        self.client.delete(url)
+        self.client.delete(reverse('todolist.goals:goal-category', args=[other.id]))
+        self.assert_counters()
+        Goal.objects.filter(id__in=goals[:2]).delete()
+        self.assert_counters()
+        self.assertEqual(get_stats(self.user, self.today)['total'], 1)
+
+
+class ExportImportTests(GoalsAPITestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        deleted = GoalCategory.objects.create(user=self.user, title='Удалённая', is_deleted=True)
+        goals = [
+            Goal.objects.create(
+                user=self.user, category=self.category, title='Цель', description='Описание, с "кавычками"',
+                due_date=timezone.localdate(), priority=Goal.Priority.high,
+            ),
+            Goal.objects.create(user=self.user, category=self.category, title='В архиве', status=Goal.Status.archived),
+            Goal.objects.create(user=self.user, category=deleted, title='Цель удалённой', status=Goal.Status.archived),
+        ]
+        for goal in goals:
+            self.create_comments(goal, 2)
+
+    def snapshot(self, user: User) -> dict:
+        """The records of ``user``'s export, with references by title instead of id."""
+        records = {'category': {}, 'goal': {}, 'comment': {}}
+        for record in iter_records(user):
+            records[record.pop('type')][record.pop('id')] = record
+        for record in records['goal'].values():
+            record['category'] = records['category'][record['category']]['title']
+        for record in records['comment'].values():
+            record['goal'] = records['goal'][record['goal']]['title']
+        for rows in records.values():
+            for record in rows.values():
+                del record['created'], record['updated']
+        return {
+            record_type: sorted(rows.values(), key=lambda record: json.dumps(record, ensure_ascii=False))
+            for record_type, rows in records.items()
+        }
+
+    def test_round_trip(self) -> None:
+        expected = self.snapshot(self.user)
+        self.assertEqual([len(expected[key]) for key in ('category', 'goal', 'comment')], [2, 3, 6])
+        for output in ('ndjson', 'csv'):
+            self.client.force_login(self.user)
+            response = self.client.get(reverse('todolist.goals:export'), {'output': output})
+            upload = SimpleUploadedFile(f'goals.{output}', b''.join(response.streaming_content))
+
+            user = User.objects.create_user(username=f'importer-{output}', password='Str0ng-passw0rd')
+            self.client.force_login(user)
+            response = self.client.post(reverse('todolist.goals:import'), {'file': upload}, format='multipart')
+            report = json.loads(b''.join(response.streaming_content).decode().splitlines()[-1])
+            self.assertEqual(report['created'], {'category': 2, 'goal': 3, 'comment': 6}, report)
+            self.assertEqual(self.snapshot(user), expected)
+            self.assertEqual(
+                sorted(Goal.objects.filter(user=user).values_list('comment_count', flat=True)), [2, 2, 2]
+            )
+
+
+class CalendarTests(GoalsAPITestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        today = timezone.localdate()
+        # A Monday in the future, so the range spans two weeks and nothing in it is overdue.
+        self.start = today + timedelta(days=14 - today.weekday())
+        self.end = self.start + timedelta(days=8)
+        self.goals = {}
+        for title, days, priority, status in (
+            ('До начала', -1, Goal.Priority.critical, Goal.Status.to_do),
+            ('Низкий', 0, Goal.Priority.low, Goal.Status.to_do),
+            ('Критичный', 0, Goal.Priority.critical, Goal.Status.in_progress),
+            ('Высокий', 0, Goal.Priority.high, Goal.Status.to_do),
+            ('Средний', 0, Goal.Priority.medium, Goal.Status.done),
+            ('Второй высокий', 0, Goal.Priority.high, Goal.Status.to_do),
+            ('В архиве', 0, Goal.Priority.critical, Goal.Status.archived),
+            ('Среда', 2, Goal.Priority.medium, Goal.Status.to_do),
+            ('Конец', 8, Goal.Priority.low, Goal.Status.to_do),
+            ('После конца', 9, Goal.Priority.critical, Goal.Status.to_do),
+        ):
+            self.goals[title] = Goal.objects.create(
+                user=self.user, category=self.category, title=title, priority=priority, status=status,
+                due_date=self.start + timedelta(days=days),
+            )
+        for title, days, status in (('Просрочена', -2, Goal.Status.to_do), ('Выполнена', -3, Goal.Status.done)):
+            Goal.objects.create(
+                user=self.user, category=self.category, title=title, status=status,
+                due_date=today + timedelta(days=days),
+            )
+
+    def get_calendar(self, **params: Any) -> dict:
+        response = self.client.get(
+            reverse('todolist.goals:goal-calendar'), {'start': self.start, 'end': self.end, **params},
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def titles(self, column: dict) -> list[str]:
+        return [goal['title'] for goal in column['results']]
+
+    def test_day_buckets(self) -> None:
+        calendar = self.get_calendar()
+        days = [self.start, self.start + timedelta(days=2), self.end]
+        self.assertEqual([bucket['date'] for bucket in calendar['buckets']], [day.isoformat() for day in days])
+        self.assertEqual([bucket['count'] for bucket in calendar['buckets']], [5, 1, 1])
+
+        first = calendar['buckets'][0]
+        self.assertEqual(first['by_priority'], {'low': 1, 'medium': 1, 'high': 2, 'critical': 1})
+        # Priority first, then the id among goals due the same day.
+        self.assertEqual(self.titles(first), ['Критичный', 'Высокий', 'Второй высокий'])
+        self.assertEqual(first['results'][0]['id'], self.goals['Критичный'].id)
+        self.assertEqual(self.titles(calendar['buckets'][2]), ['Конец'])
+
+        self.assertEqual(calendar['overdue']['count'], 1)
+        self.assertEqual(self.titles(calendar['overdue']), ['Просрочена'])
+
+    def test_limit(self) -> None:
+        calendar = self.get_calendar(limit=1)
+        self.assertEqual([self.titles(bucket) for bucket in calendar['buckets']], [['Критичный'], ['Среда'], ['Конец']])
+        calendar = self.get_calendar(limit=20)
+        self.assertEqual(
+            self.titles(calendar['buckets'][0]), ['Критичный', 'Высокий', 'Второй высокий', 'Средний', 'Низкий'],
+        )
+        calendar = self.get_calendar(limit=0)
+        self.assertEqual([bucket['count'] for bucket in calendar['buckets']], [5, 1, 1])
+        self.assertTrue(all(bucket['results'] == [] for bucket in calendar['buckets']))
+
+    def test_week_buckets(self) -> None:
+        calendar = self.get_calendar(bucket='week')
+        weeks = [self.start, self.start + timedelta(days=7)]
+        self.assertEqual([bucket['date'] for bucket in calendar['buckets']], [week.isoformat() for week in weeks])
+        self.assertEqual([bucket['count'] for bucket in calendar['buckets']], [6, 1])
+        self.assertEqual(self.titles(calendar['buckets'][0]), ['Критичный', 'Высокий', 'Второй высокий'])
+
+    def test_invalid(self) -> None:
+        url = reverse('todolist.goals:goal-calendar')
+        response = self.client.get(url, {'start': self.end, 'end': self.start})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(url, {'start': self.start, 'end': self.start + timedelta(days=100)})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(url, {'start': self.start, 'end': self.end, 'limit': 21})
+        self.assertEqual(response.status_code, 400)
+
+
+class RetentionTests(GoalsAPITestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.cutoff = timezone.now() - timedelta(days=30)
+
+    def archive(self, goals: list[Goal], days: int = 60) -> None:
+        for goal in goals:
+            self.client.delete(reverse('todolist.goals:goal', args=[goal.id]))
+        Goal.objects.filter(id__in=[goal.id for goal in goals]).update(updated=timezone.now() - timedelta(days=days))
+
+    def restore(self, archive: Archive, **data: Any) -> Any:
+        return self.client.post(reverse('todolist.goals:archive-restore', args=[archive.id]), data, format='json')
+
+    def test_purge_goals(self) -> None:
+        goals = self.create_goals(7)
+        self.create_comments(goals[0], 2)
+        self.archive(goals[:5])
+        self.archive(goals[5:6], days=1)
+        expected = {goal.id: goal.updated for goal in Goal.objects.filter(id__in=[goal.id for goal in goals[:5]])}
+
+        self.assertEqual(list(purge_goals(self.cutoff, batch_size=2)), [2, 2, 1])
+        self.assertEqual(list(purge_goals(self.cutoff, batch_size=2)), [])
+        archives = Archive.objects.filter(user=self.user)
+        self.assertEqual({archive.object_id: archive.archived for archive in archives}, expected)
+        self.assertTrue(all(archive.kind == Archive.Kind.goal for archive in archives))
+        self.assertEqual(archives.get(object_id=goals[0].id).title, 'Цель 0')
+        self.assertCountEqual(
+            Tombstone.objects.filter(user=self.user).values_list('kind', 'object_id'),
+            [(Tombstone.Kind.goal, goal_id) for goal_id in expected],
+        )
+        self.assertCountEqual(Goal.objects.values_list('id', flat=True), [goals[5].id, goals[6].id])
+        self.assertFalse(GoalComment.objects.exists())
+
+    def test_purge_categories(self) -> None:
+        category = GoalCategory.objects.create(user=self.user, title='Дом')
+        goal = Goal.objects.create(user=self.user, category=category, title='Цель дома')
+        self.create_comments(goal, 2)
+        self.client.delete(reverse('todolist.goals:goal-category', args=[category.id]))
+        GoalCategory.objects.filter(id=category.id).update(updated=timezone.now() - timedelta(days=60))
+        Goal.objects.filter(id=goal.id).update(updated=timezone.now() - timedelta(days=60))
+
+        # The goals of a deleted category go with it.
+        self.assertEqual(list(purge_goals(self.cutoff, batch_size=10)), [])
+        self.assertEqual(list(purge_categories(self.cutoff, batch_size=10)), [1])
+        archive = Archive.objects.get(user=self.user)
+        self.assertEqual((archive.kind, archive.object_id, archive.title), (Archive.Kind.category, category.id, 'Дом'))
+        self.assertCountEqual(
+            Tombstone.objects.filter(user=self.user).values_list('kind', 'object_id'),
+            [(Tombstone.Kind.category, category.id), (Tombstone.Kind.goal, goal.id)],
+        )
+        self.assertFalse(GoalCategory.objects.filter(id=category.id).exists())
+
+        response = self.restore(archive)
+        self.assertEqual(response.data, {'categories': 1, 'goals': 1, 'comments': 2})
+        self.assertFalse(GoalCategory.objects.get(id=category.id).is_deleted)
+        response = self.client.get(reverse('todolist.goals:goal-list'), {'category': category.id})
+        self.assertEqual([row['id'] for row in response.data], [goal.id])
+        self.assertEqual(response.data[0]['status'], Goal.Status.to_do)
+
+    def test_restore(self) -> None:
+        goal = Goal.objects.create(
+            user=self.user, category=self.category, title='Цель', description='Описание',
+            due_date=timezone.localdate(), priority=Goal.Priority.high, status=Goal.Status.in_progress,
+        )
+        self.create_comments(goal, 3)
+        Goal.objects.filter(id=goal.id).update(created=timezone.now() - timedelta(days=90))
+        self.archive([goal])
+        fields = ('id', 'created', 'title', 'description', 'due_date', 'priority', 'category', 'comment_count',
+                  'last_activity_at')
+        expected_goal = Goal.objects.values(*fields).get(id=goal.id)
+        expected_comments = list(GoalComment.objects.values().order_by('id'))
+        self.assertEqual(list(purge_goals(self.cutoff, batch_size=10)), [1])
+
+        response = self.restore(Archive.objects.get(object_id=goal.id), status=Goal.Status.done)
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data, {'categories': 0, 'goals': 1, 'comments': 3})
+        self.assertEqual(Goal.objects.values(*fields).get(id=goal.id), expected_goal)
+        self.assertEqual(expected_goal['comment_count'], 3)
+        self.assertEqual(list(GoalComment.objects.values().order_by('id')), expected_comments)
+        restored = Goal.objects.get(id=goal.id)
+        self.assertEqual(restored.status, Goal.Status.done)
+        self.assertGreater(restored.updated, self.cutoff)
+        self.assertFalse(Archive.objects.exists())
+        response = self.client.get(reverse('todolist.goals:goal', args=[goal.id]))
+        self.assertEqual(response.status_code, 200)
+
+        # A purged archive is restored once.
+        self.archive([goal])
+        self.assertEqual(list(purge_goals(self.cutoff, batch_size=10)), [1])
+        archive = Archive.objects.get(object_id=goal.id)
+        self.assertEqual(self.restore(archive, status=Goal.Status.archived).status_code, 400)
+        self.assertEqual(self.restore(archive).status_code, 200)
+        self.assertEqual(self.restore(archive).status_code, 404)
+
+    def test_restore_error(self) -> None:
+        goal = self.create_goals(1)[0]
+        self.archive([goal])
+        self.assertEqual(list(purge_goals(self.cutoff, batch_size=10)), [1])
+        self.client.delete(reverse('todolist.goals:goal-category', args=[self.category.id]))
+        GoalCategory.objects.filter(id=self.category.id).update(updated=timezone.now() - timedelta(days=60))
+        self.assertEqual(list(purge_categories(self.cutoff, batch_size=10)), [1])
+
+        goal_archive = Archive.objects.get(kind=Archive.Kind.goal)
+        response = self.restore(goal_archive)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('restore it first', response.data[0])
+        self.assertFalse(Goal.objects.exists())
+        self.assertTrue(Archive.objects.filter(id=goal_archive.id).exists())
+
+        self.assertEqual(self.restore(Archive.objects.get(kind=Archive.Kind.category)).status_code, 200)
+        self.assertEqual(self.restore(goal_archive).status_code, 200)
+        self.assertEqual(Goal.objects.get(id=goal.id).category_id, self.category.id)
+
+
+@override_settings(METRICS_ENFORCE_QUERY_BUDGETS=True)
+class QueryBudgetTests(GoalsAPITestMixin, APITransactionTestCase):
+    """
+    Runs every endpoint of QUERY_BUDGETS with the budgets enforced. Outside
+    TestCase, so the transactions of the write views cost what they cost in
+    production instead of savepoints.
+    """
+
+    def request(self, method: str, name: str, *args: int, data: object = None, status: int = 200, **kwargs) -> Any:
+        caches[settings.GOALS_CACHE_ALIAS].clear()
+        self.requested.add(name)
+        url = reverse(name, args=args)
+        kwargs.setdefault('format', None if method == 'get' else 'json')
+        response = getattr(self.client, method)(url, data, **kwargs)
+        self.assertEqual(response.status_code, status, b'' if response.streaming else response.content)
+        if response.streaming:
+            # The budget is checked once the body is sent.
+            return b''.join(response.streaming_content)
+        return response.data
+
+    def stream_events(self) -> list[dict]:
+        self.requested.add(EventStream.view_name)
+        messages = []
+
+        async def receive() -> dict:
+            return {'type': 'http.disconnect'}
+
+        async def send(message: dict) -> None:
+            messages.append(message)
+
+        cookie = f'{settings.SESSION_COOKIE_NAME}={self.client.cookies[settings.SESSION_COOKIE_NAME].value}'
+        scope = {'type': 'http', 'method': 'GET', 'path': '/goals/events', 'headers': [(b'cookie', cookie.encode())]}
+        async_to_sync(EventStream())(scope, receive, send)
+        return messages
+
+    def test_budgets(self) -> None:
+        self.requested = set()
+        today = timezone.localdate()
+        goal = self.create_goals(5)[0]
+        Goal.objects.filter(id=goal.id).update(due_date=today)
+        comment = self.create_comments(goal, 5)[0]
+        category = self.category.id
+
+        self.assertEqual(self.request('get', 'core:profile')['username'], 'owner')
+        created = self.request('post', 'todolist.goals:create-category', data={'title': 'Дом'}, status=201)
+        self.assertEqual(created['title'], 'Дом')
+        data = self.request('get', 'todolist.goals:category-list', data={'limit': 2, 'search': 'Работа'})
+        self.assertEqual([row['id'] for row in data['results']], [category])
+        self.assertEqual(self.request('get', 'todolist.goals:goal-category', category)['title'], 'Работа')
+        data = self.request('patch', 'todolist.goals:goal-category', category, data={'title': 'Работа и дом'})
+        self.assertEqual(data['title'], 'Работа и дом')
+        data = {'title': 'Цель', 'category': category}
+        data = self.request('post', 'todolist.goals:create-goal', data=data, status=201)
+        self.assertEqual(data['category'], category)
+        data = self.request('get', 'todolist.goals:goal-list', data={
+            'limit': 2, 'category': category, 'category__in': f'{category},0', 'status__in': '1,2', 'search': 'Цель',
+        })
+        self.assertEqual(data['count'], 6)
+        self.assertEqual(len(data['results']), 2)
+        data = self.request('get', 'todolist.goals:goal-list', data={
+            'limit': 2, 'cursor': '', 'ordering': '-last_activity_at',
+        })
+        self.assertEqual(len(data['results']), 2)
+        self.assertIsNotNone(data['next'])
+        self.assertEqual(self.request('get', 'todolist.goals:goal', goal.id)['id'], goal.id)
+        data = self.request('patch', 'todolist.goals:goal', goal.id, data={'title': 'Главная цель'})
+        self.assertEqual(data['title'], 'Главная цель')
+        data = [{'title': 'Ещё цель', 'category': category}]
+        data = self.request('post', 'todolist.goals:bulk-create-goal', data=data)
+        self.assertEqual(data[0]['title'], 'Ещё цель')
+        data = self.request('patch', 'todolist.goals:bulk-update-goal', data=[{'id': goal.id, 'priority': 3}])
+        self.assertEqual(data[0]['priority'], 3)
+        data = self.request('get', 'todolist.goals:goal-stats')
+        self.assertEqual((data['total'], data['by_status']['to_do']), (7, 7))
+        data = self.request('get', 'todolist.goals:goal-board', data={'group_by': 'category', 'category': category})
+        self.assertEqual([column['count'] for column in data['columns']], [7, 0, 0])
+        data = self.request('get', 'todolist.goals:goal-calendar', data={
+            'start': today.isoformat(), 'end': (today + timedelta(days=30)).isoformat(), 'category': category,
+        })
+        self.assertEqual([row['id'] for row in data['buckets'][0]['results']], [goal.id])
+        data = {'text': 'Новый', 'goal': goal.id}
+        data = self.request('post', 'todolist.goals:create-comment', data=data, status=201)
+        self.assertEqual(data['goal'], goal.id)
+        data = self.request('get', 'todolist.goals:comment-list', data={'limit': 2, 'goal': goal.id})
+        self.assertEqual(data['count'], 6)
+        self.assertEqual(self.request('get', 'todolist.goals:comment', comment.id)['text'], 'Комментарий 0')
+        data = self.request('patch', 'todolist.goals:comment', comment.id, data={'text': 'Другой комментарий'})
+        self.assertEqual(data['text'], 'Другой комментарий')
+        self.request('delete', 'todolist.goals:comment', comment.id, status=204)
+        data = self.request('get', 'todolist.goals:sync')
+        self.assertEqual((len(data['categories']), len(data['goals']), len(data['comments'])), (2, 7, 5))
+        data = self.request('post', 'todolist.goals:bulk-archive-goal', data=[goal.id])
+        self.assertEqual(data, [{'id': goal.id}])
+
+        Goal.objects.filter(id=goal.id).update(updated=timezone.now() - timedelta(days=365))
+        self.assertEqual(list(purge_goals(timezone.now(), batch_size=10)), [1])
+        data = self.request('get', 'todolist.goals:archive-list', data={'limit': 5})
+        archive = data['results'][0]
+        self.assertEqual(archive['object_id'], goal.id)
+        data = self.request('post', 'todolist.goals:archive-restore', archive['id'])
+        self.assertEqual(data, {'categories': 0, 'goals': 1, 'comments': 5})
+
+        exported = self.request('get', 'todolist.goals:export').decode()
+        self.assertEqual(len(exported.splitlines()), 2 + 7 + 5)
+        upload = SimpleUploadedFile('goals.ndjson', exported.encode())
+        reports = self.request('post', 'todolist.goals:import', data={'file': upload}, format='multipart')
+        report = json.loads(reports.decode().splitlines()[-1])
+        self.assertTrue(report['done'])
+        self.assertEqual(report['created'], {'category': 2, 'goal': 7, 'comment': 5})
+
+        messages = self.stream_events()
+        self.assertEqual(messages[0]['status'], 200)
+        self.assertEqual(messages[1]['body'], b'retry: 5000\n\n')
+
+        self.request('delete', 'todolist.goals:goal-category', category, status=204)
+
+        self.assertEqual(self.requested, set(settings.QUERY_BUDGETS))
+
+    @override_settings(QUERY_BUDGETS={'core:profile': 1})
+    def test_over_budget(self) -> None:
+        with self.assertRaises(QueryBudgetExceeded):
+            self.client.get(reverse('core:profile'))
@@ -1,18 +1,34 @@
+from django.conf import settings
 from django.urls import path
 
-from todolist.goals import views
+from todolist.goals import async_views, views
+
+# Read-heavy views have async variants for ASGI deployments.
+read_views = async_views if settings.ASYNC_VIEWS else views
 
 
 urlpatterns = [
     path('goal_category/create', views.GoalCategoryCreateView.as_view(), name='create-category'),
-    path('goal_category/list', views.GoalCategoryListView.as_view(), name='category-list'),
-    path('goal_category/<int:pk>', views.GoalCategoryView.as_view(), name='goal-category'),
+    path('goal_category/list', read_views.GoalCategoryListView.as_view(), name='category-list'),
+    path('goal_category/<int:pk>', read_views.GoalCategoryView.as_view(), name='goal-category'),
 
     path('goal/create', views.GoalCreateView.as_view(), name='create-goal'),
-    path('goal/list', views.GoalListView.as_view(), name='goal-list'),
-    path('goal/<int:pk>', views.GoalView.as_view(), name='goal'),
+    path('goal/list', read_views.GoalListView.as_view(), name='goal-list'),
+    path('goal/<int:pk>', read_views.GoalView.as_view(), name='goal'),
+    path('goal/bulk_create', views.GoalBulkCreateView.as_view(), name='bulk-create-goal'),
+    path('goal/bulk_update', views.GoalBulkUpdateView.as_view(), name='bulk-update-goal'),
+    path('goal/bulk_archive', views.GoalBulkArchiveView.as_view(), name='bulk-archive-goal'),
+    path('goal/stats', views.GoalStatsView.as_view(), name='goal-stats'),
+    path('goal/board', views.GoalBoardView.as_view(), name='goal-board'),
+    path('goal/calendar', views.GoalCalendarView.as_view(), name='goal-calendar'),
 
     path('goal_comment/create', views.GoalCommentCreateView.as_view(), name='create-comment'),
-    path('goal_comment/list', views.GoalCommentListView.as_view(), name='comment-list'),
-    path('goal_comment/<int:pk>', views.GoalCommentView.as_view(), name='comment'),
+    path('goal_comment/list', read_views.GoalCommentListView.as_view(), name='comment-list'),
+    path('goal_comment/<int:pk>', read_views.GoalCommentView.as_view(), name='comment'),
+
+    path('sync', views.SyncView.as_view(), name='sync'),
+    path('archive', views.ArchiveListView.as_view(), name='archive-list'),
+    path('archive/<int:pk>/restore', views.ArchiveRestoreView.as_view(), name='archive-restore'),
+    path('export', views.ExportView.as_view(), name='export'),
+    path('import', views.ImportView.as_view(), name='import'),
 ]
\ No newline at end of file
@@ -1,42 +1,63 @@
+import json
+from typing import Any
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
 from django.db import transaction
 from django.db.models import QuerySet
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import generics, permissions
-from rest_framework.filters import OrderingFilter, SearchFilter
-from rest_framework.pagination import LimitOffsetPagination
-
-from todolist.goals.filters import GoalDateFilter
-from todolist.goals.models import GoalCategory
-from todolist.goals.models import GoalComment
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import OrderingFilter
+from rest_framework.parsers import MultiPartParser
+from rest_framework.request import Request
+from rest_framework.response import Response
 
-from todolist.goals.models import Goal
+from todolist.fastpath import ValuesListMixin
+from todolist.goals.cache import CachedListMixin, InvalidateCacheMixin, invalidate_on_commit
+from todolist.goals.calendar import get_calendar
+from todolist.goals.counters import get_stats
+from todolist.goals.events import PublishEventsMixin, publish_on_commit
+from todolist.goals.export import FORMATS, export_stream, spool
+from todolist.goals.filters import FullTextSearchFilter, GoalCommentFilter, GoalDateFilter
+from todolist.goals.importer import READ_ERRORS, Importer, open_upload, parse
+from todolist.goals.models import Archive, Goal, GoalCategory, GoalComment, Tombstone
+from todolist.goals.pagination import BoardPagination, KeysetPagination
+from todolist.goals.retention import RestoreError, restore
 
 from todolist.goals.permissions import GoalCategoryPermission, GoalPermission, GoalCommentPermission
 
 from todolist.goals.serializers import GoalCategoryCreateSerializer, GoalCategorySerializer, GoalCreateSerializer, \
-    GoalSerializer, GoalCommentSerializer, GoalCommentCreateSerializer
+    GoalSerializer, GoalCommentSerializer, GoalCommentCreateSerializer, GoalBulkSerializer, \
+    GoalCalendarQuerySerializer, ArchiveSerializer, ArchiveRestoreSerializer
+from todolist.goals.sync import collect_changes, decode_cursor
 
 
-class GoalCategoryCreateView(generics.CreateAPIView):
+class GoalCategoryCreateView(InvalidateCacheMixin, PublishEventsMixin, generics.CreateAPIView):
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = GoalCategoryCreateSerializer
+    event_kind = 'category'
 
 
-class GoalCategoryListView(generics.ListAPIView):
+class GoalCategoryListView(CachedListMixin, ValuesListMixin, generics.ListAPIView):
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = GoalCategorySerializer
-    filter_backends = [OrderingFilter, SearchFilter]
+    filter_backends = [OrderingFilter, FullTextSearchFilter]
     ordering_fields = ('title', 'created')
     ordering = ['title']
     search_fields = ['title']
+    search_trigram_fields = ['title']
 
     def get_queryset(self):
         return GoalCategory.objects.select_related('user').filter(user=self.request.user, is_deleted=False)
 
 
-class GoalCategoryView(generics.RetrieveUpdateDestroyAPIView):
+class GoalCategoryView(InvalidateCacheMixin, PublishEventsMixin, generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [GoalCategoryPermission]
     serializer_class = GoalCategorySerializer
+    event_kind = 'category'
 
     def get_queryset(self):
         return GoalCategory.objects.select_related('user').filter(user=self.request.user, is_deleted=False)
@@ -44,24 +65,28 @@ class GoalCategoryView(generics.RetrieveUpdateDestroyAPIView):
     def perform_destroy(self, instance: GoalCategory) -> None:
         with transaction.atomic():
             instance.is_deleted = True
-            instance.save(update_fields=('is_deleted',))
-            instance.goals.update(status=Goal.Status.archived)
+            instance.save(update_fields=('is_deleted', 'updated'))
+            instance.goals.update(status=Goal.Status.archived, updated=timezone.now())
+        invalidate_on_commit(instance.user_id)
+        publish_on_commit(instance.user_id, self.event_kind, 'delete', [instance.id])
 
 
-class GoalCreateView(generics.CreateAPIView):
+class GoalCreateView(InvalidateCacheMixin, PublishEventsMixin, generics.CreateAPIView):
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = GoalCreateSerializer
+    event_kind = 'goal'
 
 
-class GoalListView(generics.ListAPIView):
+class GoalListView(CachedListMixin, ValuesListMixin, generics.ListAPIView):
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = GoalCreateSerializer
-    pagination_class = LimitOffsetPagination
-    filter_backends = [DjangoFilterBackend, OrderingFilter, SearchFilter]
+    pagination_class = KeysetPagination
+    filter_backends = [DjangoFilterBackend, OrderingFilter, FullTextSearchFilter]
     filterset_class = GoalDateFilter
-    ordering_fields = ('title', 'created')
+    ordering_fields = ('title', 'created', 'comment_count', 'last_activity_at')
     ordering = ['title']
     search_fields = ('title', 'description')
+    search_trigram_fields = ('title',)
 
     def get_queryset(self) -> QuerySet[Goal]:
         return (
@@ -71,9 +96,17 @@ class GoalListView(generics.ListAPIView):
         )
 
 
-class GoalView(generics.RetrieveUpdateDestroyAPIView):
+class GoalBoardView(GoalListView):
+    pagination_class = BoardPagination
+    # BoardPagination reads model instances from a raw query.
+    values_list = False
+    filter_backends = [DjangoFilterBackend, OrderingFilter]
+
+
+class GoalView(InvalidateCacheMixin, PublishEventsMixin, generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [GoalPermission]
     serializer_class = GoalSerializer
+    event_kind = 'goal'
 
     def get_queryset(self):
         return Goal.objects.select_related('user').filter(
@@ -82,31 +115,279 @@ class GoalView(generics.RetrieveUpdateDestroyAPIView):
 
     def perform_destroy(self, instance: Goal):
         instance.status = Goal.Status.archived
-        instance.save(update_fields=('status',))
+        instance.save(update_fields=('status', 'updated'))
+        invalidate_on_commit(instance.user_id)
+        publish_on_commit(instance.user_id, self.event_kind, 'archive', [instance.id])
+
+
+class GoalBulkMixin:
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = GoalBulkSerializer
+
+    def get_items(self) -> list:
+        items = self.request.data
+        if not isinstance(items, list):
+            raise ValidationError('Expected a list of items')
+        if len(items) > settings.GOALS_BULK_MAX_ITEMS:
+            raise ValidationError(f'No more than {settings.GOALS_BULK_MAX_ITEMS} items per request')
+        return items
+
+    def get_serializer_context(self) -> dict:
+        category_ids = set()
+        for item in self.request.data:
+            if isinstance(item, dict) and str(item.get('category', '')).isdigit():
+                category_ids.add(int(item['category']))
+        context = super().get_serializer_context()
+        context['categories'] = GoalCategory.objects.in_bulk(category_ids)
+        return context
+
+
+class GoalBulkCreateView(GoalBulkMixin, generics.GenericAPIView):
+    def post(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        items = self.get_items()
+        context = self.get_serializer_context()
+
+        results, goals = [], []
+        for item in items:
+            serializer = self.get_serializer_class()(data=item, context=context)
+            if serializer.is_valid():
+                goals.append(Goal(**serializer.validated_data))
+                results.append(goals[-1])
+            else:
+                results.append({'errors': serializer.errors})
+
+        with transaction.atomic():
+            Goal.objects.bulk_create(goals)
+        invalidate_on_commit(request.user.id)
+        publish_on_commit(request.user.id, 'goal', 'create', [goal.id for goal in goals])
+
+        return Response([
+            GoalCreateSerializer(result).data if isinstance(result, Goal) else result
+            for result in results
+        ])
+
+
+class GoalBulkUpdateView(GoalBulkMixin, generics.GenericAPIView):
+    def get_queryset(self) -> QuerySet[Goal]:
+        return Goal.objects.filter(
+            user=self.request.user, category__is_deleted=False
+        ).exclude(status=Goal.Status.archived)
+
+    def patch(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        items = self.get_items()
+        context = self.get_serializer_context()
+        ids = [item['id'] for item in items if isinstance(item, dict) and isinstance(item.get('id'), int)]
+        instances = self.get_queryset().in_bulk(ids)
+
+        results, fields = [], {'updated'}
+        now = timezone.now()
+        for item in items:
+            goal = instances.get(item.get('id')) if isinstance(item, dict) else None
+            if goal is None:
+                results.append({'errors': {'id': ['Goal not found']}})
+                continue
+            serializer = self.get_serializer_class()(goal, data=item, partial=True, context=context)
+            if not serializer.is_valid():
+                results.append({'errors': serializer.errors})
+                continue
+            for attr, value in serializer.validated_data.items():
+                setattr(goal, attr, value)
+            goal.updated = now
+            fields.update(serializer.validated_data)
+            results.append(goal)
+
+        updated = [result for result in results if isinstance(result, Goal)]
+        with transaction.atomic():
+            Goal.objects.bulk_update(updated, fields=sorted(fields))
+        invalidate_on_commit(request.user.id)
+        publish_on_commit(request.user.id, 'goal', 'update', [goal.id for goal in updated])
+
+        return Response([
+            GoalCreateSerializer(result).data if isinstance(result, Goal) else result
+            for result in results
+        ])
+
+
+class GoalBulkArchiveView(GoalBulkMixin, generics.GenericAPIView):
+    def post(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        ids = self.get_items()
+        if not all(isinstance(pk, int) for pk in ids):
+            raise ValidationError('Expected a list of goal ids')
+
+        with transaction.atomic():
+            goals = Goal.objects.select_for_update().filter(user=request.user, id__in=ids).exclude(
+                status=Goal.Status.archived
+            )
+            archived = set(goals.values_list('id', flat=True))
+            Goal.objects.filter(id__in=archived).update(status=Goal.Status.archived, updated=timezone.now())
+        invalidate_on_commit(request.user.id)
+        publish_on_commit(request.user.id, 'goal', 'archive', sorted(archived))
+
+        return Response([
+            {'id': pk} if pk in archived else {'id': pk, 'errors': {'id': ['Goal not found']}}
+            for pk in ids
+        ])
+
+
+class GoalStatsView(generics.GenericAPIView):
+    permission_classes = [permissions.IsAuthenticated]
 
+    def get(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        return Response(get_stats(request.user, timezone.localdate()))
 
-class GoalCommentCreateView(generics.CreateAPIView):
+
+class GoalCalendarView(generics.GenericAPIView):
+    permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = GoalDateFilter
+
+    def get_queryset(self) -> QuerySet[Goal]:
+        return Goal.objects.filter(
+            user=self.request.user, category__is_deleted=False
+        ).exclude(status=Goal.Status.archived)
+
+    def get(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        params = GoalCalendarQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response(get_calendar(queryset, today=timezone.localdate(), **params.validated_data))
+
+
+class GoalCommentCreateView(InvalidateCacheMixin, PublishEventsMixin, generics.CreateAPIView):
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = GoalCommentCreateSerializer
+    event_kind = 'comment'
 
 
-class GoalCommentListView(generics.ListAPIView):
+class GoalCommentListView(CachedListMixin, ValuesListMixin, generics.ListAPIView):
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = GoalCommentSerializer
-    pagination_class = LimitOffsetPagination
+    pagination_class = KeysetPagination
     filter_backends = [DjangoFilterBackend, OrderingFilter]
     # ordering_fields = ('created', 'updated')
-    filterset_fields = ['goal']
+    filterset_class = GoalCommentFilter
     ordering = ['-created']
 
     def get_queryset(self) -> QuerySet[GoalComment]:
-        return GoalComment.objects.filter(
+        return GoalComment.objects.select_related('user').filter(
             user_id=self.request.user.id
         ).exclude(goal__status=Goal.Status.archived)
 
 
-class GoalCommentView(generics.RetrieveUpdateDestroyAPIView):
+class GoalCommentView(InvalidateCacheMixin, PublishEventsMixin, generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [GoalCommentPermission]
     serializer_class = GoalCommentSerializer
-    queryset = GoalComment.objects.select_related('user')
+    event_kind = 'comment'
+
+    def get_queryset(self) -> QuerySet[GoalComment]:
+        # Comments of archived goals are left out, as in the list: editing one
+        # would make the activity trigger move the goal's updated, which keeps
+        # the goal from todolist.goals.retention.
+        return GoalComment.objects.select_related('user').filter(
+            user_id=self.request.user.id
+        ).exclude(goal__status=Goal.Status.archived)
+
+    def perform_destroy(self, instance: GoalComment) -> None:
+        with transaction.atomic():
+            Tombstone.objects.create(user_id=instance.user_id, kind=Tombstone.Kind.comment, object_id=instance.id)
+            super().perform_destroy(instance)
+
+
+class SyncView(generics.GenericAPIView):
+    permission_classes = [permissions.IsAuthenticated]
+    # The next cursor is taken from the clock, so a lagging replica would make clients skip changes for good.
+    replica_reads = False
+
+    def get(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        cursor = request.query_params.get('cursor')
+        position = decode_cursor(cursor) if cursor else {}
+        return Response(collect_changes(request.user, **position))
+
+
+class ArchiveListView(generics.ListAPIView):
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = ArchiveSerializer
+    filter_backends = [DjangoFilterBackend, OrderingFilter]
+    filterset_fields = ['kind']
+    ordering = ['-purged']
+
+    def get_queryset(self) -> QuerySet[Archive]:
+        return Archive.objects.filter(user=self.request.user).defer('data')
+
+
+class ArchiveRestoreView(generics.GenericAPIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self) -> QuerySet[Archive]:
+        return Archive.objects.select_for_update().filter(user=self.request.user)
+
+    def post(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        params = ArchiveRestoreSerializer(data=request.data)
+        params.is_valid(raise_exception=True)
+        # The lock makes a second restore of the same archive wait, then find nothing.
+        with transaction.atomic():
+            archive = self.get_object()
+            try:
+                restored = restore(archive, **params.validated_data)
+            except RestoreError as e:
+                raise ValidationError(str(e))
+        invalidate_on_commit(request.user.id)
+        return Response(restored)
+
+
+class ExportView(generics.GenericAPIView):
+    permission_classes = [permissions.IsAuthenticated]
+    content_types = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+
+    def get(self, request: Request, *args: Any, **kwargs: Any) -> StreamingHttpResponse:
+        output = request.query_params.get('output', 'ndjson')
+        if output not in FORMATS:
+            raise ValidationError({'output': f'Expected one of: {", ".join(FORMATS)}'})
+        compress = request.query_params.get('gzip') in ('1', 'true')
+
+        filename = f'goals.{output}'
+        content_type = self.content_types[output]
+        if compress:
+            filename, content_type = f'{filename}.gz', 'application/gzip'
+
+        stream = export_stream(request.user, output, compress)
+        if isinstance(request._request, ASGIRequest):
+            # Django 4.1 iterates streaming responses in the event loop under
+            # ASGI, where the ORM refuses to run: the file is written here, in
+            # the view's thread, and only read back while it is sent.
+            return FileResponse(spool(stream), as_attachment=True, filename=filename, content_type=content_type)
+
+        response = StreamingHttpResponse(stream, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+
+class ImportView(generics.GenericAPIView):
+    permission_classes = [permissions.IsAuthenticated]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request: Request, *args: Any, **kwargs: Any) -> StreamingHttpResponse:
+        upload = request.FILES.get('file')
+        if upload is None:
+            raise ValidationError({'file': 'No file was submitted'})
+        input_format = request.query_params.get('input')
+        if input_format is not None and input_format not in FORMATS:
+            raise ValidationError({'input': f'Expected one of: {", ".join(FORMATS)}'})
+
+        try:
+            stream, input_format = open_upload(upload, upload.name, input_format)
+        except READ_ERRORS as e:
+            raise ValidationError({'file': f'Unreadable file: {e}'})
+        importer = Importer(request.user, batch_size=settings.GOALS_IMPORT_BATCH_SIZE)
+
+        def progress():
+            for report in importer.run(parse(stream, input_format)):
+                yield json.dumps(report, ensure_ascii=False) + '\n'
+            invalidate_on_commit(request.user.id)
+            publish_on_commit(request.user.id, 'all', 'resync')
 
+        if isinstance(request._request, ASGIRequest):
+            # See ExportView: under ASGI the import runs to the end here and
+            # its progress reports are sent afterwards.
+            return FileResponse(spool(progress()), content_type='application/x-ndjson')
+        return StreamingHttpResponse(progress(), content_type='application/x-ndjson')
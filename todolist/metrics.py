@@ -0,0 +1,276 @@
+import asyncio
+import contextvars
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, deque
+from typing import Any, Iterator, Optional
+
+from django.conf import settings
+from django.db import DatabaseError, connections, transaction
+from django.db.backends.signals import connection_created
+from django.http import HttpRequest, HttpResponse
+from django.utils.deprecation import MiddlewareMixin
+
+from todolist.renderers import FastJSONRenderer
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class RequestMetrics:
+    """What one request spent; filled in by the middleware, the query wrapper and the renderer."""
+
+    def __init__(self, method: str, path: str) -> None:
+        self.method = method
+        self.path = path
+        self.started = time.perf_counter()
+        self.view = '<unmatched>'
+        self.status = 0
+        self.latency = 0.0
+        self.queries = 0
+        self.db_time = 0.0
+        self.render_time = 0.0
+        self.size: Optional[int] = None
+
+
+current: contextvars.ContextVar[Optional[RequestMetrics]] = contextvars.ContextVar('request_metrics', default=None)
+
+
+class Histogram:
+    def __init__(self, buckets: tuple) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def render(self, name: str, labels: str) -> Iterator[str]:
+        cumulative = 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+        yield f'{name}_sum{{{labels}}} {self.sum}'
+        yield f'{name}_count{{{labels}}} {cumulative}'
+
+
+class EndpointStats:
+    def __init__(self) -> None:
+        self.responses: Counter = Counter()
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.db_time = Histogram(LATENCY_BUCKETS)
+        self.render_time = Histogram(LATENCY_BUCKETS)
+        self.size = Histogram(SIZE_BUCKETS)
+        self.recent: deque = deque(maxlen=settings.METRICS_WINDOW)
+
+    def observe(self, metrics: RequestMetrics) -> None:
+        self.responses[metrics.status] += 1
+        self.latency.observe(metrics.latency)
+        self.queries.observe(metrics.queries)
+        self.db_time.observe(metrics.db_time)
+        self.render_time.observe(metrics.render_time)
+        if metrics.size is not None:
+            self.size.observe(metrics.size)
+        self.recent.append(metrics.latency)
+
+    def quantiles(self) -> dict[float, float]:
+        recent = sorted(self.recent)
+        return {q: recent[min(len(recent) - 1, int(len(recent) * q))] for q in QUANTILES} if recent else {}
+
+
+class Registry:
+    """
+    Per-process request statistics by URL name and method: cumulative
+    histograms in the Prometheus text format, plus latency quantiles over
+    the last METRICS_WINDOW requests of each endpoint.
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.endpoints: dict[tuple[str, str], EndpointStats] = {}
+
+    def record(self, metrics: RequestMetrics) -> None:
+        with self.lock:
+            stats = self.endpoints.get((metrics.view, metrics.method))
+            if stats is None:
+                stats = self.endpoints[(metrics.view, metrics.method)] = EndpointStats()
+            stats.observe(metrics)
+
+    def render(self) -> str:
+        histograms = (
+            ('todolist_http_request_duration_seconds', 'latency', 'Request latency.'),
+            ('todolist_http_request_queries', 'queries', 'Database queries per request.'),
+            ('todolist_http_request_db_seconds', 'db_time', 'Time spent in database queries per request.'),
+            ('todolist_http_render_seconds', 'render_time', 'Time spent serializing the response body.'),
+            ('todolist_http_response_size_bytes', 'size', 'Response body size.'),
+        )
+        pid = os.getpid()
+        with self.lock:
+            endpoints = sorted(self.endpoints.items())
+            lines = [
+                '# HELP todolist_http_responses_total Responses by endpoint and status.',
+                '# TYPE todolist_http_responses_total counter',
+            ]
+            for (view, method), stats in endpoints:
+                for status, count in sorted(stats.responses.items()):
+                    lines.append(
+                        f'todolist_http_responses_total{{view="{view}",method="{method}",status="{status}",pid="{pid}"}} '
+                        f'{count}'
+                    )
+            for name, attr, help_text in histograms:
+                lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+                for (view, method), stats in endpoints:
+                    lines += getattr(stats, attr).render(name, f'view="{view}",method="{method}",pid="{pid}"')
+            lines += [
+                '# HELP todolist_http_request_duration_recent_seconds Latency quantiles of the latest requests.',
+                '# TYPE todolist_http_request_duration_recent_seconds gauge',
+            ]
+            for (view, method), stats in endpoints:
+                for q, value in stats.quantiles().items():
+                    lines.append(
+                        f'todolist_http_request_duration_recent_seconds'
+                        f'{{view="{view}",method="{method}",pid="{pid}",quantile="{q}"}} {value}'
+                    )
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+def explain(connection: Any, sql: str, params: Any) -> str:
+    token = current.set(None)
+    try:
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN {sql}', params)
+            return '\n'.join(row[0] for row in cursor.fetchall())
+    except DatabaseError as exc:
+        return f'EXPLAIN failed: {exc}'
+    finally:
+        current.reset(token)
+
+
+def record_query(execute: Any, sql: str, params: Any, many: bool, context: dict) -> Any:
+    metrics = current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    try:
+        result = execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - started
+        metrics.queries += 1
+        metrics.db_time += duration
+
+    threshold = settings.SLOW_QUERY_MS
+    if threshold and duration * 1000 >= threshold and not many and sql.lstrip()[:6].upper() == 'SELECT':
+        connection = context['connection']
+        logger.warning(
+            'Slow query (%.1f ms) in %s:\n%s\n%s',
+            duration * 1000, metrics.path, connection.ops.last_executed_query(context['cursor'], sql, params),
+            explain(connection, sql, params),
+        )
+    return result
+
+
+def finish_request(metrics: RequestMetrics) -> None:
+    """Records ``metrics`` and holds them to the QUERY_BUDGETS entry of their view."""
+    metrics.latency = time.perf_counter() - metrics.started
+    registry.record(metrics)
+
+    budget = settings.QUERY_BUDGETS.get(metrics.view)
+    if budget is not None and metrics.queries > budget:
+        message = f'{metrics.method} {metrics.view} ran {metrics.queries} queries, budget is {budget}'
+        if settings.METRICS_ENFORCE_QUERY_BUDGETS:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+
+
+def instrument_connection(connection: Any, **kwargs: Any) -> None:
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class TimedJSONRenderer(FastJSONRenderer):
+    def render(self, data: Any, accepted_media_type: Optional[str] = None, renderer_context: Any = None) -> bytes:
+        started = time.perf_counter()
+        try:
+            return super().render(data, accepted_media_type, renderer_context)
+        finally:
+            metrics = current.get()
+            if metrics is not None:
+                metrics.render_time += time.perf_counter() - started
+
+
+class MetricsMiddleware(MiddlewareMixin):
+    """
+    Records latency, query count and time, render time and response size of
+    every request under its URL name; streaming responses once they are
+    sent. Requests over their QUERY_BUDGETS entry are logged, or fail with
+    METRICS_ENFORCE_QUERY_BUDGETS (for tests).
+    """
+
+    def __init__(self, get_response: Any) -> None:
+        super().__init__(get_response)
+        connection_created.connect(instrument_connection, dispatch_uid='todolist.metrics')
+        for connection in connections.all(initialized_only=True):
+            instrument_connection(connection)
+
+    def __call__(self, request: HttpRequest) -> Any:
+        if asyncio.iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = RequestMetrics(request.method, request.path)
+        token = current.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            current.reset(token)
+        return self.finish(request, response, metrics)
+
+    async def __acall__(self, request: HttpRequest) -> Any:
+        metrics = RequestMetrics(request.method, request.path)
+        token = current.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current.reset(token)
+        return self.finish(request, response, metrics)
+
+    def finish(self, request: HttpRequest, response: HttpResponse, metrics: RequestMetrics) -> HttpResponse:
+        if request.resolver_match is not None:
+            metrics.view = request.resolver_match.view_name
+        metrics.status = response.status_code
+        if response.streaming:
+            # The body of a streaming response, and its queries, are produced while it is sent.
+            response.streaming_content = self.measure_stream(response.streaming_content, metrics)
+            return response
+        metrics.size = len(response.content)
+        finish_request(metrics)
+        return response
+
+    def measure_stream(self, chunks: Iterator[bytes], metrics: RequestMetrics) -> Iterator[bytes]:
+        metrics.size = 0
+        while True:
+            token = current.set(metrics)
+            try:
+                chunk = next(chunks, None)
+            finally:
+                current.reset(token)
+            if chunk is None:
+                break
+            metrics.size += len(chunk)
+            yield chunk
+        finish_request(metrics)
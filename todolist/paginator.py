@@ -0,0 +1,45 @@
+import json
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+
+
+def estimate_count(queryset: QuerySet) -> int:
+    """Number of rows the planner expects ``queryset`` to return, from EXPLAIN; nothing is read."""
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def count_or_estimate(queryset: QuerySet) -> tuple[int, bool]:
+    """
+    Exact ``COUNT(*)`` when ``queryset`` has at most EXACT_COUNT_THRESHOLD
+    rows, the planner estimate otherwise (counting millions of rows exactly
+    reads all of them), and whether the count is the estimate. The count
+    stops at EXACT_COUNT_THRESHOLD + 1 rows, so a planner that is wrong
+    either way neither shows an estimate for a short list nor reads a
+    large one.
+    """
+    threshold = settings.EXACT_COUNT_THRESHOLD
+    count = queryset.order_by()[:threshold + 1].count()
+    if count <= threshold:
+        return count, False
+    return max(estimate_count(queryset), count), True
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator whose count of large querysets is the planner estimate, see ``count_or_estimate``."""
+
+    @cached_property
+    def count(self) -> int:
+        if not isinstance(self.object_list, QuerySet):
+            return super().count
+        return count_or_estimate(self.object_list)[0]
+
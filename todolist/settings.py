@@ -23,6 +23,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'django_extensions',
     # Third-party apps
     'rest_framework',
@@ -34,11 +35,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'todolist.metrics.MetricsMiddleware',
+    'todolist.db.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.CachedAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -63,6 +66,13 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'todolist.wsgi.application'
 
+# Serve the read-heavy API views with async handlers (for ASGI workers).
+ASYNC_VIEWS = env.bool('ASYNC_VIEWS', default=False)
+
+# Requests handled at once by one ASGI worker; each of them holds a database
+# connection, so workers * ASGI_MAX_CONCURRENCY must stay below max_connections.
+ASGI_MAX_CONCURRENCY = env.int('ASGI_MAX_CONCURRENCY', default=20)
+
 
 # Database
 # https://docs.djangoproject.com/en/4.1/ref/settings/#databases
@@ -78,8 +88,68 @@ DATABASES = {
     }
 }
 
+# Read replicas of the primary, e.g. POSTGRES_REPLICA_HOSTS=replica1,replica2.
+# GET requests read from them (see todolist/db.py), except for users who wrote
+# something in the last DATABASE_REPLICA_PIN_SECONDS; the cache has to be
+# shared by all workers for that.
+DATABASE_REPLICAS = []
+for number, host in enumerate(env.list('POSTGRES_REPLICA_HOSTS', default=[]), 1):
+    DATABASES[f'replica_{number}'] = {**DATABASES['default'], 'HOST': host, 'TEST': {'MIRROR': 'default'}}
+    DATABASE_REPLICAS.append(f'replica_{number}')
+DATABASE_ROUTERS = ['todolist.db.ReplicaRouter']
+DATABASE_REPLICA_PIN_SECONDS = env.int('DATABASE_REPLICA_PIN_SECONDS', default=5)
+
+# Cache
+# https://docs.djangoproject.com/en/4.1/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': env('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': env('CACHE_LOCATION', default=''),
+    }
+}
+
+# Sessions and request users are cached only when the cache is shared by all
+# workers: with the per-process LocMemCache a logout or password change would
+# not reach the other workers.
+AUTH_CACHE_ENABLED = env.bool('AUTH_CACHE_ENABLED', default='locmem' not in CACHES['default']['BACKEND'])
+AUTH_USER_CACHE_TIMEOUT = env.int('AUTH_USER_CACHE_TIMEOUT', default=300)
+SESSION_ENGINE = f'django.contrib.sessions.backends.{"cached_db" if AUTH_CACHE_ENABLED else "db"}'
+
+GOALS_CACHE_ALIAS = 'default'
+GOALS_CACHE_TIMEOUT = env.int('GOALS_CACHE_TIMEOUT', default=300)
+GOALS_SYNC_OVERLAP = env.int('GOALS_SYNC_OVERLAP', default=5)
+GOALS_SYNC_PAGE_SIZE = env.int('GOALS_SYNC_PAGE_SIZE', default=1000)
+GOALS_BULK_MAX_ITEMS = env.int('GOALS_BULK_MAX_ITEMS', default=1000)
+GOALS_IMPORT_BATCH_SIZE = env.int('GOALS_IMPORT_BATCH_SIZE', default=1000)
+GOALS_CALENDAR_MAX_BUCKETS = env.int('GOALS_CALENDAR_MAX_BUCKETS', default=62)
+# Archived goals and deleted categories are moved to goals.Archive after this
+# many days by the purge_archived command.
+GOALS_RETENTION_DAYS = env.int('GOALS_RETENTION_DAYS', default=90)
+GOALS_RETENTION_BATCH_SIZE = env.int('GOALS_RETENTION_BATCH_SIZE', default=200)
+# Tombstones are deleted after this many days by the same command; a client
+# that last synced before that gets a full snapshot with reset set.
+GOALS_TOMBSTONE_DAYS = env.int('GOALS_TOMBSTONE_DAYS', default=30)
+
+# Change events pushed to /goals/events (ASGI only). InMemoryBroker reaches the
+# streams of one process; PostgresBroker those of every worker and node.
+GOALS_EVENTS_BROKER = env('GOALS_EVENTS_BROKER', default='todolist.goals.events.InMemoryBroker')
+GOALS_EVENTS_CHANNEL = 'goals_events'
+GOALS_EVENTS_KEEPALIVE = env.int('GOALS_EVENTS_KEEPALIVE', default=15)
+GOALS_EVENTS_QUEUE_SIZE = env.int('GOALS_EVENTS_QUEUE_SIZE', default=100)
+GOALS_EVENTS_RECONNECT_MAX_DELAY = env.float('GOALS_EVENTS_RECONNECT_MAX_DELAY', default=30)
+
+# Paginated querysets larger than this show the planner estimate instead of an
+# exact COUNT(*) (admin changelists and API lists).
+EXACT_COUNT_THRESHOLD = env.int('EXACT_COUNT_THRESHOLD', default=10000)
+
 AUTH_USER_MODEL = 'core.User'
 
+# Password hashing runs in a process pool of this many processes per web worker.
+PASSWORD_HASHING_WORKERS = env.int('PASSWORD_HASHING_WORKERS', default=1)
+PASSWORD_HASHING_MAX_PENDING = env.int('PASSWORD_HASHING_MAX_PENDING', default=8)
+PASSWORD_HASHING_TIMEOUT = env.float('PASSWORD_HASHING_TIMEOUT', default=5)
+
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
 
@@ -128,5 +198,43 @@ AUTHENTICATION_BACKENDS = (
 )
 
 REST_FRAMEWORK = {
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination'
-}
\ No newline at end of file
+    'DEFAULT_PAGINATION_CLASS': 'todolist.goals.pagination.KeysetPagination',
+    'DEFAULT_RENDERER_CLASSES': [
+        'todolist.metrics.TimedJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+}
+
+# Request metrics, served at /metrics to staff users and to METRICS_TOKEN bearers.
+METRICS_TOKEN = env('METRICS_TOKEN', default='')
+METRICS_WINDOW = env.int('METRICS_WINDOW', default=1000)
+# SELECTs slower than this are logged with their EXPLAIN plan; 0 turns it off.
+SLOW_QUERY_MS = env.int('SLOW_QUERY_MS', default=200)
+# Most queries a request to each URL name may run, including the session and
+# user lookups. Exceeding one is logged, or raises QueryBudgetExceeded with
+# METRICS_ENFORCE_QUERY_BUDGETS (tests).
+QUERY_BUDGETS = {
+    'core:profile': 3,
+    'todolist.goals:create-category': 5,
+    'todolist.goals:category-list': 6,
+    'todolist.goals:goal-category': 6,
+    'todolist.goals:create-goal': 5,
+    'todolist.goals:goal-list': 6,
+    'todolist.goals:goal': 5,
+    'todolist.goals:bulk-create-goal': 5,
+    'todolist.goals:bulk-update-goal': 5,
+    'todolist.goals:bulk-archive-goal': 5,
+    'todolist.goals:goal-stats': 4,
+    'todolist.goals:goal-board': 4,
+    'todolist.goals:goal-calendar': 5,
+    'todolist.goals:create-comment': 5,
+    'todolist.goals:comment-list': 6,
+    'todolist.goals:comment': 6,
+    'todolist.goals:sync': 6,
+    'todolist.goals:archive-list': 6,
+    'todolist.goals:archive-restore': 14,
+    'todolist.goals:export': 7,
+    'todolist.goals:import': 8,
+    'todolist.goals:events': 3,
+}
+METRICS_ENFORCE_QUERY_BUDGETS = env.bool('METRICS_ENFORCE_QUERY_BUDGETS', default=False)
\ No newline at end of file
@@ -0,0 +1,132 @@
+import datetime
+import decimal
+
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITransactionTestCase
+
+from todolist.db import PIN_KEY, ReplicaRouter, RequestRouting, current
+from todolist.goals.models import Goal, GoalCategory, GoalComment
+from todolist.goals.serializers import GoalCategorySerializer, GoalCommentSerializer, GoalCreateSerializer
+from todolist.goals.tests import GoalsAPITestCase, GoalsAPITestMixin
+from todolist.renderers import FastJSONRenderer
+
+REPLICA = 'replica_test'
+# Set up before the test runner creates the databases, like the replica_N
+# aliases of POSTGRES_REPLICA_HOSTS: a second connection to the test database.
+connections.settings.setdefault(REPLICA, {**connections.settings['default'], 'TEST': {'MIRROR': 'default'}})
+
+
+@override_settings(DATABASE_REPLICAS=[REPLICA])
+class ReplicaRoutingTests(GoalsAPITestMixin, APITransactionTestCase):
+    databases = {'default', REPLICA}
+
+    def request(self, method: str, name: str, *args: int, data: object = None) -> tuple[list[str], list[str]]:
+        """The SQL the request ran on the primary and on the replica."""
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections[REPLICA]) as replica:
+            response = getattr(self.client, method)(reverse(name, args=args), data, format='json')
+        self.assertLess(response.status_code, 400, response.data)
+        return [query['sql'] for query in primary], [query['sql'] for query in replica]
+
+    def test_reads_go_to_the_replica(self) -> None:
+        goal = self.create_goals(1)[0]
+        primary, replica = self.request('get', 'todolist.goals:goal-list', data={'limit': 5})
+        # The session and the user are loaded before the view, and with it the replica, is picked.
+        self.assertEqual(len(primary), 2)
+        self.assertIn('"django_session"', primary[0])
+        self.assertIn('"core_user"', primary[1])
+        self.assertEqual(len(replica), 2)
+        self.assertTrue(all('"goals_goal"' in sql for sql in replica))
+
+        primary, replica = self.request('get', 'todolist.goals:goal', goal.id)
+        self.assertEqual(len(primary), 2)
+        self.assertEqual(len(replica), 1)
+
+    def test_writes_go_to_the_primary(self) -> None:
+        primary, replica = self.request('post', 'todolist.goals:create-category', data={'title': 'Дом'})
+        self.assertEqual(replica, [])
+        self.assertTrue(any('INSERT INTO "goals_goalcategory"' in sql for sql in primary))
+
+    def test_router(self) -> None:
+        router = ReplicaRouter()
+        self.assertEqual(router.db_for_read(Goal), 'default')
+        token = current.set(RequestRouting())
+        try:
+            current.get().replica = REPLICA
+            self.assertEqual(router.db_for_read(Goal), REPLICA)
+            with transaction.atomic():
+                self.assertEqual(router.db_for_read(Goal), 'default')
+            self.assertEqual(router.db_for_read(Goal), REPLICA)
+            # The rest of a request that wrote reads from the primary.
+            self.assertEqual(router.db_for_write(GoalCategory), 'default')
+            self.assertEqual(router.db_for_read(Goal), 'default')
+        finally:
+            current.reset(token)
+
+    def test_read_your_writes(self) -> None:
+        self.request('post', 'todolist.goals:create-category', data={'title': 'Дом'})
+        primary, replica = self.request('get', 'todolist.goals:category-list', data={'limit': 5})
+        self.assertEqual(replica, [])
+        self.assertTrue(any('goals_goalcategory' in sql for sql in primary))
+
+        cache.delete(PIN_KEY.format(user_id=self.user.id))
+        primary, replica = self.request('get', 'todolist.goals:category-list', data={'limit': 6})
+        self.assertTrue(any('goals_goalcategory' in sql for sql in replica))
+
+    def test_opt_out(self) -> None:
+        primary, replica = self.request('get', 'todolist.goals:sync')
+        self.assertEqual(replica, [])
+        self.assertTrue(any('goals_goal' in sql for sql in primary))
+
+
+class FastJSONRendererTests(GoalsAPITestCase):
+    def assert_same_bytes(self, data: object) -> None:
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_render(self) -> None:
+        self.assert_same_bytes({
+            'title': 'Цель "1"\n\u2028\u2029', 'nested': [{'id': 1, 'ok': True, 'none': None}, (2, 3)],
+            'created': datetime.datetime(2023, 3, 1, 12, 30, 15, 123456, tzinfo=datetime.timezone.utc),
+            'due_date': datetime.date(2023, 3, 1), 'big': 2 ** 70, 'amount': decimal.Decimal('1.50'),
+        })
+        self.assert_same_bytes({'floats': [1e16, 1e-07, 1e-05, 0.1, -0.0, 1.2345678901234568e20]})
+        with override_settings(REST_FRAMEWORK={'COERCE_DECIMAL_TO_STRING': False}):
+            self.assert_same_bytes([decimal.Decimal('1E+16')])
+
+    def test_nan(self) -> None:
+        for value in (float('nan'), float('inf')):
+            with self.assertRaises(ValueError):
+                JSONRenderer().render({'value': value})
+            with self.assertRaises(ValueError):
+                FastJSONRenderer().render({'value': value})
+
+    def assert_list_bytes(self, name: str, serializer_class: type, instances: dict) -> None:
+        """The fast path of a list view against its serializer with JSONRenderer, unpaginated and paginated."""
+        for params in ({}, {'limit': 3}):
+            response = self.client.get(reverse(name), params)
+            self.assertEqual(response.status_code, 200)
+            rows = response.data if not params else response.data['results']
+            data = serializer_class([instances[row['id']] for row in rows], many=True, context={}).data
+            if params:
+                data = {**response.data, 'results': data}
+            self.assertEqual(response.content, JSONRenderer().render(data))
+
+    def test_list_pages(self) -> None:
+        goals = self.create_goals(4)
+        goals[0].description = 'Описание с "кавычками", \\ и \u2028'
+        goals[0].due_date = datetime.date(2023, 3, 1)
+        goals[0].save()
+        self.create_comments(goals[0], 4)
+        GoalCategory.objects.create(user=self.user, title='Дом \u2029')
+        GoalCategory.objects.create(user=self.user, title='Учёба')
+
+        self.assert_list_bytes(
+            'todolist.goals:category-list', GoalCategorySerializer, GoalCategory.objects.in_bulk(),
+        )
+        self.assert_list_bytes('todolist.goals:goal-list', GoalCreateSerializer, Goal.objects.in_bulk())
+        self.assert_list_bytes('todolist.goals:comment-list', GoalCommentSerializer, GoalComment.objects.in_bulk())
@@ -2,11 +2,15 @@ from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
 
+from todolist.views import MetricsView, ReadinessView
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('core/', include(('core.urls', 'core'))),
     path('goals/', include(('todolist.goals.urls', 'todolist.goals'))),
     path('oauth/', include('social_django.urls', namespace='social')),
+    path('metrics', MetricsView.as_view(), name='metrics'),
+    path('ready', ReadinessView.as_view(), name='ready'),
 ]
 
 if settings.DEBUG:
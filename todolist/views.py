@@ -0,0 +1,43 @@
+from typing import Any
+
+from django.conf import settings
+from django.db import DatabaseError, connection
+from django.http import HttpResponse, JsonResponse
+from django.utils.crypto import constant_time_compare
+from rest_framework.permissions import BasePermission
+from rest_framework.request import Request
+from rest_framework.views import APIView
+
+from todolist.metrics import registry
+
+
+class MetricsPermission(BasePermission):
+    """Staff users, or a scraper presenting METRICS_TOKEN as a bearer token."""
+
+    def has_permission(self, request: Request, view: Any) -> bool:
+        token = settings.METRICS_TOKEN
+        authorization = request.headers.get('Authorization', '')
+        if token and constant_time_compare(authorization, f'Bearer {token}'):
+            return True
+        return bool(request.user and request.user.is_staff)
+
+
+class MetricsView(APIView):
+    permission_classes = [MetricsPermission]
+
+    def get(self, request: Request, *args: Any, **kwargs: Any) -> HttpResponse:
+        return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+class ReadinessView(APIView):
+    """Whether this instance can serve requests: it is up and reaches the database. No session or user lookups."""
+    authentication_classes = []
+    permission_classes = []
+
+    def get(self, request: Request, *args: Any, **kwargs: Any) -> HttpResponse:
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+        except DatabaseError:
+            return JsonResponse({'status': 'unavailable'}, status=503)
+        return JsonResponse({'status': 'ok'})